@@ -11,7 +11,7 @@ async def matchmaking_endpoint(
     ws: WebSocket, user_id: int = Depends(get_current_user_ws)
 ):
     await ws.accept()
-    matchmaker_service.connections[user_id] = ws
+    await matchmaker_service.connect(user_id, ws)
 
     try:
         while True:
@@ -23,20 +23,23 @@ async def matchmaking_endpoint(
                 friends = data.get("friends", [])  # List of IDs
                 target = data.get("game_size", 2)
 
-                new_group = MatchGroup([user_id] + friends, target_size=target)
-                matchmaker_service.add_group(new_group)
-                
-                await ws.send_json({"status": "queued", "group_id": new_group.id})
+                # Listing yourself among your friends does not take a second seat
+                new_group = MatchGroup(list(dict.fromkeys([user_id] + friends)), target_size=target)
+                try:
+                    await matchmaker_service.join(new_group)
+                except ValueError as e:
+                    await ws.send_json({"status": "error", "message": str(e)})
+                    continue
 
-                # Run the algorithmic check
-                await matchmaker_service.check_and_start_matches()
+                # Tables are filled by the matchmaker's background tick
+                await ws.send_json({"status": "queued", "group_id": new_group.id})
 
             elif action == "leave":
-                matchmaker_service.remove_player(user_id)
+                await matchmaker_service.leave(user_id)
                 await ws.send_json({"status": "left"})
             elif action =="send_message":
                 print("player sent a message")
                 pass
 
     except WebSocketDisconnect:
-        matchmaker_service.remove_player(user_id)
+        await matchmaker_service.disconnect(user_id)
@@ -1,20 +1,54 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Request
+from app.config import LOGIN_TRUSTED_PROXY_HEADER
 from app.schemas.auth_schema import registerUserSchema, loginUserSchema, TokenResponse
 from app.services import auth_service
+from app.services.login_throttle import login_throttle
+from app.services.password_pool import PasswordPoolBusy
 from typing import List, Optional
 
 router = APIRouter(prefix="/auth")
 
 
+def _too_busy() -> HTTPException:
+    # The password pool is full; a client should retry rather than treat this as bad credentials
+    return HTTPException(
+        status_code=503, detail="Too many sign-ins, retry shortly", headers={"Retry-After": "1"}
+    )
+
+
+def _client_ip(request: Request) -> str:
+    if LOGIN_TRUSTED_PROXY_HEADER:
+        # Set by our proxy; earlier entries are whatever the client sent, so only the last counts
+        forwarded = request.headers.get(LOGIN_TRUSTED_PROXY_HEADER, "")
+        if hops := [h.strip() for h in forwarded.split(",") if h.strip()]:
+            return hops[-1]
+    return request.client.host if request.client else "unknown"
+
+
+async def _throttle(request: Request, username: Optional[str]):
+    # Refuse before any password is hashed once this IP or account is over its limit
+    retry_after = await login_throttle.check(username, _client_ip(request))
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many login attempts, retry later",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
 @router.get("/status")
 async def auth_status():
     return {"status": "Authentication service is running"}
 
 
 @router.post("/register")
-async def register(data: registerUserSchema) -> TokenResponse:
-    # Registration logic here
-    user = auth_service.register_user(data.username, data.password)
+async def register(data: registerUserSchema, request: Request) -> TokenResponse:
+    # Registration logic here; each one hashes a password, so it counts against the IP limit
+    await _throttle(request, None)
+    try:
+        user = await auth_service.register_user(data.username, data.password)
+    except PasswordPoolBusy:
+        raise _too_busy()
     if user == 0:
         return TokenResponse(
             access_token="",
@@ -28,10 +62,13 @@ async def register(data: registerUserSchema) -> TokenResponse:
 
 
 @router.post("/login")
-async def login(data: loginUserSchema) -> TokenResponse:
+async def login(data: loginUserSchema, request: Request) -> TokenResponse:
     # Login logic here
+    await _throttle(request, data.username)
     try:
-        access_token = auth_service.authenticate_user(data.username, data.password)
+        access_token = await auth_service.authenticate_user(data.username, data.password)
+    except PasswordPoolBusy:
+        raise _too_busy()
     except Exception as e:
         print(f"Error during login: {e}")
         return TokenResponse(
@@ -39,6 +76,7 @@ async def login(data: loginUserSchema) -> TokenResponse:
             token_type="",
         )
     if not access_token:
+        await login_throttle.failed(data.username)
         return TokenResponse(
             access_token="",
             token_type="",
@@ -47,9 +85,14 @@ async def login(data: loginUserSchema) -> TokenResponse:
 
 
 @router.post("/change_password")
-async def change_password(username: str, old_password: str, new_password: str):
-    result = auth_service.change_password(username, old_password, new_password)
+async def change_password(username: str, old_password: str, new_password: str, request: Request):
+    await _throttle(request, username)
+    try:
+        result = await auth_service.change_password(username, old_password, new_password)
+    except PasswordPoolBusy:
+        raise _too_busy()
     if result:
         return {"message": "Password changed successfully"}
     else:
+        await login_throttle.failed(username)
         return {"message": "Failed to change password"}
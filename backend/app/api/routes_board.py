@@ -0,0 +1,12 @@
+from fastapi import APIRouter, HTTPException
+from app.services.landing_odds import get_landing_odds
+
+router = APIRouter(prefix="/board")
+
+
+@router.get("/probabilities")
+async def landing_probabilities(jail_strategy: str = "roll"):
+    """Long-run landing probability per roll and expected rent per roll for every square."""
+    if jail_strategy not in ("roll", "pay"):
+        raise HTTPException(status_code=400, detail="jail_strategy must be 'roll' or 'pay'")
+    return get_landing_odds(jail_strategy)
@@ -1,7 +1,12 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Request
 from app.models.gamesManager import getsManager
 from app.services import auth_service
 from app.models.Game import Game
+from app.services.ws_connection import connection_metrics
+from app.services.matchmaker import matchmaker_service
+from app.services.login_throttle import login_throttle
+from app.services.password_pool import password_pool
+from app.services.sharding import redirect_to_owner
 
 router = APIRouter()
 
@@ -12,6 +17,41 @@ async def get_all_games():
     return {"games": list(game_manager.games.keys())}
 
 
+@router.get("/debug/persistence")
+async def get_persistence_stats():
+    return getsManager().persister.stats()
+
+
+@router.get("/debug/residency")
+async def get_residency_stats():
+    return getsManager().residency_stats()
+
+
+@router.get("/debug/matchmaking")
+async def get_matchmaking_stats():
+    return matchmaker_service.stats()
+
+
+@router.get("/debug/passwords")
+async def get_password_pool_stats():
+    return password_pool.stats()
+
+
+@router.get("/debug/login_throttle")
+async def get_login_throttle_stats():
+    return login_throttle.stats()
+
+
+@router.get("/debug/bus")
+async def get_bus_stats():
+    return getsManager().bus.stats()
+
+
+@router.get("/debug/connections")
+async def get_connection_metrics():
+    return connection_metrics()
+
+
 @router.get("/auth/dump")
 async def dump_users():
     users = auth_service.get_all_users()
@@ -19,7 +59,12 @@ async def dump_users():
 
 
 @router.get("/game/{uuid}/state")
-async def get_game_state(uuid: str):
+async def get_game_state(uuid: str, request: Request):
     game_manager = getsManager()
-    game: Game = game_manager.get_game(str(uuid))
-    return game.state
+    if redirect := await redirect_to_owner(game_manager.shards, request, uuid):
+        return redirect
+    game: Game = await game_manager.get_game(str(uuid))
+    if not game:
+        await game_manager.shards.release([uuid])
+        raise HTTPException(status_code=404, detail="Game not found")
+    return game.state_view()
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 from app.models.gamesManager import gamesManager, getsManager
 from app.models.Game import Game
+from app.services.game_actor import GameBusy
+from app.services.sharding import redirect_to_owner
 from typing import Optional, Any
 
 router = APIRouter(prefix="/dev")
@@ -15,56 +17,74 @@ class DevUpdate(BaseModel):
 
 
 @router.post("/{game_id}/update")
-async def manual_update(game_id: str, data: DevUpdate):
+async def manual_update(game_id: str, data: DevUpdate, request: Request):
     manager: gamesManager = getsManager()
-    
-    game: Game = manager.get_game(game_id)
+    if redirect := await redirect_to_owner(manager.shards, request, game_id):
+        return redirect
+
+    game: Game = await manager.get_game(game_id)
 
     if not game:
+        await manager.shards.release([game_id])
         raise HTTPException(status_code=404, detail="Game not found")
     print(f"Dev Update Requested: {data}")
-    # 1. Update logic
-    if data.target == "add_property":
-        player = game.players_map.get(game.players.get(data.player_id))
-        property_id = int(data.value)  # The Square index (0-39)
-
-        # 1. Update Player's internal list if you track it there
-        if property_id not in player.properties:
-            player.properties.append(property_id)
-
-        # 2. Update the Board State in Game.state
-        # This ensures the UI renders the correct owner color
-        if "mutable_properties" not in game.state:
-            game.state["mutable_properties"] = {}
-
-        game.state["mutable_properties"][property_id] = {
-            "owner_id": player.id,
-            "houses": 0,
-            "hotel": False,
-        }
-    elif data.target == "player":
-        player = game.players_map.get(game.players.get(data.player_id))
-        if not player:
-            raise HTTPException(status_code=404, detail="Player not found")
-        setattr(player, data.field, data.value)
-
-    elif data.target == "game":
-        game.state[data.field] = data.value
-
-    # 2. Persist change to Redis (if you implemented Redis)
-    manager.save_game_to_redis(game)
-
-    # 3. CRITICAL: Trigger a broadcast so the frontend updates immediately
-    await game.broadcast(
-        {
-            "type": "DEV_UPDATE",
-            "message": f"Dev changed {data.field} to {data.value}",
-            "state": {
-                **game.state,
-                "players": list(game.get_players().values()),
-                "turn": game.turn.player_id,
-            },
-        }
-    )
+
+    async def edit():
+        # 1. Update logic
+        if data.target == "add_property":
+            player = game.players_map.get(game.players.get(data.player_id))
+            property_id = int(data.value)  # The Square index (0-39)
+
+            # 1. Update Player's internal list if you track it there
+            if property_id not in player.properties:
+                player.properties.append(property_id)
+                player.mark_dirty()
+
+            # 2. Update the Board State in Game.state
+            # This ensures the UI renders the correct owner color
+            if "mutable_properties" not in game.state:
+                game.state["mutable_properties"] = {}
+
+            game.state["mutable_properties"][property_id] = {
+                "owner_id": player.id,
+                "houses": 0,
+                "hotel": False,
+                "is_mortgaged": False,
+            }
+        elif data.target == "player":
+            player = game.players_map.get(game.players.get(data.player_id))
+            if not player:
+                raise HTTPException(status_code=404, detail="Player not found")
+            setattr(player, data.field, data.value)
+
+        elif data.target == "game":
+            game.state[data.field] = data.value
+
+        # Dev edits write state directly, so re-derive the ownership counters
+        game.rebuild_holdings()
+
+        # 2. Persist change to Redis; dev edits are not in the action log, so snapshot them
+        manager.save_game(game)
+        # A dev edit may change the phase the game is waiting on
+        manager.arm_timeout(game)
+
+        # 3. CRITICAL: Trigger a broadcast so the frontend updates immediately
+        await game.broadcast(
+            {
+                "type": "DEV_UPDATE",
+                "message": f"Dev changed {data.field} to {data.value}",
+                "state": {
+                    **game.state_view(),
+                    "players": game.players_list(),
+                    "turn": game.turn.player_id,
+                },
+            }
+        )
+
+    # Runs on the game's actor, so the edit cannot interleave with player actions
+    try:
+        await manager.run_in_game(game, edit)
+    except GameBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
     return {"status": "success"}
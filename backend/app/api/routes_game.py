@@ -14,6 +14,10 @@ from app.models.board import Square, get_board
 from app.models.Game import Game, Turn
 from app.models.gamesManager import gamesManager, getsManager
 from app.api.security import get_current_user_ws
+from app.services.game_actions import game_snapshot, snapshot_overlay
+from app.services.ws_codec import negotiate, receive_message
+from app.services.ws_connection import GameConnection
+from app.services.sharding import REDIRECT_CLOSE_CODE, ShardUnavailable
 
 STATIC_BOARD_TILES: Dict[int, Square] = get_board().tiles
 
@@ -30,9 +34,26 @@ async def game_endpoint(
     await ws.accept()
     print(f"Player {player_id} connected to game {uuid}")
     game_manager = getsManager()
-    game: Game = game_manager.get_game(uuid)
+
+    # Each game is served by exactly one worker; relay to it over the bus, or send the client there
+    try:
+        owner = await game_manager.shards.locate(uuid)
+    except ShardUnavailable:
+        await ws.close(code=1013)
+        return
+    if owner is not None:
+        worker_id, base = owner
+        if game_manager.bus.enabled:
+            await relay_to_owner(ws, game_manager, uuid, player_id, worker_id)
+        else:
+            await ws.send_json({"type": "redirect", "base": base})
+            await ws.close(code=REDIRECT_CLOSE_CODE)
+        return
+
+    game: Game = await game_manager.get_game(uuid)
 
     if not game:
+        await game_manager.shards.release([uuid])
         await ws.send_json({"type": "error", "message": "Game not found"})
         await ws.close()
         return
@@ -40,151 +61,72 @@ async def game_endpoint(
 
 
     
-    # Helper function to get the current snapshot of the game
-    def get_game_snapshot(event_type: str, extra_data: dict = {}) -> dict:
-        players_list = list(game.get_players().values())
-
-        snapshot = {
-            "type": event_type,
-            "state": {
-                **game.state,
-                "players": players_list,
-                "turn": game.turn_order[game.state["turn_index"]],
-            },
-        }
-        # If the game is in a phase where a property is for sale, include that property in the snapshot (good for reconncet)
-        if game.state["phase"] == "DECIDE_TO_BUY":
-            current_player = game.players_map.get(game.players.get(player_id))
-            if current_player:
-                prop = STATIC_BOARD_TILES[current_player.position]
-                snapshot["state"]["propertyForSale"] = prop.model_dump()
-        if game.state["phase"] == "AUCTION":
-            snapshot["state"]["auction"] = {
-                "property_id": game.state.get("auction_property_id"),
-                "highest_bid": game.state.get("highest_bid"),
-                "highest_bidder": game.state.get("highest_bidder"),
-                "active_bidders": game.state.get("active_bidders"),
-            }
-        if extra_data:
-            snapshot["state"].update(extra_data)
-        
-        return snapshot
-
+    # JSON unless the client asked for ?encoding=msgpack
+    conn = GameConnection(ws, player_id, negotiate(ws.query_params.get("encoding"))).start()
     try:
         is_reconnect = player_id in game.players_map and player_id not in game.connections
-        game.connections[player_id] = ws
+        game.connections[player_id] = conn
 
         # Full snapshot only to the (re)connecting player
-        await ws.send_json(get_game_snapshot("game_start"))
+        conn.send(game_snapshot(game, "game_start"))
+        if overlay := snapshot_overlay(game, player_id):
+            conn.send(overlay)
 
         if is_reconnect:
-            # Lightweight notice to everyone else
-            for pid, conn in game.connections.items():
-                if pid != player_id:
-                    await conn.send_json({"type": "player_reconnected", "player_id": player_id})
+            # Lightweight notice to everyone (players on other workers included)
+            await game.broadcast({"type": "player_reconnected", "player_id": player_id})
 
         while True:
-            data_raw = await ws.receive_json()
+            data_raw = await receive_message(ws)
             data = WSMessage(**data_raw)
-            current_player = game.players_map.get(player_id)
             if data.action =="leave_game":
-                print(f"Player {player_id} leaving game {game.uuid}")
-                await game.leave_game(player_id)
-                await ws.close()
+                print(f"Player {player_id} leaving game {game.id}")
+                await game_manager.submit(game, player_id, data.action, data.payload)
                 break
-            if not current_player:
-                await ws.send_json({"type": "error", "message": "Player not in game!"})
-                continue
-            if data.action == "mortgage_property":
-                square_id = data.payload.get("square_id")
-                await game.mortgage_property(player_id, square_id)
-                await game.broadcast(get_game_snapshot("property_mortgaged"))
-                continue
-            if data.action == "CHAT":
-                message_data = data.payload
-                # Broadcast this message to all connected clients in the same game room
-                await game.broadcast({"type": "chat_message", "data": message_data})
-            # 1. Validation: Is it the player's turn?
-            # (Only validate for actions that require a turn)
-            is_turn = game.turn_order[game.state["turn_index"]] == current_player.id
-            if (
-                data.action in ["roll_dice", "buy_property", "pass_on_buy"]
-                and not is_turn
-            ):
-                await ws.send_json({"type": "error", "message": "Not your turn!"})
-                continue
-
-            # 2. Action Logic
-            if data.action == "reset_game":
-                game.reset_game()
-                await game.broadcast(get_game_snapshot("reset_game"))
-
-            elif data.action == "roll_dice":
-                print("Rolling dice")
-                dice_result = await game.roll_dice(player_id)
-
-                # Check if we landed on a property to trigger the BUY phase
-                extra = {
-                    "action": "dice_rolled",
-                    "dice": dice_result,
-                    "new_position": current_player.position,
-                }
-
-                # If game logic moved phase to DECIDE_TO_BUY, include property info
-                if game.state["phase"] == "DECIDE_TO_BUY":
-                    prop = STATIC_BOARD_TILES[current_player.position]
-                    extra["propertyForSale"] = prop.model_dump()
-                await game.broadcast(get_game_snapshot("game_update", extra))
+            # Runs on the game's actor, after actions already queued from other sockets
+            if error := await game_manager.submit(game, player_id, data.action, data.payload):
+                conn.send({"type": "error", "message": error})
+    except WebSocketDisconnect:
+        print(f"Player {player_id} disconnected from {uuid}")
+    finally:
+        # A newer socket for the same player may already have replaced this one
+        if game.connections.get(player_id) is conn:
+            del game.connections[player_id]
+        await conn.close()
 
-            elif (
-                data.action == "buy_property" and game.state["phase"] == "DECIDE_TO_BUY"
-            ):
-                print("Buying property")
-                await game.buy_property(player_id, current_player.position)
-                await game.broadcast(get_game_snapshot("property_bought"))
 
-            # auction start
-            elif (
-                data.action == "pass_on_buy" and game.state["phase"] == "DECIDE_TO_BUY"
+async def relay_to_owner(
+    ws: WebSocket, game_manager: gamesManager, uuid: str, player_id: int, owner_id: str
+):
+    """
+    Serves a socket for a game another worker owns: updates arrive over the
+    game bus, and the player's actions are forwarded to the owner's inbox.
+    """
+    bus = game_manager.bus
+    conn = GameConnection(ws, player_id, negotiate(ws.query_params.get("encoding"))).start()
+    # Subscribe before asking for the snapshot, so it cannot be missed
+    await bus.attach(uuid, player_id, conn)
+    try:
+        if not await bus.forward(owner_id, uuid, player_id, "join"):
+            await conn.close(1013)
+            return
+        while True:
+            data = WSMessage(**await receive_message(ws))
+            if not await bus.forward(
+                owner_id, uuid, player_id, "action", action=data.action, payload=data.payload
             ):
-                print("Passing on buying property: ", game.state["turn_index"])
-                game.state["phase"] = "AUCTION_PROPERTY"
-                await game.start_auction(current_player.position, player_id)
-
-            elif data.action == "jail_action":
-                action_type = data.payload.get("action", "")
-                print(f"Player {player_id} performing jail action: {action_type}")
-                await game.jail_decision(player_id, action_type)
-                await game.broadcast(get_game_snapshot("game_update"))
-
-            elif data.action == "build_house":
-                property_id = data.payload.get("square_id", -1)
-                print(f"Player {player_id} building on property: {property_id}")
-                await game.build_house(player_id, property_id)
-                await game.broadcast(get_game_snapshot("house_built"))
-
-            if game.state["phase"] == "AUCTION":
-                if data.action == "place_bid":
-                    print("bidding !!!!!!!!!!!", game.state)
-
-                    print(f"Player {player_id} placing bid")
-                    bid_amount = data.payload.get("amount", 0)
-                    print(f"Bid amount: {bid_amount}")
-                    await game.place_bid(player_id, bid_amount)
-                elif data.action == "fold_auction":
-                    print(f"Player {player_id} folding from auction")
-                    await game.fold_auction(player_id)
-
-            if game.state["phase"] == "WAIT_FOR_NEXT_TURN":
-                if game.turn.active == False:
-                    print(f"Player {player_id} ending turn")
-                    game.end_turn()
-                    await game.broadcast(get_game_snapshot("end_turn"))
-                else:
-                    game.state["phase"] = "WAIT_FOR_ROLL"
-
-                    await game.broadcast(get_game_snapshot("roll_dice"))
+                # The owner went away; on reconnect the client is routed to the new one
+                await conn.close(1012)
+                return
+            if data.action == "leave_game":
+                break
     except WebSocketDisconnect:
-        print(f"Player {player_id} disconnected from {uuid}")
-        if player_id in game.connections:
-            del game.connections[player_id]
+        print(f"Player {player_id} disconnected from {uuid} (relayed)")
+    finally:
+        await bus.detach(uuid, player_id, conn)
+        await conn.close()
+        # Until told, the owner counts the player as connected and keeps the game resident
+        try:
+            await bus.forward(owner_id, uuid, player_id, "detach")
+        except Exception as e:
+            print(f"Could not report player {player_id} leaving {uuid} to its owner: {e}")
@@ -0,0 +1,99 @@
+import argparse
+import asyncio
+import json
+import time
+from typing import List, Optional, Sequence
+
+from app.services.password_pool import (
+    PasswordPool,
+    PasswordPoolBusy,
+    check_password,
+    hash_password,
+)
+
+
+async def _game_traffic(stop: asyncio.Event, interval: float, latencies: List[float]):
+    """
+    Stands in for a game socket: a message arrives every `interval` seconds
+    and its latency is how long after arriving the loop gets round to it.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def handler():
+        while True:
+            arrived = await queue.get()
+            latencies.append(time.perf_counter() - arrived)
+
+    task = asyncio.create_task(handler())
+    due = time.perf_counter()
+    while True:
+        # Messages that arrived while the loop was blocked are all overdue
+        while due <= time.perf_counter():
+            queue.put_nowait(due)
+            due += interval
+        if stop.is_set():
+            break
+        await asyncio.sleep(max(0.0, due - time.perf_counter()))
+    await asyncio.sleep(interval)
+    task.cancel()
+
+
+async def _burst(mode: str, logins: int, hashed: str, pool: PasswordPool) -> dict:
+    async def login():
+        if mode == "inline":
+            # What the routes used to do: bcrypt straight on the event loop
+            return check_password("correct horse", hashed)
+        try:
+            return await pool.check("correct horse", hashed)
+        except PasswordPoolBusy:
+            return None
+
+    stop = asyncio.Event()
+    latencies: List[float] = []
+    traffic = asyncio.create_task(_game_traffic(stop, 0.005, latencies))
+    await asyncio.sleep(0.1)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await traffic
+
+    latencies.sort()
+    return {
+        "mode": mode,
+        "logins": logins,
+        "accepted": sum(r is not None for r in results),
+        "rejected_503": sum(r is None for r in results),
+        "burst_s": round(elapsed, 3),
+        "game_msgs": len(latencies),
+        "game_latency_p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "game_latency_p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 2),
+        "game_latency_max_ms": round(latencies[-1] * 1000, 2),
+    }
+
+
+async def run(logins: int, rounds: int, workers: int, queue_limit: int) -> List[dict]:
+    hashed = hash_password("correct horse", rounds)
+    pool = PasswordPool(workers, queue_limit)
+    try:
+        return [await _burst(mode, logins, hashed, pool) for mode in ("inline", "pool")]
+    finally:
+        pool.shutdown()
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Game message latency while a burst of logins runs bcrypt"
+    )
+    parser.add_argument("--logins", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--queue-limit", type=int, default=32)
+    args = parser.parse_args(argv)
+    report = asyncio.run(run(args.logins, args.rounds, args.workers, args.queue_limit))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,138 @@
+import os
+import socket
+
 SECRET_KEY = "secret"  # Use a complex, randomly generated key!
 ALGORITHM = "HS256"  # Recommended for basic token signing
 ACCESS_TOKEN_EXPIRE_MINUTES = 360
+
+# Recompute the engine's derived counters after every mutation and fail on drift
+GAME_DEBUG_CHECKS = os.getenv("GAME_DEBUG_CHECKS", "0") == "1"
+
+# Keep per-game property state in a packed byte table instead of a dict of dicts
+COMPACT_PROPERTY_STATE = os.getenv("COMPACT_PROPERTY_STATE", "0") == "1"
+
+# Write a full game snapshot every N logged actions; recovery replays the rest from the stream
+EVENT_SNAPSHOT_INTERVAL = int(os.getenv("EVENT_SNAPSHOT_INTERVAL", "50"))
+# Approximate cap on entries kept in each game's action stream (must exceed the interval)
+EVENT_STREAM_MAXLEN = int(os.getenv("EVENT_STREAM_MAXLEN", "10000"))
+
+# Outbound websocket queue per player; on overflow either "drop_stale" (skip superseded
+# full-state updates) or "disconnect" the slow client
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "64"))
+WS_OVERFLOW_POLICY = os.getenv("WS_OVERFLOW_POLICY", "drop_stale")
+# Seconds a single send may stall before the client is disconnected
+WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "10"))
+
+# MessagePack frames at least this large are deflated before sending
+WS_COMPRESS_MIN_BYTES = int(os.getenv("WS_COMPRESS_MIN_BYTES", "1024"))
+WS_COMPRESS_LEVEL = int(os.getenv("WS_COMPRESS_LEVEL", "6"))
+
+# Write-behind persistence: seconds between flushes of dirty games, and the longest a
+# changed game may go without a fresh snapshot
+PERSIST_INTERVAL = float(os.getenv("PERSIST_INTERVAL", "0.1"))
+PERSIST_MAX_STALENESS = float(os.getenv("PERSIST_MAX_STALENESS", "30"))
+
+# Shared async Redis pool (see app/db/redis_pool.py)
+REDIS_HOST = os.getenv("REDIS_HOST", "172.22.28.208")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+REDIS_DB = int(os.getenv("REDIS_DB", "0"))
+REDIS_PASSWORD = os.getenv("REDIS_PASSWORD") or None
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+# Seconds to wait for a free pooled connection, for a reply, and to connect
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", "5"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "5"))
+REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", "5"))
+# PING connections idle longer than this many seconds before reusing them
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30"))
+
+# Multi-worker sharding: each game lives on exactly one worker (see services/sharding.py)
+SHARDING_ENABLED = os.getenv("SHARDING_ENABLED", "0") == "1"
+WORKER_ID = os.getenv("WORKER_ID") or f"{socket.gethostname()}:{os.getpid()}"
+# Base URL other workers redirect clients to, e.g. http://10.0.0.5:8001
+WORKER_URL = os.getenv("WORKER_URL", "http://127.0.0.1:8000")
+# Seconds between registry heartbeats; a worker silent for WORKER_TTL counts as gone
+WORKER_HEARTBEAT_INTERVAL = float(os.getenv("WORKER_HEARTBEAT_INTERVAL", "5"))
+WORKER_TTL = float(os.getenv("WORKER_TTL", "15"))
+# Ownership lease per game, renewed on every heartbeat while the game is resident
+GAME_LEASE_TTL = float(os.getenv("GAME_LEASE_TTL", "30"))
+# Resident games: one without sockets is evicted (flushed, then dropped from memory) after
+# GAME_IDLE_TIMEOUT seconds without actions, GAME_OVER_TTL once finished, or least recently
+# used first while resident games are estimated to take more than GAME_MEMORY_BUDGET_MB;
+# checked every GAME_EVICT_INTERVAL. A game is estimated at GAME_MEMORY_FACTOR times the
+# size of its Redis hash (about 4.8 measured for a 4-player game)
+GAME_IDLE_TIMEOUT = float(os.getenv("GAME_IDLE_TIMEOUT", "600"))
+GAME_OVER_TTL = float(os.getenv("GAME_OVER_TTL", "60"))
+GAME_MEMORY_BUDGET_MB = float(os.getenv("GAME_MEMORY_BUDGET_MB", "256"))
+GAME_MEMORY_FACTOR = float(os.getenv("GAME_MEMORY_FACTOR", "5"))
+GAME_EVICT_INTERVAL = float(os.getenv("GAME_EVICT_INTERVAL", "15"))
+
+# Loading a game decodes snapshots of at least this many bytes, and replays at least this
+# many logged actions, on a worker thread instead of the event loop
+GAME_LOAD_OFFLOAD_BYTES = int(os.getenv("GAME_LOAD_OFFLOAD_BYTES", "65536"))
+GAME_LOAD_OFFLOAD_EVENTS = int(os.getenv("GAME_LOAD_OFFLOAD_EVENTS", "200"))
+
+# Per-game actor: pending actions allowed before new ones are rejected, and the most run
+# as one batch (messages of a batch are sent together once it finishes)
+GAME_ACTOR_QUEUE_SIZE = int(os.getenv("GAME_ACTOR_QUEUE_SIZE", "256"))
+GAME_ACTOR_MAX_BATCH = int(os.getenv("GAME_ACTOR_MAX_BATCH", "32"))
+
+# Seconds a player may stall in each phase before the server acts for them (0 disables):
+# roll the dice, pass on buying, roll in jail, close the auction (restarted by every bid)
+PHASE_TIMEOUTS = {
+    "WAIT_FOR_ROLL": float(os.getenv("TIMEOUT_WAIT_FOR_ROLL", "60")),
+    "DECIDE_TO_BUY": float(os.getenv("TIMEOUT_DECIDE_TO_BUY", "30")),
+    "JAIL_DECISION": float(os.getenv("TIMEOUT_JAIL_DECISION", "30")),
+    "AUCTION": float(os.getenv("TIMEOUT_AUCTION", "20")),
+}
+# Timing wheel resolution in seconds, and its number of slots
+TIMER_TICK = float(os.getenv("TIMER_TICK", "0.5"))
+TIMER_SLOTS = int(os.getenv("TIMER_SLOTS", "512"))
+
+# Seconds between matchmaking passes over the queue
+MATCHMAKING_TICK = float(os.getenv("MATCHMAKING_TICK", "0.5"))
+# Keep the queue in Redis so parties on different workers meet (services/match_queue.py).
+# Queued parties expire WORKER_TTL seconds after the worker holding their socket stops
+# renewing them (every WORKER_HEARTBEAT_INTERVAL), e.g. because it crashed
+MATCHMAKING_DISTRIBUTED = os.getenv("MATCHMAKING_DISTRIBUTED", "0") == "1"
+# One worker at a time, holding a lease of this many seconds, does the matching
+MATCHMAKER_LEASE_TTL = float(os.getenv("MATCHMAKER_LEASE_TTL", "5"))
+# Elo ratings (kept in Redis, see services/ratings.py): starting value and K factor per game
+RATING_DEFAULT = float(os.getenv("RATING_DEFAULT", "1200"))
+RATING_K = float(os.getenv("RATING_K", "32"))
+# Parties are seated with others whose rating is within this band of theirs; the band
+# widens by MATCH_BAND_GROWTH per second waited, up to MATCH_BAND_MAX
+MATCH_BAND_BASE = float(os.getenv("MATCH_BAND_BASE", "100"))
+MATCH_BAND_GROWTH = float(os.getenv("MATCH_BAND_GROWTH", "10"))
+MATCH_BAND_MAX = float(os.getenv("MATCH_BAND_MAX", "1000"))
+
+# bcrypt cost for new hashes; stored hashes with another cost are upgraded at login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Threads running bcrypt off the event loop, and how many operations may be running or
+# waiting on them before sign-ins are turned away with 503
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", "2"))
+PASSWORD_QUEUE_LIMIT = int(os.getenv("PASSWORD_QUEUE_LIMIT", "32"))
+
+# Login throttling (services/login_throttle.py), over a sliding window of LOGIN_WINDOW seconds:
+# attempts allowed per IP, and failed attempts per username, before refusing with 429
+LOGIN_WINDOW = float(os.getenv("LOGIN_WINDOW", "300"))
+LOGIN_IP_LIMIT = int(os.getenv("LOGIN_IP_LIMIT", "60"))
+LOGIN_USER_LIMIT = int(os.getenv("LOGIN_USER_LIMIT", "10"))
+# Behind a reverse proxy every request comes from the proxy's address. Name the header it
+# puts the client address in (e.g. X-Forwarded-For) to count per client instead; the last
+# address in it is used, the one the proxy itself saw. Leave empty when clients connect
+# directly, or anyone could pick their own address by sending the header.
+LOGIN_TRUSTED_PROXY_HEADER = os.getenv("LOGIN_TRUSTED_PROXY_HEADER", "")
+# Count in Redis so the limits hold across workers, instead of per-worker sketches
+# of LOGIN_SKETCH_BUCKETS x LOGIN_SKETCH_DEPTH x LOGIN_SKETCH_WIDTH counters
+LOGIN_THROTTLE_REDIS = os.getenv("LOGIN_THROTTLE_REDIS", "0") == "1"
+LOGIN_SKETCH_BUCKETS = int(os.getenv("LOGIN_SKETCH_BUCKETS", "10"))
+LOGIN_SKETCH_WIDTH = int(os.getenv("LOGIN_SKETCH_WIDTH", "4096"))
+LOGIN_SKETCH_DEPTH = int(os.getenv("LOGIN_SKETCH_DEPTH", "4"))
+
+# Relay sockets for games owned by another worker over Redis pub/sub instead of
+# redirecting the client (see services/game_bus.py); needs sharding enabled
+GAME_BUS_ENABLED = os.getenv("GAME_BUS_ENABLED", "0") == "1"
+# Messages waiting to be published before new ones are dropped, and relayed
+# client events queued per game before the sender is told to retry
+GAME_BUS_OUTBOX_SIZE = int(os.getenv("GAME_BUS_OUTBOX_SIZE", "10000"))
+GAME_BUS_INBOX_SIZE = int(os.getenv("GAME_BUS_INBOX_SIZE", "64"))
@@ -0,0 +1,52 @@
+from typing import Optional
+
+from redis.asyncio import BlockingConnectionPool, Redis
+
+from app.config import (
+    REDIS_CONNECT_TIMEOUT,
+    REDIS_DB,
+    REDIS_HEALTH_CHECK_INTERVAL,
+    REDIS_HOST,
+    REDIS_MAX_CONNECTIONS,
+    REDIS_PASSWORD,
+    REDIS_POOL_TIMEOUT,
+    REDIS_PORT,
+    REDIS_SOCKET_TIMEOUT,
+)
+
+_pool: Optional[BlockingConnectionPool] = None
+_client: Optional[Redis] = None
+
+
+def init_redis() -> Redis:
+    """Creates the process-wide async Redis pool (called from the app lifespan)."""
+    global _pool, _client
+    if _client is None:
+        # Waits up to REDIS_POOL_TIMEOUT for a free connection instead of failing under bursts
+        _pool = BlockingConnectionPool(
+            host=REDIS_HOST,
+            port=REDIS_PORT,
+            db=REDIS_DB,
+            password=REDIS_PASSWORD,
+            max_connections=REDIS_MAX_CONNECTIONS,
+            timeout=REDIS_POOL_TIMEOUT,
+            socket_timeout=REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+            health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+            decode_responses=True,
+        )
+        _client = Redis(connection_pool=_pool)
+    return _client
+
+
+def get_redis() -> Redis:
+    """The shared async client; every Redis user in the backend goes through this pool."""
+    return _client if _client is not None else init_redis()
+
+
+async def close_redis():
+    global _pool, _client
+    if _client is not None:
+        await _client.aclose()
+        await _pool.aclose()
+    _pool = _client = None
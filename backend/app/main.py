@@ -9,9 +9,13 @@ from app.api import (
     routes_debug,
     routes_profile,
     routes_lobby,
-    routes_friends
+    routes_friends,
+    routes_board,
 )
 from app.models.gamesManager import getsManager
+from app.services.matchmaker import matchmaker_service
+from app.services.password_pool import password_pool
+from app.db.redis_pool import close_redis, init_redis
 from contextlib import asynccontextmanager
 import app.db.init_db as db_init
 from app.models.board import get_board
@@ -24,6 +28,7 @@ async def lifespan(app: fastapi.FastAPI):
         "mysql+pymysql://root@localhost/monopoly", pool_pre_ping=True
     )
     SessionLocal = sessionmaker(bind=engine)
+    app.state.redis = init_redis()
     gamesManager = getsManager()
     print("Database initialized")
 
@@ -31,8 +36,26 @@ async def lifespan(app: fastapi.FastAPI):
 
     app.state.manager = gamesManager
     app.state.db_session = SessionLocal
+    gamesManager.persister.start()
+    gamesManager.start_eviction()
+    gamesManager.timers.start()
+    await matchmaker_service.start()
+    gamesManager.shards.start(lambda: list(gamesManager.games), gamesManager.drop_game)
+    await gamesManager.bus.start(gamesManager.handle_forwarded)
     yield
     print("Shutting down...")
+    await matchmaker_service.stop()
+    await gamesManager.bus.stop()
+    await gamesManager.stop_eviction()
+    await gamesManager.timers.stop()
+    # No game changes after this, so the flush below is the final state
+    await gamesManager.stop_actors()
+    # Write out every game that changed since the last tick
+    await gamesManager.persister.stop()
+    # Hand our games back only once they are safely in Redis
+    await gamesManager.shards.stop(list(gamesManager.games))
+    password_pool.shutdown()
+    await close_redis()
 
 
 app = fastapi.FastAPI(lifespan=lifespan)
@@ -53,6 +76,7 @@ app.include_router(routes_dev.router)
 app.include_router(routes_profile.router)
 app.include_router(routes_friends.router)
 app.include_router(routes_lobby.router)
+app.include_router(routes_board.router)
 
 
 @app.get("/")
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field, root_validator
-from typing import List, Optional
+from pydantic import BaseModel, Field, PrivateAttr, root_validator
+from typing import Any, Dict, List, Optional
 
 
 class Player(BaseModel):
@@ -30,6 +30,27 @@ class Player(BaseModel):
         False, description="True if the player is out of the game."
     )
 
+    # Cached model_dump(); cleared whenever a field is assigned
+    _dump: Optional[Dict[str, Any]] = PrivateAttr(default=None)
+
+    def __setattr__(self, name: str, value: Any):
+        if not name.startswith("_"):
+            self._dump = None
+        super().__setattr__(name, value)
+
+    def mark_dirty(self):
+        """Call after mutating a field in place (e.g. `properties.append`)."""
+        self._dump = None
+
+    def dump(self) -> Dict[str, Any]:
+        """
+        The player as a plain dict, rebuilt only after a change. The same dict is
+        handed to every caller until then, so treat it as read-only.
+        """
+        if self._dump is None:
+            self._dump = self.model_dump()
+        return self._dump
+
     @root_validator(pre=True)
     def set_default_name(cls, values):
         if "name" not in values or values["name"] is None:
@@ -1,88 +1,128 @@
 from __future__ import annotations
+import base64
 import json
-from uuid import UUID, uuid4
+from typing import Any, Dict, List, Tuple
+from uuid import UUID
 
-from redis.asyncio import Redis
-
-redis: Redis | None = None
+from app.db.redis_pool import get_redis
+from app.models.property_table import PropertyTable
 
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     from app.models.Game import Game
 
-async def get_redis() -> Redis:
-    global redis
-    if redis is None:
-        redis = Redis(host="172.22.28.208", port=6379, decode_responses=True)
-    return redis
-
 
 class RedisGameStore:
-    async def create_game(self, players) -> UUID:
-        redis = await get_redis()
-        game_id = uuid4()
-        game = Game(game_id, players)
-
-        async with redis.pipeline() as pipe:
-            pipe.set(f"game:{game_id}:state", json.dumps(game.state))
-            pipe.set(f"game:{game_id}:players", json.dumps(game.get_players()))
-            pipe.set(f"game:{game_id}:turn", json.dumps(game.turn.__dict__))
-            pipe.set(f"game:{game_id}:chance", json.dumps(game.chance_deck))
-            pipe.set(f"game:{game_id}:community", json.dumps(game.community_deck))
-            pipe.set(
-                f"game:{game_id}:turn_order",
-                json.dumps([player.id for player in game.get_players().values()]),
-            )
-            await pipe.execute()
-
-        return game_id
-
-    async def load_game(self, game_id: UUID) -> Game | None:
-        redis = await get_redis()
-
-        if not await redis.exists(f"game:{game_id}:state"):
-            return None
-
-        state, players, turn, chance, community, turn_order = await redis.mget(
-            f"game:{game_id}:state",
-            f"game:{game_id}:players",
-            f"game:{game_id}:turn",
-            f"game:{game_id}:chance",
-            f"game:{game_id}:community",
-            f"game:{game_id}:turn_order",
+    """
+    Each game is one Redis hash, `game:{id}`, with a field per section:
+
+        state       phase, turn index, auction, debt (everything but properties)
+        turn        the current Turn
+        event_seq   last logged action included
+        properties  owner / houses / mortgage per square
+        decks       chance and community chest order
+        turn_order  seat order
+        player:{id} one field per player, keyed by user id
+
+    A save writes the first three (they change on nearly every action) plus
+    only the sections and players the engine marked as changed, so a typical
+    action costs a few hundred bytes instead of the whole game.
+    """
+
+    @staticmethod
+    def key(game_id: Any) -> str:
+        return f"game:{game_id}"
+
+    @staticmethod
+    def legacy_key(game_id: Any) -> str:
+        # Games saved before the per-field hash layout are one JSON blob
+        return f"game_state:{game_id}"
+
+    @classmethod
+    async def exists(cls, game_id: Any) -> bool:
+        """Whether anything was ever saved for this game, in either layout."""
+        return bool(await get_redis().exists(cls.key(game_id), cls.legacy_key(game_id)))
+
+    def dirty_fields(self, game: Game) -> Tuple[Dict[str, str], List[str]]:
+        """Fields to HSET and fields to HDEL to bring the stored hash up to date."""
+        sections, players, removed = game.take_changes()
+        state = {k: v for k, v in game.state.items() if k != "mutable_properties"}
+        fields = {
+            "state": json.dumps(state, default=str),
+            "turn": json.dumps(game.turn.to_dict()),
+            "event_seq": str(game.event_seq),
+        }
+        if "properties" in sections:
+            props = game.state["mutable_properties"]
+            if isinstance(props, PropertyTable):
+                fields["properties"] = json.dumps(
+                    {"packed": base64.b64encode(props.to_bytes()).decode()}
+                )
+            else:
+                fields["properties"] = json.dumps({"squares": props})
+        if "decks" in sections:
+            fields["decks"] = json.dumps([game.chance_deck, game.community_deck])
+        if "turn_order" in sections:
+            fields["turn_order"] = json.dumps(game.turn_order)
+        for user_id, dump in players.items():
+            fields[f"player:{user_id}"] = json.dumps(dump)
+        removed_fields = [f"player:{user_id}" for user_id in removed]
+        # Kept up to date for the memory budget (see gamesManager.evict)
+        game.field_sizes.update((name, len(value)) for name, value in fields.items())
+        for name in removed_fields:
+            game.field_sizes.pop(name, None)
+        return fields, removed_fields
+
+    def write(self, pipe, game: Game) -> int:
+        """Queues the changed fields of `game` on a pipeline; returns the number of commands."""
+        fields, removed = self.dirty_fields(game)
+        pipe.hset(self.key(game.id), mapping=fields)
+        if removed:
+            pipe.hdel(self.key(game.id), *removed)
+            return 2
+        return 1
+
+    def from_fields(self, game_id: UUID, fields: Dict[str, str]) -> Game:
+        """Rebuilds a game from the HGETALL of its hash."""
+        from app.models.Game import Game
+
+        players = sorted(
+            (json.loads(v) for k, v in fields.items() if k.startswith("player:")),
+            key=lambda p: p["id"],
         )
-
-        game = Game(game_id, [])
-        game.state = json.loads(state)
-        game.turn.__dict__ = json.loads(turn)
-        game.chance_deck = json.loads(chance)
-        game.community_deck = json.loads(community)
-
-        for pid, pdata in json.loads(players).items():
-            game.players_map[int(pid)].__dict__.update(pdata)
-        game.turn_order = json.loads(turn_order)
-
+        props = json.loads(fields["properties"])
+        chance, community = json.loads(fields["decks"])
+        data = {
+            "state": {**json.loads(fields["state"]), "mutable_properties": props.get("squares", {})},
+            "players_list": players,
+            "turn_order": json.loads(fields["turn_order"]),
+            "turn": json.loads(fields["turn"]),
+            "chance_deck": chance,
+            "community_deck": community,
+            "event_seq": int(fields["event_seq"]),
+        }
+        if "packed" in props:
+            data["properties_packed"] = props["packed"]
+        game = Game.from_redis(game_id, data)
+        # Everything just came from the hash, so nothing is unsaved yet
+        game.take_changes()
+        game.field_sizes = {name: len(value) for name, value in fields.items()}
         return game
 
     async def save_game(self, game: Game):
-        redis = await get_redis()
-        gid = game.id
-
-        async with redis.pipeline() as pipe:
-            pipe.set(f"game:{gid}:state", json.dumps(game.state))
-            pipe.set(f"game:{gid}:players", json.dumps(game.get_players()))
-            pipe.set(f"game:{gid}:turn", json.dumps(game.turn.__dict__))
-            pipe.set(f"game:{gid}:chance", json.dumps(game.chance_deck))
-            pipe.set(f"game:{gid}:community", json.dumps(game.community_deck))
+        redis = get_redis()
+        async with redis.pipeline(transaction=False) as pipe:
+            self.write(pipe, game)
             await pipe.execute()
 
+    async def load_game(self, game_id: UUID) -> Game | None:
+        redis = get_redis()
+        fields = await redis.hgetall(self.key(game_id))
+        if not fields:
+            return None
+        return self.from_fields(game_id, fields)
+
     async def delete_game(self, game_id: UUID):
-        redis = await get_redis()
-        await redis.delete(
-            f"game:{game_id}:state",
-            f"game:{game_id}:players",
-            f"game:{game_id}:turn",
-            f"game:{game_id}:chance",
-            f"game:{game_id}:community",
-        )
+        redis = get_redis()
+        await redis.delete(self.key(game_id))
@@ -0,0 +1,141 @@
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Mapping, Optional, Tuple
+
+from app.models.board import Board, Square, get_board
+
+PURCHASABLE_TYPES = ("Property", "Railroad", "Utility")
+
+# Utility rent is "dice total x multiplier", indexed by how many utilities the owner holds
+UTILITY_MULTIPLIERS: Tuple[int, ...] = (0, 4, 10)
+
+
+class BoardIndex:
+    """
+    Immutable lookup tables compiled once from the static board.
+
+    Everything the engine used to derive by scanning the tiles (group members,
+    railroads, utilities, "nearest X" and rent) is resolved here up front so a
+    landing costs a handful of tuple/dict lookups.
+    """
+
+    __slots__ = (
+        "tiles",
+        "size",
+        "types",
+        "group_of",
+        "purchasable",
+        "group_squares",
+        "group_sizes",
+        "railroads",
+        "utilities",
+        "next_railroad",
+        "next_utility",
+        "prices",
+        "house_costs",
+        "_rent",
+    )
+
+    def __init__(self, board: Board):
+        tiles: Dict[int, Square] = board.tiles
+        size = len(tiles)
+
+        types = tuple(tiles[i].type for i in range(size))
+        group_of = tuple(
+            tiles[i].details.group_id if tiles[i].details else None for i in range(size)
+        )
+
+        groups: Dict[str, list] = {}
+        for sid, group_id in enumerate(group_of):
+            if group_id is not None:
+                groups.setdefault(group_id, []).append(sid)
+
+        railroads = frozenset(i for i, t in enumerate(types) if t == "Railroad")
+        utilities = frozenset(i for i, t in enumerate(types) if t == "Utility")
+
+        # rent keyed by (square, houses, state): state is the monopoly flag for
+        # properties and the number owned for railroads / utilities
+        rent: Dict[Tuple[int, int, int], int] = {}
+        for sid in range(size):
+            details = tiles[sid].details
+            if not details:
+                continue
+            if types[sid] == "Property":
+                rent[(sid, 0, 0)] = details.rent[0]
+                rent[(sid, 0, 1)] = details.rent[0] * 2
+                for houses in range(1, 6):
+                    rent[(sid, houses, 0)] = details.rent[houses]
+                    rent[(sid, houses, 1)] = details.rent[houses]
+            elif types[sid] == "Railroad":
+                for count in range(1, len(railroads) + 1):
+                    rent[(sid, 0, count)] = details.rent[count - 1]
+            elif types[sid] == "Utility":
+                for count in range(1, len(utilities) + 1):
+                    rent[(sid, 0, count)] = UTILITY_MULTIPLIERS[min(count, 2)]
+
+        self.tiles = tiles
+        self.size = size
+        self.types = types
+        self.group_of = group_of
+        self.purchasable = frozenset(
+            i for i, t in enumerate(types) if t in PURCHASABLE_TYPES
+        )
+        self.group_squares: Mapping[str, Tuple[int, ...]] = MappingProxyType(
+            {g: tuple(sids) for g, sids in groups.items()}
+        )
+        self.group_sizes: Mapping[str, int] = MappingProxyType(
+            {g: len(sids) for g, sids in groups.items()}
+        )
+        self.railroads: FrozenSet[int] = railroads
+        self.utilities: FrozenSet[int] = utilities
+        self.next_railroad = self._next_of(railroads, size)
+        self.next_utility = self._next_of(utilities, size)
+        self.prices = tuple(
+            tiles[i].details.price if tiles[i].details else 0 for i in range(size)
+        )
+        self.house_costs = tuple(
+            tiles[i].details.house_cost if tiles[i].details else 0 for i in range(size)
+        )
+        self._rent: Mapping[Tuple[int, int, int], int] = MappingProxyType(rent)
+
+    @staticmethod
+    def _next_of(targets: FrozenSet[int], size: int) -> Tuple[Optional[int], ...]:
+        """For every position, the first target strictly ahead of it (wrapping)."""
+        table = []
+        for pos in range(size):
+            nxt = None
+            for step in range(1, size + 1):
+                idx = (pos + step) % size
+                if idx in targets:
+                    nxt = idx
+                    break
+            table.append(nxt)
+        return tuple(table)
+
+    def nearest(self, position: int, square_type: str) -> Optional[int]:
+        if square_type == "Railroad":
+            return self.next_railroad[position]
+        if square_type == "Utility":
+            return self.next_utility[position]
+        return None
+
+    def rent(self, square_id: int, houses: int, state: int, dice_total: int = 0) -> int:
+        """
+        Rent owed on a square.
+
+        `state` is 1/0 for "owner holds the whole colour group" on properties and
+        the owner's railroad / utility count otherwise.
+        """
+        value = self._rent.get((square_id, houses, state), 0)
+        if self.types[square_id] == "Utility":
+            return value * dice_total
+        return value
+
+
+_index: BoardIndex | None = None
+
+
+def get_board_index() -> BoardIndex:
+    global _index
+    if _index is None:
+        _index = BoardIndex(get_board())
+    return _index
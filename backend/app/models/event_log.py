@@ -0,0 +1,75 @@
+import json
+import time
+from typing import Any, Dict, List, Sequence, Tuple
+
+from app.config import EVENT_STREAM_MAXLEN
+from app.db.redis_pool import get_redis
+
+
+class GameEventLog:
+    """
+    Append-only log of accepted player actions, one Redis Stream per game.
+
+    Each entry holds the acting user, the action and its payload, plus the dice
+    the engine rolled while applying it, which is everything needed to replay
+    the action deterministically on top of the previous state. Action n of a
+    game is stored under stream id "0-n", so snapshots can name the last action
+    they include before the entry has been written.
+    """
+
+    @staticmethod
+    def key(game_id: Any) -> str:
+        return f"game_events:{game_id}"
+
+    @staticmethod
+    def make_event(
+        player_id: int,
+        action: str,
+        payload: Dict[str, Any],
+        dice: Sequence[Tuple[int, int]],
+    ) -> Dict[str, Any]:
+        return {
+            "player_id": player_id,
+            "action": action,
+            "payload": payload or {},
+            "dice": [tuple(d) for d in dice],
+            "ts": time.time(),
+        }
+
+    def append(self, pipe, game_id: Any, seq: int, event: Dict[str, Any]):
+        """Queues XADD of action `seq` on a (pipelined) client."""
+        pipe.xadd(
+            self.key(game_id),
+            {
+                "player_id": event["player_id"],
+                "action": event["action"],
+                "payload": json.dumps(event["payload"]),
+                "dice": json.dumps([list(d) for d in event["dice"]]),
+                "ts": event["ts"],
+            },
+            id=f"0-{seq}",
+            maxlen=EVENT_STREAM_MAXLEN,
+            approximate=True,
+        )
+
+    async def events_after(self, game_id: Any, seq: int) -> List[Tuple[int, Dict[str, Any]]]:
+        """`(seq, event)` for every action logged after action `seq`, oldest first."""
+        entries = await get_redis().xrange(self.key(game_id), min=f"(0-{seq}")
+        return [self._decode(event_id, fields) for event_id, fields in entries]
+
+    @staticmethod
+    def _decode(event_id: str, fields: Dict[str, str]) -> Tuple[int, Dict[str, Any]]:
+        return int(event_id.split("-")[1]), {
+            "player_id": int(fields["player_id"]),
+            "action": fields["action"],
+            "payload": json.loads(fields["payload"]),
+            "dice": [tuple(d) for d in json.loads(fields["dice"])],
+            "ts": float(fields.get("ts", 0)),
+        }
+
+    async def history(self, game_id: Any, count: int = 100) -> List[Tuple[str, Dict[str, Any]]]:
+        """The most recent `count` raw entries, newest first (audit / debugging)."""
+        return await get_redis().xrevrange(self.key(game_id), count=count)
+
+    async def delete(self, game_id: Any):
+        await get_redis().delete(self.key(game_id))
@@ -1,19 +1,26 @@
 
 import asyncio
+import base64
+from collections import deque
+import logging
 from pprint import pprint
 import random
 
-from turtle import position
 from typing import List, Dict, Any
 import uuid
-from pydantic import TypeAdapter
-import redis
 from sqlalchemy import UUID, true
 from app.models.Player import Player
-from app.models.board import get_board, Square
-from app.models.RedisGameStore import RedisGameStore
-STATIC_BOARD_TILES: Dict[int, Square] = get_board().tiles
-redis_store = RedisGameStore()  # Singleton instance for Redis operations
+from app.models.board import Square
+from app.models.board_index import get_board_index
+from app.models.holdings import PlayerHoldings, compute_holdings
+from app.models.property_table import PropertyTable
+from app.config import GAME_DEBUG_CHECKS, COMPACT_PROPERTY_STATE
+from app.services.ws_codec import JSON, OVERLAY_TYPE, encode_frame, is_state_update
+BOARD_INDEX = get_board_index()
+STATIC_BOARD_TILES: Dict[int, Square] = BOARD_INDEX.tiles
+log = logging.getLogger(__name__)
+# Parts of a game that are persisted only when the engine has marked them changed
+TRACKED_SECTIONS = ("properties", "decks", "turn_order")
 class Turn:
     def __init__(self, player_id: int):
         self.player_id: int = player_id
@@ -63,15 +70,35 @@ class Game:
         self.players_map = {p.user_id: p for p in players}
         self.players = {p.id: p.user_id for p in players}
         self.connections = {}
+        # Set by the games manager when sockets may also sit on other workers
+        self.bus = None
+        # Players whose socket sits on another worker: user id -> that worker's id
+        self.relayed: Dict[int, str] = {}
+        # Messages held back while the game's actor runs a batch (see release_messages)
+        self._held_messages: List[tuple] | None = None
         self.state = {
             "phase": "WAIT_FOR_ROLL",
             "turn_index": 0,
             "mutable_properties": self._initialize_mutable_properties(),
             "auction": None,
         }
-        self.chance_deck = CHANCE_CARDS
-        self.community_deck = COMMUNITY_CHEST_CARDS
-        self._persist_callback = None
+        self.holdings: Dict[int, PlayerHoldings] = {}
+        # Each game cycles its own copy of the decks
+        self.chance_deck = list(CHANCE_CARDS)
+        self.community_deck = list(COMMUNITY_CHEST_CARDS)
+        self.rng = random.Random()
+        # Dice rolled since the last `take_rolls()`, and dice to hand out instead of rolling (replay)
+        self._roll_log: List[tuple[int, int]] = []
+        self._scripted_rolls: deque = deque()
+        # Number of logged actions folded into this state
+        self.event_seq = 0
+        self.events_since_snapshot = 0
+        # What changed since the last save: tracked sections, and the player dicts last written
+        self.dirty_sections = set(TRACKED_SECTIONS)
+        self._saved_players: Dict[int, Dict[str, Any]] = {}
+        # Bytes of each field of the game's Redis hash, as last written or loaded
+        self.field_sizes: Dict[str, int] = {}
+        self._players_cache = None
         self.turn_order = [p.id for p in players]
         self.turn = Turn(0)
 
@@ -94,17 +121,82 @@ class Game:
     
         instance = cls(game_id, restored_players)
         instance.state = data["state"]
-    
-        # JSON round-trip turns int dict keys into strings — restore them
-        instance.state["mutable_properties"] = {
-            int(k): v for k, v in instance.state["mutable_properties"].items()
-        }
+
+        packed = data.get("properties_packed")
+        if packed is not None:
+            instance.state["mutable_properties"] = PropertyTable.from_bytes(
+                base64.b64decode(packed)
+            )
+        else:
+            # JSON round-trip turns int dict keys into strings — restore them
+            props = {int(k): v for k, v in instance.state["mutable_properties"].items()}
+            instance.state["mutable_properties"] = (
+                PropertyTable.from_dict(props) if COMPACT_PROPERTY_STATE else props
+            )
     
         instance.turn_order = data["turn_order"]
         instance.turn = Turn.from_dict(data["turn"])  # from the earlier fix
-       
+        if "chance_deck" in data:
+            instance.chance_deck = data["chance_deck"]
+            instance.community_deck = data["community_deck"]
+        instance.event_seq = data.get("event_seq", 0)
+        instance.rebuild_holdings()
+
         return instance
 
+    def to_redis(self) -> dict:
+        """Serializes the game logic state; the inverse of `from_redis`."""
+        state = dict(self.state)
+        props = state["mutable_properties"]
+        data = {
+            "state": state,
+            "players_list": self.players_list(),
+            "turn_order": self.turn_order,
+            "turn": self.turn.to_dict(),
+            "chance_deck": self.chance_deck,
+            "community_deck": self.community_deck,
+            "event_seq": self.event_seq,
+        }
+        if isinstance(props, PropertyTable):
+            del state["mutable_properties"]
+            data["properties_packed"] = base64.b64encode(props.to_bytes()).decode()
+        return data
+
+    @property
+    def stored_size(self) -> int:
+        """Serialized size of the game as last saved (0 until its first save)."""
+        return sum(self.field_sizes.values())
+
+    def mark_dirty(self, section: str):
+        self.dirty_sections.add(section)
+
+    def mark_all_dirty(self):
+        """Forces the next save to write everything (e.g. after a failed write)."""
+        self.dirty_sections = set(TRACKED_SECTIONS)
+        self._saved_players = {}
+
+    def take_changes(self) -> tuple[set, Dict[int, Dict[str, Any]], List[int]]:
+        """
+        Sections and players changed since the last call, plus user ids that left.
+        A player counts as changed once its cached dump has been invalidated.
+        """
+        sections, self.dirty_sections = self.dirty_sections, set()
+        players = self.get_players()
+        changed = {
+            uid: dump for uid, dump in players.items() if self._saved_players.get(uid) is not dump
+        }
+        removed = [uid for uid in self._saved_players if uid not in players]
+        self._saved_players = dict(players)
+        return sections, changed, removed
+
+    def state_view(self) -> dict:
+        """A shallow copy of `state` that is safe to JSON-encode and send to clients."""
+        view = dict(self.state)
+        props = view.get("mutable_properties")
+        if isinstance(props, PropertyTable):
+            view["mutable_properties"] = props.to_dict()
+        return view
+
     async def start_auction(self, id: int, playerId: int):
 
         self.state["auction"] = {
@@ -119,7 +211,7 @@ class Game:
         await self.broadcast(
             {
                 "type": "AUCTION_STARTED",
-                "state": {**self.state, "players": list(self.get_players().values())},
+                "state": {**self.state_view(), "players": self.players_list()},
             }
         )
 
@@ -143,21 +235,38 @@ class Game:
         await self.broadcast(
             {
                 "type": "AUCTION_UPDATE",
-                "state": {**self.state, "players": list(self.get_players().values())},
+                "state": {**self.state_view(), "players": self.players_list()},
             }
         )
 
     def end_turn(self):
-        print("########Ending turn for player:", self.turn.player_id)
-        self.state["turn_index"] = (self.state["turn_index"] + 1) % len(self.turn_order)
+        log.debug("Ending turn for player %s", self.turn.player_id)
+        # Bankrupt seats stay in turn_order but never get a turn again
+        for _ in range(len(self.turn_order)):
+            self.state["turn_index"] = (self.state["turn_index"] + 1) % len(self.turn_order)
+            player = self.players_map[self.players[self.turn_order[self.state["turn_index"]]]]
+            if not player.is_bankrupt:
+                break
         self.turn = Turn(self.turn_order[self.state["turn_index"]])
-        player = self.players_map[self.players[self.turn.player_id]]
-        
+
         if player.in_jail:
             self.state["phase"] = "JAIL_DECISION"
         else:
             self.state["phase"] = "WAIT_FOR_ROLL"
-        redis_store.save_game(self)  # Persist the game state to Redis
+
+    def advance_phase(self) -> str | None:
+        """
+        Moves on from WAIT_FOR_NEXT_TURN: ends the turn, or lets the same player
+        roll again after doubles. Returns "end_turn" / "roll_dice", or None if
+        the game is not waiting for the next turn.
+        """
+        if self.state["phase"] != "WAIT_FOR_NEXT_TURN":
+            return None
+        if not self.turn.active:
+            self.end_turn()
+            return "end_turn"
+        self.state["phase"] = "WAIT_FOR_ROLL"
+        return "roll_dice"
     async def fold_auction(self, player_id: int):
         auction = self.state["auction"]
         auction["active_players"].remove(player_id)
@@ -170,9 +279,24 @@ class Game:
 
             await self._finalize_auction()
 
-    def get_players(self):
-        adapter_dict = TypeAdapter(Dict[int, Player])
-        return adapter_dict.dump_python(self.players_map)
+    def get_players(self) -> Dict[int, Dict[str, Any]]:
+        """
+        `{user_id: player dict}` for messages and persistence. Reuses the previous
+        result (and the per-player dicts inside it) until some player changes,
+        so callers must not modify what they get back.
+        """
+        dumps = [(uid, p.dump()) for uid, p in self.players_map.items()]
+        cached = self._players_cache
+        if cached is None or len(cached[0]) != len(dumps) or any(
+            uid != c_uid or d is not c_d for (uid, d), (c_uid, c_d) in zip(dumps, cached[0])
+        ):
+            cached = self._players_cache = (dumps, dict(dumps), [d for _, d in dumps])
+        return cached[1]
+
+    def players_list(self) -> List[Dict[str, Any]]:
+        """The `get_players()` values as a cached list, in seating order."""
+        self.get_players()
+        return self._players_cache[2]
 
     async def _finalize_auction(self):
         auction = self.state["auction"]
@@ -180,17 +304,21 @@ class Game:
         price = auction["highest_bid"]
         square_id = auction["square_id"]
 
-        player = self.players_map[winner]
-        player.money -= price
-        player.properties.append(square_id)
+        # Nobody bid: the square stays with the bank
+        if winner is not None:
+            player = self.players_map[winner]
+            player.money -= price
+            player.properties.append(square_id)
+            player.mark_dirty()
 
-        self.state["mutable_properties"][int(square_id)]["owner_id"] = winner
+            # ownership is tracked by seat id everywhere else, not by user id
+            self._set_owner(int(square_id), player.id)
         self.state["auction"] = None
         self.state["phase"] = "WAIT_FOR_NEXT_TURN"
         await self.broadcast(
             {
                 "type": "AUCTION_FINISHED",
-                "state": {**self.state, "players": list(self.get_players().values())},
+                "state": {**self.state_view(), "players": self.players_list()},
                 "extra": {
                     "winner": self.players_map[winner].id if winner else None,
                     "price": price,
@@ -201,6 +329,8 @@ class Game:
 
     def _initialize_mutable_properties(self) -> Dict[int, Any]:
         """Initializes mutable state for properties, railroads, and utilities."""
+        if COMPACT_PROPERTY_STATE:
+            return PropertyTable(BOARD_INDEX)
         mutable_state: Dict[int, Dict[str, Any]] = {}
         for id, square in STATIC_BOARD_TILES.items():
             if square.type in ["Property", "Railroad", "Utility"]:
@@ -212,8 +342,79 @@ class Game:
                 }
         return mutable_state
 
+    # --- Ownership bookkeeping: every change to owner/houses/mortgage goes through here ---
+    def _holdings_for(self, owner_id: int) -> PlayerHoldings:
+        holdings = self.holdings.get(owner_id)
+        if holdings is None:
+            holdings = self.holdings[owner_id] = PlayerHoldings()
+        return holdings
+
+    def _set_owner(self, square_id: int, owner_id: int | None):
+        prop = self.state["mutable_properties"][square_id]
+        if prop["owner_id"] is not None:
+            self._holdings_for(prop["owner_id"]).remove(
+                BOARD_INDEX, square_id, prop["houses"], prop["is_mortgaged"]
+            )
+        prop["owner_id"] = owner_id
+        if owner_id is not None:
+            self._holdings_for(owner_id).add(
+                BOARD_INDEX, square_id, prop["houses"], prop["is_mortgaged"]
+            )
+        self.mark_dirty("properties")
+        self._verify_holdings()
+
+    def _set_houses(self, square_id: int, houses: int):
+        prop = self.state["mutable_properties"][square_id]
+        if prop["owner_id"] is not None:
+            self._holdings_for(prop["owner_id"]).houses += houses - prop["houses"]
+        prop["houses"] = houses
+        self.mark_dirty("properties")
+        self._verify_holdings()
+
+    def _set_mortgaged(self, square_id: int, mortgaged: bool):
+        prop = self.state["mutable_properties"][square_id]
+        if prop["owner_id"] is not None and prop["is_mortgaged"] != mortgaged:
+            self._holdings_for(prop["owner_id"]).unmortgaged += -1 if mortgaged else 1
+        prop["is_mortgaged"] = mortgaged
+        self.mark_dirty("properties")
+        self._verify_holdings()
+
+    def rebuild_holdings(self):
+        """Recomputes the ownership counters after `state` was replaced wholesale."""
+        self.holdings = compute_holdings(BOARD_INDEX, self.state["mutable_properties"])
+        self.mark_dirty("properties")
+
+    def _verify_holdings(self):
+        if not GAME_DEBUG_CHECKS:
+            return
+        expected = compute_holdings(BOARD_INDEX, self.state["mutable_properties"])
+        for owner_id in expected.keys() | self.holdings.keys():
+            want = expected.get(owner_id, PlayerHoldings()).as_tuple()
+            have = self.holdings.get(owner_id, PlayerHoldings()).as_tuple()
+            if want != have:
+                raise AssertionError(
+                    f"Holdings drift for owner {owner_id}: tracked {have}, actual {want}"
+                )
+
+    def _roll(self) -> tuple[int, int]:
+        if self._scripted_rolls:
+            dice = self._scripted_rolls.popleft()
+        else:
+            dice = (self.rng.randint(1, 6), self.rng.randint(1, 6))
+        self._roll_log.append(dice)
+        return dice
+
+    def take_rolls(self) -> List[tuple[int, int]]:
+        """Returns the dice rolled since the last call and starts a fresh log."""
+        rolls, self._roll_log = self._roll_log, []
+        return rolls
+
+    def script_rolls(self, rolls: List[tuple[int, int]]):
+        """Queues recorded dice so the next rolls reproduce a logged action."""
+        self._scripted_rolls.extend(tuple(d) for d in rolls)
+
     async def roll_dice(self, player_id: int) -> tuple[int, int]:
-        dice = (random.randint(1, 6), random.randint(1, 6))
+        dice = self._roll()
 
         await self.handle_position(player_id, dice)
 
@@ -232,11 +433,11 @@ class Game:
         player = self.players_map[player_id]
 
         if dice[0] == dice[1]:
-            print(f"Player {player_id} rolled doubles!")
+            log.debug("Player %s rolled doubles!", player_id)
             self.turn.active = True
             self.turn.doubles += 1
             if self.turn.doubles >= 3:
-                print(f"Player {player_id} rolled doubles 3 times and is sent to Jail!")
+                log.debug("Player %s rolled doubles 3 times and is sent to Jail!", player_id)
                 self.turn.active = False
                 self.turn.doubles = 0
                 await self._handle_go_to_jail(player)
@@ -250,11 +451,14 @@ class Game:
         if new_pos < current_pos:
             # Passed Go
             player.money += 200
-            print(f"Player {player_id} passed Go and collected $200!")
-        square: Square = STATIC_BOARD_TILES[new_pos]
-        print(square)
-        print(f"Player {player_id} landed on: {square.name}")
+            log.debug("Player %s passed Go and collected $200!", player_id)
         player.position = new_pos
+        await self._land(player, dice)
+
+    async def _land(self, player: Player, dice: tuple[int, int]):
+        """Resolves the square the player now stands on."""
+        square: Square = STATIC_BOARD_TILES[player.position]
+        log.debug("Player %s landed on: %s", player.user_id, square.name)
         if square.type in ["Property", "Railroad", "Utility"]:
             self.state["phase"] = "DECIDE_TO_BUY"
             # Pass the dice roll as it is needed for utility rent calculation
@@ -302,7 +506,7 @@ class Game:
         # 3. Square is OWNED by another player (PAY RENT)
         owner = self.players_map.get(self.players.get(owner_id))
         if not owner:
-            print(f"Error: Owner with ID {owner_id} not found.")
+            log.warning("Owner with ID %s not found.", owner_id)
             self.state["phase"] = "WAIT_FOR_NEXT_TURN"
             return
 
@@ -328,12 +532,12 @@ class Game:
                         "amount": rent,
                         "square_id": square.id,
                         "state": {
-                            **self.state,
-                            "players": list(self.get_players().values()),
+                            **self.state_view(),
+                            "players": self.players_list(),
                         },
                     }
                 )
-                print(f"Player {player.id} paid ${rent} rent to Player {owner.id}")
+                log.debug("Player %s paid $%s rent to Player %s", player.id, rent, owner.id)
 
         self.state["phase"] = "WAIT_FOR_NEXT_TURN"
 
@@ -348,7 +552,7 @@ class Game:
                 )
                 return
             player.money -= square.tax_amount
-            print(f"Player {player.id} paid ${square.tax_amount} tax.")
+            log.debug("Player %s paid $%s tax.", player.id, square.tax_amount)
 
             await self.broadcast(
                 {
@@ -368,13 +572,13 @@ class Game:
         await self.broadcast(
             {"type": "message", "message": f"Player {player.id} has been sent to Jail."}
         )
-        print(f"Player {player.id} has been sent to Jail.")
+        log.debug("Player %s has been sent to Jail.", player.id)
         self.state["phase"] = "WAIT_FOR_NEXT_TURN"
 
     async def _execute_card(
         self, card: dict[str, Any], player: Player, dice: tuple[int, int]
     ):
-        print(f"Executing card for Player {player.id}: {card}")
+        log.debug("Executing card for Player %s: %s", player.id, card)
         t = card["type"]
 
         if t == "MOVE":
@@ -453,47 +657,43 @@ class Game:
         if target < player.position:
             player.money += 200  # passed GO
         player.position = target
-        square = STATIC_BOARD_TILES[target]
 
-        await self.handle_position(player.user_id, (0, 0))  # No dice roll for card movement
-        
+        # No dice roll for card movement, so this must not count as doubles
+        await self._land(player, (0, 0))
 
     async def _move_to_nearest(self, player: Player, square_type: str, dice):
         pos = player.position
-        for i in range(1, 41):
-            idx = (pos + i) % 40
-            if STATIC_BOARD_TILES[idx].type == square_type:
-                if idx < pos:
-                    player.money += 200
-                player.position = idx
-                await self._handle_land_on_purchasable(
-                    player, STATIC_BOARD_TILES[idx], dice
-                )
-                return
+        idx = BOARD_INDEX.nearest(pos, square_type)
+        if idx is None:
+            return
+        if idx < pos:
+            player.money += 200
+        player.position = idx
+        await self._handle_land_on_purchasable(player, STATIC_BOARD_TILES[idx], dice)
 
     async def mortgage_property(self, player_id: int, square_id: int):
         player = self.players_map.get(player_id)
         if not player:
-            print(f"Error: Player with ID {player_id} not found.")
+            log.warning("Player with ID %s not found.", player_id)
             return
 
         square: Square | None = STATIC_BOARD_TILES.get(square_id)
         if not square or square.type not in ["Property", "Railroad", "Utility"]:
-            print(f"Error: Square {square_id} is not a mortgagable property.")
+            log.warning("Square %s is not a mortgagable property.", square_id)
             return
 
         mutable_state = self.state["mutable_properties"].get(square_id)
         if not mutable_state or mutable_state["owner_id"] != player.id:
-            print(f"Error: Property {square_id} is not owned by Player {player.id}.")
+            log.warning("Property %s is not owned by Player %s.", square_id, player.id)
             return
 
         if mutable_state["is_mortgaged"]:
-            print(f"Error: Property {square_id} is already mortgaged.")
+            log.warning("Property %s is already mortgaged.", square_id)
             return
 
         mortgage_value = square.details.price // 2 if square.details else 0
         player.money += mortgage_value
-        mutable_state["is_mortgaged"] = True
+        self._set_mortgaged(square_id, True)
         await self.broadcast(
             {
                 "type": "PROPERTY_MORTGAGED",
@@ -502,37 +702,37 @@ class Game:
                 "amount": mortgage_value,
             }
         )
-        print(f"Player {player.id} mortgaged {square.name} for ${mortgage_value}.")
+        log.debug("Player %s mortgaged %s for $%s.", player.id, square.name, mortgage_value)
 
     async def unmortgage_property(self, player_id: int, square_id: int):
         player = self.players_map.get(player_id)
         if not player:
-            print(f"Error: Player with ID {player_id} not found.")
+            log.warning("Player with ID %s not found.", player_id)
             return
 
         square: Square | None = STATIC_BOARD_TILES.get(square_id)
         if not square or square.type not in ["Property", "Railroad", "Utility"]:
-            print(f"Error: Square {square_id} is not a mortgagable property.")
+            log.warning("Square %s is not a mortgagable property.", square_id)
             return
 
         mutable_state = self.state["mutable_properties"].get(square_id)
         if not mutable_state or mutable_state["owner_id"] != player.id:
-            print(f"Error: Property {square_id} is not owned by Player {player.id}.")
+            log.warning("Property %s is not owned by Player %s.", square_id, player.id)
             return
 
         if not mutable_state["is_mortgaged"]:
-            print(f"Error: Property {square_id} is not mortgaged.")
+            log.warning("Property %s is not mortgaged.", square_id)
             return
 
         unmortgage_cost = (
             int((square.details.price // 2) * 1.1) if square.details else 0
         )
         if player.money < unmortgage_cost:
-            print(f"Error: Player {player.id} cannot afford to unmortgage {square_id}.")
+            log.warning("Player %s cannot afford to unmortgage %s.", player.id, square_id)
             return
 
         player.money -= unmortgage_cost
-        mutable_state["is_mortgaged"] = False
+        self._set_mortgaged(square_id, False)
         await self.broadcast(
             {
                 "type": "PROPERTY_UNMORTGAGED",
@@ -541,60 +741,59 @@ class Game:
                 "amount": unmortgage_cost,
             }
         )
-        print(f"Player {player.id} unmortgaged {square.name} for ${unmortgage_cost}.")
+        log.debug("Player %s unmortgaged %s for $%s.", player.id, square.name, unmortgage_cost)
 
     async def build_house(self, player_id: int, square_id: int):
         player = self.players_map.get(player_id)
         if not player:
-            print(f"Error: Player with ID {player_id} not found.")
+            log.warning("Player with ID %s not found.", player_id)
             return
 
         square: Square | None = STATIC_BOARD_TILES.get(square_id)
         if not square or square.type != "Property":
-            print(f"Error: Square {square_id} is not a buildable property.")
+            log.warning("Square %s is not a buildable property.", square_id)
             return
 
         mutable_state = self.state["mutable_properties"].get(square_id)
         if not mutable_state or mutable_state["owner_id"] != player.id:
-            print(f"Error: Property {square_id} is not owned by Player {player.id}.")
+            log.warning("Property %s is not owned by Player %s.", square_id, player.id)
             return
 
         details = square.details
         if not details:
-            print(f"Error: Property {square_id} has no details.")
+            log.warning("Property %s has no details.", square_id)
             return
 
         # Check for monopoly
         if not self._check_monopoly(player_id, details.group_id):
-            print(f"Error: Player {player.id} does not have a monopoly on this group.")
+            log.warning("Player %s does not have a monopoly on this group.", player.id)
             return
 
-        group_properties = [
-            sid
-            for sid, s in STATIC_BOARD_TILES.items()
-            if s.details and s.details.group_id == details.group_id
-        ]
+        group_properties = BOARD_INDEX.group_squares[details.group_id]
         min_houses = min(
             self.state["mutable_properties"][sid]["houses"] for sid in group_properties
         )
         if mutable_state["houses"] > min_houses:
-            print(
-                f"Error: Must build houses evenly. Current houses on {square_id}: {mutable_state['houses']}, minimum in group: {min_houses}"
+            log.warning(
+                "Must build houses evenly. Current houses on %s: %s, minimum in group: %s",
+                square_id,
+                mutable_state["houses"],
+                min_houses,
             )
             return
 
         if mutable_state["houses"] >= 5:
-            print(f"Error: Maximum houses/hotel already built on property {square_id}.")
+            log.warning("Maximum houses/hotel already built on property %s.", square_id)
             return
 
         house_cost = details.house_cost
         if player.money < house_cost:
-            print(f"Error: Player {player_id} cannot afford to build a house.")
+            log.warning("Player %s cannot afford to build a house.", player_id)
             return
 
         # Build the house
         player.money -= house_cost
-        mutable_state["houses"] += 1
+        self._set_houses(square_id, mutable_state["houses"] + 1)
         await self.broadcast(
             {
                 "type": "HOUSE_BUILT",
@@ -604,7 +803,7 @@ class Game:
                 "amount": house_cost,
             }
         )
-        print(f"Player {player_id} built a house on {square.name} for ${house_cost}.")
+        log.debug("Player %s built a house on %s for $%s.", player_id, square.name, house_cost)
 
     async def handle_insufficient_funds(
         self,
@@ -634,12 +833,37 @@ class Game:
 
         await self._declare_bankruptcy(debtor_id, creditor_id)
 
+    async def settle_debt(self):
+        """
+        Pays the pending debt once the debtor has raised enough cash; otherwise
+        re-evaluates what they still have to sell, mortgage or lose.
+        """
+        debt = self.state.get("debt")
+        if not debt:
+            return
+        debtor = self.players_map[self.players[debt["debtor"]]]
+        creditor_id = debt["creditor"]
+        amount = debt["amount"]
+        self.state["debt"] = None
+
+        if debtor.money < amount:
+            await self.handle_insufficient_funds(debtor.user_id, creditor_id, amount)
+            return
+
+        debtor.money -= amount
+        if creditor_id is not None:
+            self.players_map[self.players[creditor_id]].money += amount
+        self.state["phase"] = "WAIT_FOR_NEXT_TURN"
+
     def _owned_by(self, owner_id: int, square_type: str) -> int:
-        return sum(
-            1
-            for sid, s in self.state["mutable_properties"].items()
-            if s["owner_id"] == owner_id and STATIC_BOARD_TILES[sid].type == square_type
-        )
+        holdings = self.holdings.get(owner_id)
+        if holdings is None:
+            return 0
+        if square_type == "Railroad":
+            return holdings.railroads
+        if square_type == "Utility":
+            return holdings.utilities
+        return 0
 
     def _calculate_rent(
         self,
@@ -653,69 +877,63 @@ class Game:
         if not details:
             return 0
 
-        # Rent for standard properties
+        # Rent for standard properties (unimproved rent doubles with a monopoly)
         if square.type == "Property":
             houses = mutable_state["houses"]
-
-            if houses == 0:
-                is_monopoly = self._check_monopoly(owner.user_id, details.group_id)
-                base_rent = details.rent[0]
-                return base_rent * 2 if is_monopoly else base_rent
-            else:
-                return details.rent[houses]
+            is_monopoly = houses == 0 and self._check_monopoly(
+                owner.user_id, details.group_id
+            )
+            return BOARD_INDEX.rent(square.id, houses, int(is_monopoly))
 
         # Rent for railroads
         elif square.type == "Railroad":
             count = self._owned_by(owner.id, "Railroad")
-            return details.rent[count - 1]
+            return BOARD_INDEX.rent(square.id, 0, count)
 
         # Rent for utilities
         elif square.type == "Utility":
             count = self._owned_by(owner.id, "Utility")
-            roll = dice[0] + dice[1]
-            return roll * (10 if count == 2 else 4)
+            return BOARD_INDEX.rent(square.id, 0, count, dice[0] + dice[1])
 
         return 0
 
-    def _check_game_over(self):
+    async def _check_game_over(self):
         active = [
             p for p in self.players_map.values() if not getattr(p, "is_bankrupt", False)
         ]
-        print(f"Active players remaining: {active}")
+        log.debug("Active players remaining: %s", active)
         if len(active) == 1:
             self.state["phase"] = "GAME_OVER"
             winner = active[0].id
-            asyncio.create_task(
-                self.broadcast(
-                    {
-                        "type": "GAME_OVER",
-                        "state": {
-                            **self.state,
-                            "winner": winner,
-                            "players": list(self.get_players().values()),
-                        },
-                    }
-                )
+            await self.broadcast(
+                {
+                    "type": "GAME_OVER",
+                    "state": {
+                        **self.state_view(),
+                        "winner": winner,
+                        "players": self.players_list(),
+                    },
+                }
             )
 
     async def _draw_chance(self, player: Player, dice: tuple[int, int]):
         card: Dict[str, Any] = self.chance_deck.pop(0)
         self.chance_deck.append(card)
+        self.mark_dirty("decks")
         await self._execute_card(card, player, dice)
 
     async def _draw_community_chest(self, player: Player):
         card: Dict[str, Any] = self.community_deck.pop(0)
         self.community_deck.append(card)
+        self.mark_dirty("decks")
         await self._execute_card(card, player, (0, 0))
 
     async def forced_sell_house(self, player_id: int, group_id: str):
         player = self.players_map[player_id]
         props = [
             sid
-            for sid, s in STATIC_BOARD_TILES.items()
-            if s.details
-            and s.details.group_id == group_id
-            and self.state["mutable_properties"][sid]["owner_id"] == player.id
+            for sid in BOARD_INDEX.group_squares.get(group_id, ())
+            if self.state["mutable_properties"][sid]["owner_id"] == player.id
         ]
 
         if not props:
@@ -735,7 +953,7 @@ class Game:
         details = STATIC_BOARD_TILES[sid].details
         refund = details.house_cost // 2
 
-        self.state["mutable_properties"][sid]["houses"] -= 1
+        self._set_houses(sid, self.state["mutable_properties"][sid]["houses"] - 1)
         player.money += refund
 
         await self.broadcast(
@@ -750,16 +968,19 @@ class Game:
     async def _declare_bankruptcy(self, debtor_id: int, creditor_id: int | None):
         debtor = self.players_map[debtor_id]
 
-        for sid in debtor.properties:
-            prop = self.state["mutable_properties"][sid]
+        # Everything the debtor holds, including squares received from other bankruptcies
+        props = self.state["mutable_properties"]
+        owned = [sid for sid, prop in props.items() if prop["owner_id"] == debtor.id]
+        for sid in owned:
             if creditor_id is not None:
-                prop["owner_id"] = creditor_id
+                self._set_owner(sid, creditor_id)
             else:
-                prop["owner_id"] = None
-                prop["houses"] = 0
-                prop["is_mortgaged"] = False
+                self._set_houses(sid, 0)
+                self._set_mortgaged(sid, False)
+                self._set_owner(sid, None)
 
         debtor.properties.clear()
+        debtor.mark_dirty()
         debtor.money = 0
         debtor.is_bankrupt = True
 
@@ -770,39 +991,28 @@ class Game:
                 "creditor": creditor_id,
             }
         )
-        print(f"Player {debtor.id} has declared bankruptcy. Creditor: {creditor_id}")
-        self._check_game_over()
+        log.debug("Player %s has declared bankruptcy. Creditor: %s", debtor.id, creditor_id)
+        self.state["debt"] = None
+        self.state["phase"] = "WAIT_FOR_NEXT_TURN"
+        self.turn.active = False
+        await self._check_game_over()
 
     def _player_has_houses(self, player_id: int) -> bool:
-        return any(
-            s["houses"] > 0
-            for s in self.state["mutable_properties"].values()
-            if s["owner_id"] == player_id
-        )
+        holdings = self.holdings.get(player_id)
+        return holdings is not None and holdings.houses > 0
 
     def _player_has_unmortgaged_property(self, player_id: int) -> bool:
-
-        return any(
-            s["owner_id"] == player_id and not s["is_mortgaged"]
-            for s in self.state["mutable_properties"].values()
-        )
+        holdings = self.holdings.get(player_id)
+        return holdings is not None and holdings.unmortgaged > 0
 
     def _check_monopoly(self, player_id: int, group_id: str) -> bool:
         # 1. Determine total properties in this group
-        group_size = sum(
-            1
-            for square in STATIC_BOARD_TILES.values()
-            if square.details and square.details.group_id == group_id
-        )
+        group_size = BOARD_INDEX.group_sizes.get(group_id, 0)
 
-        # 2. Count properties in this group owned by the player (using Player.properties)
+        # 2. Count properties in this group owned by the player (maintained counters)
         player = self.players_map[player_id]
-        player_owned_in_group = sum(
-            1
-            for prop_id in player.properties
-            if STATIC_BOARD_TILES[prop_id].details
-            and STATIC_BOARD_TILES[prop_id].details.group_id == group_id
-        )
+        holdings = self.holdings.get(player.id)
+        player_owned_in_group = holdings.per_group.get(group_id, 0) if holdings else 0
 
         return player_owned_in_group == group_size
 
@@ -810,23 +1020,27 @@ class Game:
 
         player = self.players_map.get(player_id)
         if not player:
-            print(f"Error: Player with ID {player_id} not found.")
+            log.warning("Player with ID %s not found.", player_id)
             return
 
         square: Square | None = STATIC_BOARD_TILES.get(square_id)
         if not square or square.type not in ["Property", "Railroad", "Utility"]:
-            print(f"Error: Square {square_id} is not a purchasable property.")
+            log.warning("Square %s is not a purchasable property.", square_id)
             return
         mutable_state = self.state["mutable_properties"].get(square_id)
         if not mutable_state or mutable_state["owner_id"] is not None:
-            print(f"Error: Property {square_id} is already owned.")
+            log.warning("Property %s is already owned.", square_id)
             return
 
         price = square.details.price if square.details else 0
 
         if player.money < price:
-            print(
-                f"Player {player_id} cannot afford property {square_id} (Cost: {price}, Money: {player.money})"
+            log.debug(
+                "Player %s cannot afford property %s (Cost: %s, Money: %s)",
+                player_id,
+                square_id,
+                price,
+                player.money,
             )
 
             if len(player.properties) == 0:
@@ -836,8 +1050,8 @@ class Game:
                 {
                     "type": "game_update",
                     "state": {
-                        **self.state,
-                        "players": list(self.get_players().values()),
+                        **self.state_view(),
+                        "players": self.players_list(),
                     },
                     "message": f"Player {player_id} cannot afford property {square_id}.",
                 }
@@ -847,7 +1061,8 @@ class Game:
         # 2. Execute the purchase
         player.money -= price
         player.properties.append(square_id)
-        mutable_state["owner_id"] = player.id
+        player.mark_dirty()
+        self._set_owner(square_id, player.id)
         await self.broadcast(
             {
                 "type": "PROPERTY_BOUGHT",
@@ -856,7 +1071,7 @@ class Game:
                 "square_id": square_id,
             }
         )
-        print(f"Player {player.id} bought {square.name} for ${price}.")
+        log.debug("Player %s bought %s for $%s.", player.id, square.name, price)
 
         # 3. Advance game state phase
         self.state["phase"] = "WAIT_FOR_NEXT_TURN"
@@ -870,15 +1085,15 @@ class Game:
 
         elif action == "CARD":
             if player.get_out_of_jail_free <= 0:
-                print(f"Error: Player {player_id} has no Get Out of Jail Free cards.")
+                log.warning("Player %s has no Get Out of Jail Free cards.", player_id)
                 return
             player.get_out_of_jail_free -= 1
             player.in_jail = False
             self.state["phase"] = "WAIT_FOR_NEXT_TURN"
 
         elif action == "ROLL":
-            dice = (random.randint(1, 6), random.randint(1, 6))
-            print(f"Player {player_id} rolled dice: {dice}")
+            dice = self._roll()
+            log.debug("Player %s rolled dice: %s", player_id, dice)
             if dice[0] == dice[1]:
                 player.in_jail = False
                 player.jail_turns = 0
@@ -892,15 +1107,18 @@ class Game:
                     player.jail_turns = 0
                     self.state["phase"] = "WAIT_FOR_NEXT_TURN"
                     return
+                # A failed escape roll uses up the turn
+                self.turn.active = False
         self.state["phase"] = "WAIT_FOR_NEXT_TURN"
         await self.broadcast(
             {
                 "type": "WAIT_FOR_NEXT_TURN",
-                "state": {**self.state, "players": list(self.get_players().values())},
+                "state": {**self.state_view(), "players": self.players_list()},
             }
         )
     # dev methods
     def draw_card(self, card_type: str) -> dict:
+        self.mark_dirty("decks")
         if card_type == "chance":
             card = self.chance_deck.pop(0)
             self.chance_deck.append(card)
@@ -912,30 +1130,69 @@ class Game:
         else:
             raise ValueError("Invalid card type. Must be 'chance' or 'community'.")
     async def leave_game(self,player_id: int):
-        print(f"Player {player_id} leaving game {self.uuid}")
+        log.debug("Player %s leaving game %s", player_id, self.id)
         if player_id in self.connections:
             del self.connections[player_id]
+        self.relayed.pop(player_id, None)
         if player_id in self.players_map:
             del self.players_map[player_id]
         if player_id in self.players:
             del self.players[player_id]
         if player_id in self.turn_order:
             self.turn_order.remove(player_id)
+            self.mark_dirty("turn_order")
         if self.state["turn_index"] >= len(self.turn_order):
             self.state["turn_index"] = 0
-        self._check_game_over()
+        await self._check_game_over()
         # Broadcast to all remaining players that this player has left
-        for pid, conn in self.connections.items():
-            await conn.send_json({"type": "player_left", "player_id": player_id})
+        await self.broadcast({"type": "player_left", "player_id": player_id})
     # Connection methods
-    def set_persist_callback(self, cb):
-        self._persist_callback = cb
+    def hold_messages(self):
+        self._held_messages = []
+
+    async def release_messages(self):
+        """
+        Sends what was held since `hold_messages`, in order, skipping full
+        state updates (and overlays on them) that a later broadcast state
+        update supersedes.
+        """
+        held, self._held_messages = self._held_messages, None
+        if not held:
+            return
+        last_state = max(
+            (i for i, (to, message) in enumerate(held) if to is None and is_state_update(message)),
+            default=-1,
+        )
+        for i, (to, message) in enumerate(held):
+            if i < last_state and (is_state_update(message) or message.get("type") == OVERLAY_TYPE):
+                continue
+            if to is None:
+                await self.broadcast(message)
+            else:
+                await self.send_to(to, message)
+
     async def broadcast(self, message: dict):
-        for ws in self.connections.values():
-            await ws.send_json(message)
-        if self._persist_callback:
-            self._persist_callback(self)
+        if self._held_messages is not None:
+            self._held_messages.append((None, message))
+            return
+        # Encoded once per wire encoding in use; each connection's writer task sends the same frame
+        frames = {}
+        if self.connections:
+            is_state = is_state_update(message)
+            for conn in self.connections.values():
+                frame = frames.get(conn.encoding)
+                if frame is None:
+                    frame = frames[conn.encoding] = encode_frame(message, conn.encoding)
+                conn.send_frame(frame, is_state)
+        if self.bus is not None:
+            # Sockets on other workers get the same JSON via the game's channel
+            self.bus.publish(self.id, message, text=frames.get(JSON))
 
     async def send_to(self, player_id: int, message: dict):
-        if ws := self.connections.get(player_id):
-            await ws.send_json(message)
+        if self._held_messages is not None:
+            self._held_messages.append((player_id, message))
+            return
+        if conn := self.connections.get(player_id):
+            conn.send(message)
+        elif self.bus is not None:
+            self.bus.publish(self.id, message, to=player_id)
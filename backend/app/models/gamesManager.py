@@ -1,49 +1,463 @@
-import redis
+import asyncio
+import itertools
 import json
+import logging
+import time
+from collections import OrderedDict
+from functools import partial
 from uuid import UUID, uuid4
+from app.config import (
+    GAME_EVICT_INTERVAL,
+    GAME_IDLE_TIMEOUT,
+    GAME_LOAD_OFFLOAD_BYTES,
+    GAME_LOAD_OFFLOAD_EVENTS,
+    GAME_MEMORY_BUDGET_MB,
+    GAME_MEMORY_FACTOR,
+    GAME_OVER_TTL,
+    PHASE_TIMEOUTS,
+)
+from app.db.redis_pool import get_redis
 from app.models.Game import Game
-from typing import List, Optional
+from app.models.event_log import GameEventLog
+from app.models.RedisGameStore import RedisGameStore
+from app.services.game_actions import (
+    SYSTEM_ACTIONS,
+    TURN_ACTIONS,
+    apply_action,
+    game_snapshot,
+    is_players_turn,
+    replay_action,
+    snapshot_overlay,
+    timeout_action,
+    timeout_key,
+)
+from app.services.game_actor import GameActor, GameBusy
+from app.services.game_bus import GameBus
+from app.services.game_persister import GamePersister
+from app.services.ratings import record_result
+from app.services.sharding import ShardRouter, ShardUnavailable
+from app.services.timing_wheel import TimingWheel
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+log = logging.getLogger(__name__)
 
 
 class gamesManager:
     def __init__(self):
-        self.games = {}
-        # decode_responses=True makes life easier with strings
-        self.r = redis.Redis(host="172.22.28.208", port=6379, decode_responses=True)
+        # Resident games, least recently used first
+        self.games: "OrderedDict[UUID, Game]" = OrderedDict()
+        self._last_used: Dict[UUID, float] = {}
+        # In-flight loads, so concurrent get_game calls for one id build a single Game
+        self._loading: Dict[UUID, asyncio.Future] = {}
+        # One actor task per resident game; every live mutation runs on it
+        self.actors: Dict[UUID, GameActor] = {}
+        # Phase deadlines of every resident game: game id -> (timeout_key, deadline id)
+        self.timers = TimingWheel()
+        self._deadlines: Dict[UUID, tuple] = {}
+        self._deadline_ids = itertools.count()
+        self.timeouts = {"fired": 0, "stale": 0}
+        self._expiring: set = set()
+        self._evict_task: asyncio.Task | None = None
+        self.eviction = {"idle": 0, "finished": 0, "capacity": 0, "kept": 0, "rehydrated": 0}
+        self.events = GameEventLog()
+        self.store = RedisGameStore()
+        self.shards = ShardRouter()
+        self.persister = GamePersister(self.events, self.store, shards=self.shards)
+        self.bus = GameBus()
 
-    def create_game(self, player_ids: List[int]):
+    async def create_game(self, player_ids: List[int]):
         """Used by Matchmaking."""
         game_id = uuid4()
         game = Game.from_matchmaking(game_id, player_ids)
-        self.games[game_id] = game
+        # A fresh id has no owner yet; the creating worker keeps it
+        await self.shards.claim(game_id)
+        self._register(game)
         return game
 
-    def get_game(self, uuid_str: str) -> Game:
+    def _register(self, game: Game):
+        game.bus = self.bus
+        self.games[game.id] = game
+        self.actors[game.id] = GameActor(game).start()
+        self.touch(game)
+        self.arm_timeout(game)
+
+    async def drop_game(self, game_id: UUID):
+        """Unloads a game this worker lost ownership of, without writing it back."""
+        game = self.games.pop(game_id, None)
+        self._last_used.pop(game_id, None)
+        self.disarm_timeout(game_id)
+        self.persister.discard(game_id)
+        if actor := self.actors.pop(game_id, None):
+            await actor.stop()
+        if game:
+            # 1012 "service restart": clients reconnect and get routed to the new owner
+            for conn in list(game.connections.values()):
+                await conn.close(1012)
+
+    async def get_game(self, uuid_str: str) -> Game:
         uid = UUID(uuid_str)
         if uid in self.games:
-            return self.games[uid]
-
-        stored_state = self.r.get(f"game_state:{uuid_str}")
-        if stored_state:
-            data = json.loads(stored_state)
-            game = Game.from_redis(uid, data)
-            game.set_persist_callback(self.save_game_to_redis)
-            self.games[uid] = game
+            game = self.games[uid]
+            self.touch(game)
             return game
 
+        # Everyone asking for a game while it loads (a whole table reconnecting) shares one load
+        load = self._loading.get(uid)
+        if load is None:
+            load = self._loading[uid] = asyncio.ensure_future(self._load(uid))
+            load.add_done_callback(lambda _: self._loading.pop(uid, None))
+        # Shielded: one client giving up must not cancel the load the others are waiting on
+        return await asyncio.shield(load)
+
+    async def _load(self, uid: UUID) -> Optional[Game]:
+        game = await self._load_snapshot(uid)
+        if game is None:
+            return None
+        # The snapshot is only written every few actions; replay whatever came after it
+        events = await self.events.events_after(uid, game.event_seq)
+        if len(events) >= GAME_LOAD_OFFLOAD_EVENTS:
+            await asyncio.to_thread(self._replay, game, events)
+        else:
+            self._replay(game, events)
+        self._register(game)
+        self.eviction["rehydrated"] += 1
+        return game
+
+    @staticmethod
+    def _replay(game: Game, events):
+        for seq, event in events:
+            replay_action(game, event)
+            game.event_seq = seq
+            game.events_since_snapshot += 1
+        game.take_rolls()
+
+    async def _load_snapshot(self, uid: UUID) -> Optional[Game]:
+        redis = get_redis()
+        fields = await redis.hgetall(RedisGameStore.key(uid))
+        if fields:
+            build = partial(self.store.from_fields, uid, fields)
+            size = sum(len(value) for value in fields.values())
+        else:
+            # Games saved before the per-field hash layout
+            stored_state = await redis.get(RedisGameStore.legacy_key(uid))
+            if not stored_state:
+                return None
+            build = partial(_game_from_blob, uid, stored_state)
+            size = len(stored_state)
+        # Big states are decoded on a worker thread so other games keep running meanwhile
+        if size >= GAME_LOAD_OFFLOAD_BYTES:
+            return await asyncio.to_thread(build)
+        return build()
+
+    def record_action(
+        self,
+        game: Game,
+        player_id: int,
+        action: str,
+        payload: Dict[str, Any],
+        touch: bool = True,
+    ):
+        """
+        Logs an action the engine just applied, together with the dice it rolled.
+        The write itself happens on the persister's next tick.
+        """
+        game.event_seq += 1
+        game.events_since_snapshot += 1
+        event = self.events.make_event(player_id, action, payload, game.take_rolls())
+        self.persister.add_event(game, game.event_seq, event)
+        if touch:
+            self.touch(game)
+
+    async def submit(
+        self,
+        game: Game,
+        player_id: int,
+        action: str,
+        payload: Dict[str, Any],
+    ) -> Optional[str]:
+        """Queues a client action on the game's actor and waits for it; returns an error for the client, if any."""
+        try:
+            return await self.run_in_game(
+                game, lambda: self.handle_action(game, player_id, action, payload)
+            )
+        except GameBusy as e:
+            return str(e)
+
+    async def run_in_game(self, game: Game, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Runs `fn` on the game's actor, in order with its other actions. Raises GameBusy when backed up."""
+        actor = self.actors.get(game.id)
+        if actor is None:
+            actor = self.actors[game.id] = GameActor(game).start()
+        return await actor.call(fn)
+
+    async def handle_action(
+        self,
+        game: Game,
+        player_id: int,
+        action: str,
+        payload: Dict[str, Any],
+        system: bool = False,
+    ) -> Optional[str]:
+        """
+        Validates, applies and logs one client action; returns an error for
+        the client, if any. Live traffic runs this on the game's actor (`submit`).
+        `system` actions come from phase timeouts and do not count as activity
+        for eviction, so an abandoned game still goes idle.
+        """
+        if action in SYSTEM_ACTIONS and not system:
+            return "Unknown action"
+        if action != "leave_game":
+            if player_id not in game.players_map:
+                return "Player not in game!"
+            # (Only validate for actions that require a turn)
+            if action in TURN_ACTIONS and not is_players_turn(game, player_id):
+                return "Not your turn!"
+        was_over = game.state["phase"] == "GAME_OVER"
+        try:
+            await apply_action(game, player_id, action, payload)
+        except Exception:
+            # Whatever it changed before failing cannot be replayed from the log, so the
+            # next write is a full snapshot; its dice must not end up in the next event
+            game.take_rolls()
+            self.save_game(game)
+            raise
+        self.record_action(game, player_id, action, payload, touch=not system)
+        self.arm_timeout(game)
+        if not was_over and game.state["phase"] == "GAME_OVER":
+            await self._rate(game)
         return None
 
-        
+    async def _rate(self, game: Game):
+        """Feeds a finished game's result into its players' matchmaking ratings."""
+        standing = [uid for uid, p in game.players_map.items() if not p.is_bankrupt]
+        if len(standing) != 1:
+            return
+        try:
+            await record_result(game.id, list(game.players_map), standing[0])
+        except Exception:
+            log.exception("Could not rate game %s", game.id)
+
+    def arm_timeout(self, game: Game):
+        """
+        Keeps the game's phase deadline in step with what it is waiting on:
+        unchanged while that stays the same, restarted when it changes,
+        dropped for phases without a timeout.
+        """
+        key = timeout_key(game)
+        current = self._deadlines.get(game.id)
+        if current is not None and current[0] == key:
+            return
+        delay = PHASE_TIMEOUTS.get(key[0], 0) if key else 0
+        if delay <= 0:
+            self.disarm_timeout(game.id)
+            return
+        deadline = (key, next(self._deadline_ids))
+        self._deadlines[game.id] = deadline
+        self.timers.schedule(game.id, delay, lambda: self._on_deadline(game, deadline))
+
+    def disarm_timeout(self, game_id: UUID):
+        self._deadlines.pop(game_id, None)
+        self.timers.cancel(game_id)
+
+    def _on_deadline(self, game: Game, deadline: tuple):
+        # Fired from the timing wheel; the default action itself runs on the game's actor
+        task = asyncio.create_task(self._expire(game, deadline))
+        self._expiring.add(task)
+        task.add_done_callback(self._expiring.discard)
+
+    async def _expire(self, game: Game, deadline: tuple):
+        async def act():
+            if self._deadlines.get(game.id) != deadline or timeout_key(game) != deadline[0]:
+                self.timeouts["stale"] += 1
+                return
+            # Forget it first, so the deadline is re-armed even if the phase does not move on
+            del self._deadlines[game.id]
+            player_id, action, payload = timeout_action(game)
+            log.info("Game %s timed out in %s; %s for player %s", game.id, deadline[0][0], action, player_id)
+            self.timeouts["fired"] += 1
+            await self.handle_action(game, player_id, action, payload, system=True)
+
+        if self.games.get(game.id) is not game:
+            return
+        try:
+            await self.run_in_game(game, act)
+        except GameBusy:
+            # Backed-up game: try again after another full timeout
+            self.disarm_timeout(game.id)
+            self.arm_timeout(game)
+        except Exception:
+            log.exception("Timeout action for game %s failed", game.id)
+
+    async def handle_forwarded(self, message: Dict[str, Any]):
+        """Bus inbox: a player whose socket sits on another worker joined, acted or left in one of our games."""
+        game_id, player_id = message["game_id"], message["player_id"]
+        if message["kind"] == "detach":
+            # Never loads the game: one that is not resident has nobody to forget
+            game = self.games.get(UUID(game_id))
+            if game and game.relayed.get(player_id) == message.get("worker_id"):
+                del game.relayed[player_id]
+            return
+        try:
+            moved = await self.shards.owner(game_id) is not None
+        except ShardUnavailable:
+            moved = True
+        game = None if moved else await self.get_game(game_id)
+        if game is None:
+            error = "Game is changing owner, reconnect" if moved else "Game not found"
+            self.bus.publish(game_id, {"type": "error", "message": error}, to=player_id)
+            return
 
-    def save_game_to_redis(self, game: Game):
-        """Serializes the game logic state to Redis."""
-        data = {
-        "state": game.state,
-        "players_list": list(game.get_players().values()),
-        "turn_order": game.turn_order,
-        "turn": game.turn.to_dict(),
+        if worker_id := message.get("worker_id"):
+            game.relayed[player_id] = worker_id
+        if message["kind"] == "join":
+            await game.send_to(player_id, game_snapshot(game, "game_start"))
+            if overlay := snapshot_overlay(game, player_id):
+                await game.send_to(player_id, overlay)
+            if player_id in game.players_map:
+                await game.broadcast({"type": "player_reconnected", "player_id": player_id})
+        elif message["kind"] == "action":
+            error = await self.submit(
+                game, player_id, message["action"], message.get("payload") or {}
+            )
+            if error:
+                await game.send_to(player_id, {"type": "error", "message": error})
+
+    async def stop_actors(self):
+        """Stops every resident game's actor at shutdown; callers still waiting get GameBusy."""
+        for actor in list(self.actors.values()):
+            await actor.stop()
+
+    def save_game(self, game: Game):
+        """Schedules a full snapshot of the game for the next persister tick."""
+        self.persister.mark_dirty(game, snapshot=True)
+
+    def touch(self, game: Game):
+        if game.id in self.games:
+            self.games.move_to_end(game.id)
+        self._last_used[game.id] = time.monotonic()
+
+    def _actor_idle(self, game_id: UUID) -> bool:
+        actor = self.actors.get(game_id)
+        return actor is None or actor.idle
+
+    @staticmethod
+    def footprint(game: Game) -> int:
+        """Estimated bytes the game takes in memory, from the size it was last saved at."""
+        return int(game.stored_size * GAME_MEMORY_FACTOR)
+
+    def memory_budget(self) -> int:
+        return int(GAME_MEMORY_BUDGET_MB * 1024 * 1024)
+
+    @staticmethod
+    def _connected(game: Game, live_workers) -> bool:
+        """Someone has a socket on the game, here or relayed through a worker still alive."""
+        return bool(game.connections) or any(w in live_workers for w in game.relayed.values())
+
+    def _eviction_reason(
+        self, game: Game, now: float, over_budget: bool, live_workers
+    ) -> Optional[str]:
+        if self._connected(game, live_workers):
+            return None
+        idle = now - self._last_used.get(game.id, now)
+        if game.state["phase"] == "GAME_OVER" and idle >= GAME_OVER_TTL:
+            return "finished"
+        if idle >= GAME_IDLE_TIMEOUT:
+            return "idle"
+        return "capacity" if over_budget else None
+
+    async def evict(self) -> int:
+        """
+        Hibernates games nobody is connected to: idle or finished ones, plus
+        the least recently used while resident games are estimated to take
+        more than GAME_MEMORY_BUDGET_MB. Each is flushed to Redis first and
+        only dropped if that write went through and it was not used in the
+        meantime; `get_game` loads it back on the next access.
+        """
+        started = time.monotonic()
+        # Relayed players count while the worker holding their socket is alive
+        live = await self.shards.live_workers() if any(g.relayed for g in self.games.values()) else {}
+        sizes = {gid: self.footprint(game) for gid, game in self.games.items()}
+        excess = sum(sizes.values()) - self.memory_budget()
+        victims = []
+        for game in list(self.games.values()):
+            reason = self._eviction_reason(game, started, excess > 0, live)
+            if reason:
+                victims.append((game, reason))
+                excess -= sizes[game.id]
+        if not victims:
+            return 0
+
+        for game, _ in victims:
+            self.save_game(game)
+        await self.persister.flush()
+
+        evicted = []
+        for game, reason in victims:
+            if (
+                self._connected(game, live)
+                or not self._actor_idle(game.id)
+                or self._last_used.get(game.id, 0) > started
+                or self.persister.is_dirty(game.id)
+            ):
+                self.eviction["kept"] += 1
+                continue
+            del self.games[game.id]
+            self._last_used.pop(game.id, None)
+            self.disarm_timeout(game.id)
+            self.persister.discard(game.id)
+            if actor := self.actors.pop(game.id, None):
+                await actor.stop()
+            self.eviction[reason] += 1
+            evicted.append(game.id)
+        # Let whichever worker next needs them claim the games afresh
+        await self.shards.release(evicted)
+        if evicted:
+            log.info("Evicted %d of %d resident games", len(evicted), len(self.games) + len(evicted))
+        return len(evicted)
+
+    async def _evict_loop(self):
+        while True:
+            await asyncio.sleep(GAME_EVICT_INTERVAL)
+            try:
+                await self.evict()
+            except Exception:
+                log.exception("Game eviction pass failed")
+
+    def start_eviction(self):
+        if self._evict_task is None:
+            self._evict_task = asyncio.create_task(self._evict_loop())
+
+    async def stop_eviction(self):
+        if self._evict_task is not None:
+            self._evict_task.cancel()
+            try:
+                await self._evict_task
+            except asyncio.CancelledError:
+                pass
+            self._evict_task = None
+
+    def residency_stats(self) -> dict:
+        return {
+            "resident": len(self.games),
+            "connected": sum(1 for g in self.games.values() if g.connections or g.relayed),
+            "memory_estimate_bytes": sum(self.footprint(g) for g in self.games.values()),
+            "memory_budget_bytes": self.memory_budget(),
+            "evicted": {k: v for k, v in self.eviction.items() if k not in ("kept", "rehydrated")},
+            "eviction_skipped": self.eviction["kept"],
+            "rehydrated": self.eviction["rehydrated"],
+            "queued_actions": sum(a.stats()["queued"] for a in self.actors.values()),
+            "rejected_actions": sum(a.rejected for a in self.actors.values()),
+            "pending_timeouts": len(self.timers),
+            "timeouts_fired": self.timeouts["fired"],
+            "timeouts_stale": self.timeouts["stale"],
         }
-        self.r.set(f"game_state:{game.id}", json.dumps(data, default=str))
+
+
+def _game_from_blob(uid: UUID, stored_state: str) -> Game:
+    game = Game.from_redis(uid, json.loads(stored_state))
+    # Sized as a whole until its next save writes the per-field hash
+    game.field_sizes = {"state": len(stored_state)}
+    return game
 
 
 _instance = None
@@ -0,0 +1,64 @@
+from typing import Any, Dict, Mapping
+
+from app.models.board_index import BoardIndex
+
+
+class PlayerHoldings:
+    """Aggregate counters over the squares one owner holds."""
+
+    __slots__ = ("owned", "per_group", "railroads", "utilities", "houses", "unmortgaged")
+
+    def __init__(self):
+        self.owned = 0
+        self.per_group: Dict[str, int] = {}
+        self.railroads = 0
+        self.utilities = 0
+        self.houses = 0
+        self.unmortgaged = 0
+
+    def add(self, index: BoardIndex, square_id: int, houses: int, mortgaged: bool):
+        self._apply(index, square_id, houses, mortgaged, 1)
+
+    def remove(self, index: BoardIndex, square_id: int, houses: int, mortgaged: bool):
+        self._apply(index, square_id, houses, mortgaged, -1)
+
+    def _apply(self, index: BoardIndex, square_id: int, houses: int, mortgaged: bool, sign: int):
+        self.owned += sign
+        group_id = index.group_of[square_id]
+        if group_id is not None:
+            self.per_group[group_id] = self.per_group.get(group_id, 0) + sign
+        if square_id in index.railroads:
+            self.railroads += sign
+        elif square_id in index.utilities:
+            self.utilities += sign
+        self.houses += sign * houses
+        if not mortgaged:
+            self.unmortgaged += sign
+
+    def as_tuple(self) -> tuple:
+        groups = tuple(sorted((g, n) for g, n in self.per_group.items() if n))
+        return (
+            self.owned,
+            groups,
+            self.railroads,
+            self.utilities,
+            self.houses,
+            self.unmortgaged,
+        )
+
+
+def compute_holdings(
+    index: BoardIndex, mutable_properties: Mapping[int, Mapping[str, Any]]
+) -> Dict[int, PlayerHoldings]:
+    """Recomputes every owner's counters from scratch."""
+    holdings: Dict[int, PlayerHoldings] = {}
+    for sid, prop in mutable_properties.items():
+        owner_id = prop["owner_id"]
+        if owner_id is None:
+            continue
+        if owner_id not in holdings:
+            holdings[owner_id] = PlayerHoldings()
+        holdings[owner_id].add(
+            index, int(sid), prop.get("houses", 0), prop.get("is_mortgaged", False)
+        )
+    return holdings
@@ -4,12 +4,23 @@ from typing import List, Set
 
 
 class MatchGroup:
-    def __init__(self, player_ids: List[int], target_size: int = 4):
+    def __init__(self, player_ids: List[int], target_size: int = 4, rating: float = 1200.0):
         self.id = str(uuid4())
         self.player_ids = player_ids  # Can be 1 player or a group of friends
         self.target_size = target_size
+        self.rating = rating  # members' mean Elo rating
         self.created_at = time.time()
 
+    @classmethod
+    def restore(
+        cls, group_id: str, player_ids: List[int], target_size: int, created_at: float, rating: float
+    ):
+        """Rebuilds a group read back from the shared queue."""
+        group = cls(player_ids, target_size, rating)
+        group.id = group_id
+        group.created_at = created_at
+        return group
+
     @property
     def size(self):
         return len(self.player_ids)
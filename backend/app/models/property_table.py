@@ -0,0 +1,128 @@
+from collections.abc import Mapping, MutableMapping
+from typing import Any, Dict, Iterator, Optional
+
+from app.models.board_index import BoardIndex, get_board_index
+
+FIELDS = ("owner_id", "houses", "is_mortgaged")
+
+
+class PropertyView(MutableMapping):
+    """Dict-like window onto one square's row of a PropertyTable."""
+
+    __slots__ = ("_table", "_sid")
+
+    def __init__(self, table: "PropertyTable", square_id: int):
+        self._table = table
+        self._sid = square_id
+
+    def __getitem__(self, key: str) -> Any:
+        return self._table._get(self._sid, key)
+
+    def __setitem__(self, key: str, value: Any):
+        self._table._set(self._sid, key, value)
+
+    def __delitem__(self, key: str):
+        raise TypeError("Property fields cannot be removed")
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(FIELDS)
+
+    def __len__(self) -> int:
+        return len(FIELDS)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class PropertyTable(MutableMapping):
+    """
+    Owner, houses and mortgage flag for every purchasable square, packed into a
+    single 3 x board-size bytearray (owner stored as seat id + 1, 0 = bank).
+
+    Behaves like the `{square_id: {"owner_id", "houses", "is_mortgaged"}}` dict
+    it replaces and round-trips through `to_bytes` / `from_bytes`.
+    """
+
+    __slots__ = ("_buf", "_size", "_keys")
+
+    def __init__(self, index: Optional[BoardIndex] = None, data: Optional[bytes] = None):
+        index = index or get_board_index()
+        self._size = index.size
+        self._keys = index.purchasable
+        if data is None:
+            self._buf = bytearray(3 * self._size)
+        else:
+            if len(data) != 3 * self._size:
+                raise ValueError(
+                    f"Packed property state must be {3 * self._size} bytes, got {len(data)}."
+                )
+            self._buf = bytearray(data)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "PropertyTable":
+        return cls(data=data)
+
+    @classmethod
+    def from_dict(cls, props: Mapping[Any, Mapping[str, Any]]) -> "PropertyTable":
+        table = cls()
+        for sid, prop in props.items():
+            table[int(sid)] = prop
+        return table
+
+    def to_bytes(self) -> bytes:
+        return bytes(self._buf)
+
+    def to_dict(self) -> Dict[int, Dict[str, Any]]:
+        return {sid: dict(self[sid]) for sid in sorted(self._keys)}
+
+    # --- raw field access ---
+    def _get(self, sid: int, key: str) -> Any:
+        if key == "owner_id":
+            value = self._buf[sid]
+            return None if value == 0 else value - 1
+        if key == "houses":
+            return self._buf[self._size + sid]
+        if key == "is_mortgaged":
+            return bool(self._buf[2 * self._size + sid])
+        raise KeyError(key)
+
+    def _set(self, sid: int, key: str, value: Any):
+        if key == "owner_id":
+            self._buf[sid] = 0 if value is None else value + 1
+        elif key == "houses":
+            self._buf[self._size + sid] = value
+        elif key == "is_mortgaged":
+            self._buf[2 * self._size + sid] = 1 if value else 0
+        else:
+            raise KeyError(key)
+
+    # --- mapping protocol ---
+    def __getitem__(self, square_id: int) -> PropertyView:
+        if square_id not in self._keys:
+            raise KeyError(square_id)
+        return PropertyView(self, square_id)
+
+    def __setitem__(self, square_id: int, prop: Mapping[str, Any]):
+        if square_id not in self._keys:
+            raise KeyError(square_id)
+        self._set(square_id, "owner_id", prop.get("owner_id"))
+        self._set(square_id, "houses", prop.get("houses", 0))
+        self._set(square_id, "is_mortgaged", prop.get("is_mortgaged", False))
+
+    def __delitem__(self, square_id: int):
+        raise TypeError("Squares cannot be removed from the board")
+
+    def __contains__(self, square_id: object) -> bool:
+        return square_id in self._keys
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(sorted(self._keys))
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __reduce__(self):
+        return (PropertyTable.from_bytes, (self.to_bytes(),))
+
+    def __repr__(self) -> str:
+        return f"PropertyTable({self.to_dict()!r})"
@@ -1,19 +1,19 @@
 from app.db.init_db import SessionLocal as db
 from app.models.User import User
-import bcrypt
 import jwt
 import datetime
 from app.config import SECRET_KEY
+from app.services.password_pool import PasswordPoolBusy, needs_rehash, password_pool
 
 secret = SECRET_KEY
 
 
-def register_user(username: str, password: str, email: str = ""):
+async def register_user(username: str, password: str, email: str = ""):
     session = db()
     existing_user = session.query(User).filter_by(username=username).first()
     if existing_user:
         return 0
-    hashed_password = hash_password(password)
+    hashed_password = await password_pool.hash(password)
     new_user = User(username=username, password=hashed_password, email=email)
     session.add(new_user)
     session.commit()
@@ -24,27 +24,34 @@ def register_user(username: str, password: str, email: str = ""):
     return {"access_token": new_user.token, "token_type": "bearer"}
 
 
-def authenticate_user(username: str, password: str):
+async def authenticate_user(username: str, password: str):
     session = db()
     user = session.query(User).filter_by(username=username).first()
     if not user:
         print("creds not correct")
         return False
-    if check_password(password, user.password):
+    if await password_pool.check(password, user.password):
         print("logged in")
+        if needs_rehash(user.password):
+            # BCRYPT_ROUNDS changed since this hash was made; upgrade it while we have the password
+            try:
+                user.password = await password_pool.hash(password)
+                session.commit()
+            except PasswordPoolBusy:
+                pass  # next login will try again
         return create_token(user.id)
 
 
-def change_password(username: str, old_password: str, new_password: str) -> bool:
+async def change_password(username: str, old_password: str, new_password: str) -> bool:
     session = db()
     user = session.query(User).filter_by(username=username).first()
     if not user:
         print("User not found")
         return False
-    if not check_password(old_password, user.password):
+    if not await password_pool.check(old_password, user.password):
         print("Old password is incorrect")
         return False
-    user.password = hash_password(new_password)
+    user.password = await password_pool.hash(new_password)
     session.commit()
     print("Password changed successfully")
     return True
@@ -72,14 +79,6 @@ def verify_token(token: str):
     return data
 
 
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
-
-
-def check_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode(), hashed.encode())
-
-
 def get_all_users():
     session = db()
     return session.query(User).all()
@@ -0,0 +1,185 @@
+from typing import Any, Coroutine, Dict, Optional, Tuple
+
+from app.models.Game import Game, STATIC_BOARD_TILES
+from app.services.ws_codec import OVERLAY_TYPE
+
+# Actions that are only accepted from the player whose turn it is
+TURN_ACTIONS = ("roll_dice", "buy_property", "pass_on_buy")
+# Actions only the server injects (phase timeouts), never accepted from a client
+SYSTEM_ACTIONS = ("close_auction",)
+
+# What a phase timeout does on the stalling player's behalf
+TIMEOUT_ACTIONS = {
+    "WAIT_FOR_ROLL": ("roll_dice", {}),
+    "DECIDE_TO_BUY": ("pass_on_buy", {}),
+    "JAIL_DECISION": ("jail_action", {"action": "ROLL"}),
+    # ends the auction at the current highest bid (the bank keeps it without one)
+    "AUCTION": ("close_auction", {}),
+}
+
+
+def run_sync(coro: Coroutine) -> Any:
+    """
+    Drives a Game coroutine to completion without an event loop.
+
+    Only valid when nothing in the call awaits real I/O (no sockets attached),
+    which is the case for headless games and for event replay; anything that
+    actually suspends is reported as an error.
+    """
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+    coro.close()
+    raise RuntimeError("Game coroutine tried to await real I/O")
+
+
+def game_snapshot(game: Game, event_type: str, extra_data: Optional[dict] = None) -> dict:
+    """Full game state message; identical for every recipient so it is encoded once."""
+    snapshot = {
+        "type": event_type,
+        "state": {
+            **game.state_view(),
+            "players": game.players_list(),
+            "turn": game.turn_order[game.state["turn_index"]],
+        },
+    }
+    if game.state["phase"] == "AUCTION":
+        snapshot["state"]["auction"] = {
+            "property_id": game.state.get("auction_property_id"),
+            "highest_bid": game.state.get("highest_bid"),
+            "highest_bidder": game.state.get("highest_bidder"),
+            "active_bidders": game.state.get("active_bidders"),
+        }
+    if extra_data:
+        snapshot["state"].update(extra_data)
+
+    return snapshot
+
+
+def snapshot_overlay(game: Game, player_id: int) -> Optional[dict]:
+    """
+    Fields only `player_id` needs on top of the last snapshot, or None.
+
+    The player deciding whether to buy gets the property for sale (also on
+    reconnect); everyone else just sees the phase.
+    """
+    if game.state["phase"] != "DECIDE_TO_BUY" or not is_players_turn(game, player_id):
+        return None
+    prop = STATIC_BOARD_TILES[game.players_map[player_id].position]
+    return {"type": OVERLAY_TYPE, "state": {"propertyForSale": prop.model_dump()}}
+
+
+async def broadcast_snapshot(game: Game, event_type: str, extra_data: Optional[dict] = None):
+    await game.broadcast(game_snapshot(game, event_type, extra_data))
+    for pid in list(game.players_map):
+        if overlay := snapshot_overlay(game, pid):
+            await game.send_to(pid, overlay)
+
+
+def timeout_key(game: Game) -> Optional[tuple]:
+    """
+    Identifies the decision the game is waiting on, or None if its phase has
+    no timeout. A phase deadline restarts whenever this changes (a new turn,
+    a new bid), not on unrelated traffic such as chat.
+    """
+    phase = game.state["phase"]
+    if phase not in TIMEOUT_ACTIONS:
+        return None
+    auction = game.state.get("auction") or {}
+    return (
+        phase,
+        game.state["turn_index"],
+        auction.get("highest_bid"),
+        len(auction.get("active_players", ())),
+    )
+
+
+def timeout_action(game: Game) -> Tuple[int, str, Dict[str, Any]]:
+    """`(user id, action, payload)` to inject when the current phase times out."""
+    action, payload = TIMEOUT_ACTIONS[game.state["phase"]]
+    return game.players[game.turn_order[game.state["turn_index"]]], action, dict(payload)
+
+
+def is_players_turn(game: Game, player_id: int) -> bool:
+    player = game.players_map.get(player_id)
+    return player is not None and game.turn_order[game.state["turn_index"]] == player.id
+
+
+async def apply_action(game: Game, player_id: int, action: str, payload: Dict[str, Any]):
+    """
+    Runs one accepted player action through the engine and broadcasts the result.
+
+    This is the single entry point for live websocket traffic and for replaying
+    the event log, so both follow exactly the same rules.
+    """
+    current_player = game.players_map.get(player_id)
+
+    def broadcast(event_type: str, extra_data: Optional[dict] = None):
+        return broadcast_snapshot(game, event_type, extra_data)
+
+    if action == "leave_game":
+        await game.leave_game(player_id)
+        return
+    if action == "mortgage_property":
+        square_id = payload.get("square_id")
+        await game.mortgage_property(player_id, square_id)
+        if game.state.get("debt"):
+            await game.settle_debt()
+        await broadcast("property_mortgaged")
+        return
+    if action == "CHAT":
+        # Broadcast this message to all connected clients in the same game room
+        await game.broadcast({"type": "chat_message", "data": payload})
+
+    if action == "reset_game":
+        game.reset_game()
+        await broadcast("reset_game")
+
+    elif action == "roll_dice":
+        dice_result = await game.roll_dice(player_id)
+
+        # If we landed on a free property, the roller also gets it in an overlay (DECIDE_TO_BUY)
+        extra = {
+            "action": "dice_rolled",
+            "dice": dice_result,
+            "new_position": current_player.position,
+        }
+        await broadcast("game_update", extra)
+
+    elif action == "buy_property" and game.state["phase"] == "DECIDE_TO_BUY":
+        await game.buy_property(player_id, current_player.position)
+        await broadcast("property_bought")
+
+    # auction start
+    elif action == "pass_on_buy" and game.state["phase"] == "DECIDE_TO_BUY":
+        game.state["phase"] = "AUCTION_PROPERTY"
+        await game.start_auction(current_player.position, player_id)
+
+    elif action == "jail_action":
+        await game.jail_decision(player_id, payload.get("action", ""))
+        await broadcast("game_update")
+
+    elif action == "build_house":
+        await game.build_house(player_id, payload.get("square_id", -1))
+        await broadcast("house_built")
+
+    if game.state["phase"] == "AUCTION":
+        if action == "place_bid":
+            await game.place_bid(player_id, payload.get("amount", 0))
+        elif action == "fold_auction":
+            await game.fold_auction(player_id)
+        elif action == "close_auction":
+            await game._finalize_auction()
+
+    advanced = game.advance_phase()
+    if advanced == "end_turn":
+        await broadcast("end_turn")
+    elif advanced == "roll_dice":
+        await broadcast("roll_dice")
+
+
+def replay_action(game: Game, event: Dict[str, Any]):
+    """Re-applies a logged event, feeding back the dice it originally rolled."""
+    game.script_rolls(event.get("dice", []))
+    run_sync(apply_action(game, event["player_id"], event["action"], event.get("payload") or {}))
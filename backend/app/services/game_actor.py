@@ -0,0 +1,115 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+from app.config import GAME_ACTOR_MAX_BATCH, GAME_ACTOR_QUEUE_SIZE
+from app.models.Game import Game
+
+log = logging.getLogger(__name__)
+
+
+class GameBusy(Exception):
+    """The game's action queue is full; the caller should back off and retry."""
+
+
+class GameActor:
+    """
+    The single task allowed to mutate one resident game.
+
+    Websocket handlers, relayed actions and dev edits submit work to a
+    bounded queue and await its result; the actor runs it strictly in
+    arrival order, so nothing interleaves at the engine's await points.
+    Whatever is queued when the actor wakes up runs as one batch, with the
+    game's outgoing messages held back and sent once at the end (a full
+    state update superseded later in the batch is skipped).
+    """
+
+    def __init__(
+        self,
+        game: Game,
+        max_queue: int = GAME_ACTOR_QUEUE_SIZE,
+        max_batch: int = GAME_ACTOR_MAX_BATCH,
+    ):
+        self.game = game
+        self.max_batch = max_batch
+        self._queue: asyncio.Queue = asyncio.Queue(max_queue)
+        self._task: asyncio.Task | None = None
+        self._running = False
+        self._batch: list = []
+        # metrics
+        self.processed = 0
+        self.batches = 0
+        self.rejected = 0
+
+    def start(self) -> "GameActor":
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return self
+
+    @property
+    def idle(self) -> bool:
+        return not self._running and self._queue.empty()
+
+    async def call(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Runs `fn` on the actor and returns (or raises) its result."""
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((fn, future))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise GameBusy(f"Game {self.game.id} has too many pending actions")
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            self._batch = batch
+            self._running = True
+            self.game.hold_messages()
+            try:
+                for fn, future in batch:
+                    try:
+                        result = await fn()
+                    except Exception as e:
+                        if not future.done():
+                            future.set_exception(e)
+                    else:
+                        if not future.done():
+                            future.set_result(result)
+            finally:
+                try:
+                    await self.game.release_messages()
+                except Exception:
+                    log.exception("Sending batched messages of game %s failed", self.game.id)
+                self._running = False
+            # (left in place on cancellation, so stop() can fail its futures)
+            self._batch = []
+            self.processed += len(batch)
+            self.batches += 1
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Callers still waiting (mid-batch or queued) get an error instead of hanging
+        pending = list(self._batch)
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        self._batch = []
+        for _, future in pending:
+            if not future.done():
+                future.set_exception(GameBusy(f"Game {self.game.id} was unloaded"))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "processed": self.processed,
+            "batches": self.batches,
+            "rejected": self.rejected,
+        }
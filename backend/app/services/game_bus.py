@@ -0,0 +1,242 @@
+import asyncio
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.config import GAME_BUS_ENABLED, GAME_BUS_INBOX_SIZE, GAME_BUS_OUTBOX_SIZE, WORKER_ID
+from app.db.redis_pool import get_redis
+from app.services.ws_codec import JSON, encode_frame, encode_message, is_state_update
+
+log = logging.getLogger(__name__)
+
+# Envelope of a published game message: "<recipient user id or empty>|<1 if full state>|<JSON>"
+_ALL = ""
+
+
+def game_channel(game_id: Any) -> str:
+    return f"game_bus:{game_id}"
+
+
+def inbox_channel(worker_id: str) -> str:
+    return f"worker_inbox:{worker_id}"
+
+
+class GameBus:
+    """
+    Redis pub/sub fan-out, so players of one game may sit on different workers.
+
+    The owning worker (see sharding.py) publishes every outbound message once,
+    already JSON-encoded, to the game's channel. Workers holding sockets for a
+    game they do not own subscribe to that channel and deliver to those
+    sockets; client actions travel the other way through the owner's inbox
+    channel. Each worker uses a single subscriber connection for all of its
+    channels, and publishes from a bounded queue so the engine never waits on
+    Redis. Inbox events are handed to one task per game, so a slow game never
+    holds up the listener or the other games.
+    """
+
+    def __init__(
+        self,
+        worker_id: str = WORKER_ID,
+        enabled: bool = GAME_BUS_ENABLED,
+        outbox_size: int = GAME_BUS_OUTBOX_SIZE,
+        inbox_size: int = GAME_BUS_INBOX_SIZE,
+    ):
+        self.worker_id = worker_id
+        self.enabled = enabled
+        self.inbox_size = inbox_size
+        # game id (str) -> {user id: GameConnection} for sockets relayed from another owner
+        self.local: Dict[str, Dict[int, Any]] = {}
+        self._pubsub = None
+        self._outbox: asyncio.Queue = asyncio.Queue(outbox_size)
+        self._tasks: list = []
+        # game id (str) -> inbox events not handled yet, and the task handling them
+        self._inboxes: Dict[str, asyncio.Queue] = {}
+        self._dispatchers: Dict[str, asyncio.Task] = {}
+        self._on_inbox: Optional[Callable[[Dict[str, Any]], Awaitable]] = None
+        self._totals = {
+            "published": 0,
+            "outbox_dropped": 0,
+            "received": 0,
+            "delivered": 0,
+            "forwarded": 0,
+            "inbox": 0,
+            "inbox_rejected": 0,
+        }
+
+    async def start(self, on_inbox: Callable[[Dict[str, Any]], Awaitable]):
+        """Subscribes to this worker's inbox; `on_inbox` handles actions relayed by other workers."""
+        if not self.enabled or self._tasks:
+            return
+        self._on_inbox = on_inbox
+        self._pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(inbox_channel(self.worker_id))
+        self._tasks = [asyncio.create_task(self._listen()), asyncio.create_task(self._publish())]
+
+    async def stop(self):
+        tasks = self._tasks + list(self._dispatchers.values())
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        self._inboxes.clear()
+        self._dispatchers.clear()
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+
+    # Outbound: owner -> every worker with sockets for the game
+
+    def publish(self, game_id: Any, message: dict, to: Optional[int] = None, text: Optional[str] = None):
+        """
+        Queues one message for the game's remote sockets (all of them, or just
+        `to`). `text` is the message's JSON encoding if the caller already has it.
+        """
+        if not self._tasks:
+            return
+        header = _ALL if to is None else str(to)
+        flag = "1" if is_state_update(message) else "0"
+        if text is None:
+            text = encode_message(message)
+        try:
+            self._outbox.put_nowait((game_channel(game_id), f"{header}|{flag}|{text}"))
+        except asyncio.QueueFull:
+            # Redis is not keeping up; remote sockets catch up with the next full state
+            self._totals["outbox_dropped"] += 1
+            if self._totals["outbox_dropped"] % 1000 == 1:
+                log.warning("Game bus outbox full; dropping messages")
+
+    async def _publish(self):
+        redis = get_redis()
+        while True:
+            batch = [await self._outbox.get()]
+            while not self._outbox.empty():
+                batch.append(self._outbox.get_nowait())
+            try:
+                async with redis.pipeline(transaction=False) as pipe:
+                    for channel, data in batch:
+                        pipe.publish(channel, data)
+                    await pipe.execute()
+                self._totals["published"] += len(batch)
+            except Exception:
+                log.exception("Dropped %d game bus messages", len(batch))
+
+    # Relayed sockets: a worker holding sockets for a game owned elsewhere
+
+    async def attach(self, game_id: Any, player_id: int, conn):
+        conns = self.local.setdefault(str(game_id), {})
+        if not conns:
+            await self._pubsub.subscribe(game_channel(game_id))
+        conns[player_id] = conn
+
+    async def detach(self, game_id: Any, player_id: int, conn):
+        conns = self.local.get(str(game_id))
+        if not conns or conns.get(player_id) is not conn:
+            return
+        del conns[player_id]
+        if not conns:
+            del self.local[str(game_id)]
+            if self._pubsub is not None:
+                await self._pubsub.unsubscribe(game_channel(game_id))
+
+    async def forward(self, worker_id: str, game_id: Any, player_id: int, kind: str, **fields) -> bool:
+        """
+        Hands a client event ("join", "action" or "detach") to the owning
+        worker; False if nobody listens on its inbox any more.
+        """
+        message = {
+            "game_id": str(game_id),
+            "player_id": player_id,
+            "kind": kind,
+            "worker_id": self.worker_id,
+            **fields,
+        }
+        receivers = await get_redis().publish(inbox_channel(worker_id), json.dumps(message))
+        self._totals["forwarded"] += 1
+        return receivers > 0
+
+    # Inbound: one listener for the inbox and every subscribed game channel
+
+    async def _listen(self):
+        inbox = inbox_channel(self.worker_id)
+        while True:
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is None:
+                    continue
+                if message["channel"] == inbox:
+                    self._totals["inbox"] += 1
+                    self._dispatch(json.loads(message["data"]))
+                else:
+                    self._deliver(message["channel"].split(":", 1)[1], message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception("Game bus listener error")
+                await asyncio.sleep(0.5)
+
+    def _dispatch(self, message: Dict[str, Any]):
+        """Queues an inbox event behind the earlier ones for the same game, in the order sent."""
+        game_id = message["game_id"]
+        queue = self._inboxes.get(game_id)
+        if queue is None:
+            queue = self._inboxes[game_id] = asyncio.Queue(self.inbox_size)
+            self._dispatchers[game_id] = asyncio.create_task(self._drain_inbox(game_id, queue))
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self._totals["inbox_rejected"] += 1
+            self.publish(
+                game_id,
+                {"type": "error", "message": "Game has too many pending actions"},
+                to=message["player_id"],
+            )
+
+    async def _drain_inbox(self, game_id: str, queue: asyncio.Queue):
+        # Runs until the game's inbox is empty; the next event starts a new task
+        try:
+            while not queue.empty():
+                message = queue.get_nowait()
+                try:
+                    await self._on_inbox(message)
+                except Exception:
+                    log.exception("Handling relayed %s for game %s failed", message["kind"], game_id)
+        finally:
+            if self._inboxes.get(game_id) is queue:
+                del self._inboxes[game_id]
+                del self._dispatchers[game_id]
+
+    def _deliver(self, game_id: str, data: str):
+        self._totals["received"] += 1
+        conns = self.local.get(game_id)
+        if not conns:
+            return
+        to, flag, text = data.split("|", 2)
+        if to != _ALL:
+            conns = {int(to): conns[int(to)]} if int(to) in conns else {}
+        is_state = flag == "1"
+        message = None
+        frames = {JSON: text}
+        for conn in conns.values():
+            frame = frames.get(conn.encoding)
+            if frame is None:
+                # Only decoded when some local socket wants another encoding
+                message = message if message is not None else json.loads(text)
+                frame = frames[conn.encoding] = encode_frame(message, conn.encoding)
+            conn.send_frame(frame, is_state)
+            self._totals["delivered"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "relayed_games": len(self.local),
+            "relayed_sockets": sum(len(c) for c in self.local.values()),
+            "outbox": self._outbox.qsize(),
+            "inbox_games": len(self._inboxes),
+            "inbox_pending": sum(q.qsize() for q in self._inboxes.values()),
+            **self._totals,
+        }
@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.config import EVENT_SNAPSHOT_INTERVAL, PERSIST_INTERVAL, PERSIST_MAX_STALENESS
+from app.models.event_log import GameEventLog
+from app.models.Game import Game
+from app.db.redis_pool import get_redis
+from app.models.RedisGameStore import RedisGameStore
+from app.services.sharding import FencedWrites, ShardRouter, lease_lost
+
+log = logging.getLogger(__name__)
+
+
+def _already_written(result: Any) -> bool:
+    # Re-sending an event after a partial failure: the stream already has that id
+    return isinstance(result, Exception) and "equal or smaller" in str(result)
+
+
+class GamePersister:
+    """
+    Write-behind persistence for live games.
+
+    Actions and state changes only mark a game dirty; a background task
+    flushes every dirty game once per PERSIST_INTERVAL in one pipelined round
+    trip, so any number of changes inside one action cost a single write.
+    Logged actions go out on every tick. Full snapshots are written every
+    EVENT_SNAPSHOT_INTERVAL actions, when asked for, or once the newest
+    snapshot of a changed game is PERSIST_MAX_STALENESS seconds old, which
+    bounds how much a reload has to replay; a snapshot only writes the hash
+    fields that changed since the previous one. `stop()` flushes what is left.
+
+    With sharding enabled each game's writes only go through while this
+    worker still holds its lease; a game whose lease moved on is discarded
+    instead of overwriting what the new owner wrote.
+    """
+
+    def __init__(
+        self,
+        events: GameEventLog,
+        store: RedisGameStore,
+        interval: float = PERSIST_INTERVAL,
+        max_staleness: float = PERSIST_MAX_STALENESS,
+        snapshot_every: int = EVENT_SNAPSHOT_INTERVAL,
+        shards: Optional[ShardRouter] = None,
+    ):
+        self.events = events
+        self.store = store
+        self.interval = interval
+        self.max_staleness = max_staleness
+        self.snapshot_every = snapshot_every
+        self.shards = shards
+        self._dirty: Dict[Any, Game] = {}
+        self._pending: Dict[Any, List[Tuple[int, Dict[str, Any]]]] = {}
+        self._force_snapshot: Set[Any] = set()
+        self._last_snapshot: Dict[Any, float] = {}
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        # metrics
+        self.flushes = 0
+        self.events_written = 0
+        self.snapshots_written = 0
+        self.fenced_off = 0
+
+    def mark_dirty(self, game: Game, snapshot: bool = False):
+        self._dirty[game.id] = game
+        self._last_snapshot.setdefault(game.id, time.monotonic())
+        if snapshot:
+            self._force_snapshot.add(game.id)
+
+    def add_event(self, game: Game, seq: int, event: Dict[str, Any]):
+        self._pending.setdefault(game.id, []).append((seq, event))
+        self.mark_dirty(game)
+
+    def is_dirty(self, game_id: Any) -> bool:
+        return game_id in self._dirty
+
+    def discard(self, game_id: Any):
+        """Forgets unwritten changes of a game this worker no longer owns."""
+        self._dirty.pop(game_id, None)
+        self._pending.pop(game_id, None)
+        self._force_snapshot.discard(game_id)
+        self._last_snapshot.pop(game_id, None)
+
+    def _snapshot_due(self, game: Game, now: float) -> bool:
+        if game.events_since_snapshot >= self.snapshot_every:
+            return True
+        return (
+            game.events_since_snapshot > 0
+            and now - self._last_snapshot.get(game.id, now) >= self.max_staleness
+        )
+
+    async def flush(self) -> int:
+        """Writes everything dirty in one pipeline; returns how many games were flushed."""
+        async with self._lock:
+            if not self._dirty:
+                return 0
+            dirty, self._dirty = self._dirty, {}
+            pending, self._pending = self._pending, {}
+            forced, self._force_snapshot = self._force_snapshot, set()
+            now = time.monotonic()
+
+            owners: List[Any] = []
+            snapshots: Dict[Any, int] = {}
+            fenced = self.shards is not None and self.shards.enabled
+            redis = get_redis()
+            try:
+                async with redis.pipeline(transaction=False) as pipe:
+                    for gid, game in dirty.items():
+                        # fenced: the game's commands are collected and sent as one guarded script
+                        out = FencedWrites() if fenced else pipe
+                        commands = 0
+                        for seq, event in pending.get(gid, ()):
+                            self.events.append(out, gid, seq, event)
+                            commands += 1
+                        if gid in forced or self._snapshot_due(game, now):
+                            # only the sections and players changed since the last snapshot
+                            commands += self.store.write(out, game)
+                            # actions logged while this write is in flight still count
+                            snapshots[gid] = game.events_since_snapshot
+                        if fenced and commands:
+                            self.shards.fenced_write(pipe, gid, out)
+                            commands = 1
+                        owners.extend([gid] * commands)
+                    results = await pipe.execute(raise_on_error=False)
+            except Exception:
+                log.exception("Persisting %s games failed; retrying next tick", len(dirty))
+                self._requeue(dirty, pending, forced | set(snapshots))
+                return 0
+
+            lost = {gid for gid, result in zip(owners, results) if lease_lost(result)}
+            for gid in lost:
+                log.warning("Game %s moved to another worker; dropping its unwritten changes", gid)
+                self.discard(gid)
+            self.fenced_off += len(lost)
+            failed = {
+                gid
+                for gid, result in zip(owners, results)
+                if isinstance(result, Exception) and not _already_written(result)
+            } - lost
+            if failed:
+                log.warning("Persisting games %s failed; retrying next tick", failed)
+                self._requeue(
+                    {gid: dirty[gid] for gid in failed},
+                    {gid: pending[gid] for gid in failed if gid in pending},
+                    {gid for gid in failed if gid in snapshots or gid in forced},
+                )
+            for gid, count in snapshots.items():
+                if gid not in failed and gid not in lost:
+                    dirty[gid].events_since_snapshot -= count
+                    self._last_snapshot[gid] = now
+                    self.snapshots_written += 1
+            self.events_written += sum(
+                len(events) for gid, events in pending.items() if gid not in failed and gid not in lost
+            )
+            self.flushes += 1
+            return len(dirty) - len(failed) - len(lost)
+
+    def _requeue(self, dirty: Dict[Any, Game], pending, snapshot_ids: Set[Any]):
+        for gid, game in dirty.items():
+            self._dirty.setdefault(gid, game)
+        for gid, events in pending.items():
+            self._pending[gid] = events + self._pending.get(gid, [])
+        for gid in snapshot_ids:
+            # the failed write already consumed the change set; rewrite everything
+            self._dirty[gid].mark_all_dirty()
+        self._force_snapshot |= snapshot_ids
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception:
+                log.exception("Game persister tick failed")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stops the background task and flushes whatever is still dirty."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "dirty_games": len(self._dirty),
+            "pending_events": sum(len(e) for e in self._pending.values()),
+            "flushes": self.flushes,
+            "events_written": self.events_written,
+            "snapshots_written": self.snapshots_written,
+            "fenced_off": self.fenced_off,
+        }
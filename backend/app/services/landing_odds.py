@@ -0,0 +1,189 @@
+import hashlib
+import json
+from typing import Any, Dict, List, Sequence, Tuple
+
+from app.models.Game import BOARD_INDEX, CHANCE_CARDS, COMMUNITY_CHEST_CARDS
+from app.models.board_index import BoardIndex
+
+JAIL_SQUARE = 10
+JAIL = "JAIL"
+MEAN_ROLL = 7
+
+# Markov states: (position, doubles rolled so far this turn) or ("J", failed escape attempts)
+State = Tuple[Any, int]
+
+DICE = [(a, b) for a in range(1, 7) for b in range(1, 7)]
+
+
+Decks = Dict[str, Sequence[Dict[str, Any]]]
+
+
+def _card_outcomes(
+    index: BoardIndex, decks: Decks, deck: str, square: int, depth: int
+) -> Dict[Any, float]:
+    """Where a card drawn on `square` leaves the player, averaged over the deck."""
+    out: Dict[Any, float] = {}
+    cards = decks[deck]
+    share = 1.0 / len(cards)
+    for card in cards:
+        t = card["type"]
+        if t == "MOVE":
+            dist = _land(index, decks, card["target"], depth + 1)
+        elif t == "BACK":
+            dist = _land(index, decks, (square - card["steps"]) % index.size, depth + 1)
+        elif t == "NEAREST":
+            target = index.nearest(square, card["target"])
+            dist = {square if target is None else target: 1.0}
+        elif t == "GO_TO_JAIL":
+            dist = {JAIL: 1.0}
+        else:
+            dist = {square: 1.0}
+        for where, p in dist.items():
+            out[where] = out.get(where, 0.0) + p * share
+    return out
+
+
+def _land(index: BoardIndex, decks: Decks, square: int, depth: int = 0) -> Dict[Any, float]:
+    """Distribution of where a player ends up after landing on `square`."""
+    kind = index.types[square]
+    if kind == "GoToJail":
+        return {JAIL: 1.0}
+    if depth < 3 and kind == "Chance":
+        return _card_outcomes(index, decks, "chance", square, depth)
+    if depth < 3 and kind == "CommunityChest":
+        return _card_outcomes(index, decks, "community", square, depth)
+    return {square: 1.0}
+
+
+def _transitions(
+    index: BoardIndex, decks: Decks, jail_strategy: str
+) -> Dict[State, Dict[State, float]]:
+    landing = [_land(index, decks, sq) for sq in range(index.size)]
+
+    def move(start: int, total: int, doubles_after: int, p: float, into: Dict[State, float]):
+        for where, q in landing[(start + total) % index.size].items():
+            nxt = ("J", 0) if where == JAIL else (where, doubles_after)
+            into[nxt] = into.get(nxt, 0.0) + p * q
+
+    table: Dict[State, Dict[State, float]] = {}
+    for pos in range(index.size):
+        for d in range(3):
+            row: Dict[State, float] = {}
+            for a, b in DICE:
+                if a == b and d == 2:
+                    # third double in a row
+                    row[("J", 0)] = row.get(("J", 0), 0.0) + 1 / 36
+                else:
+                    move(pos, a + b, d + 1 if a == b else 0, 1 / 36, row)
+            table[(pos, d)] = row
+
+    for k in range(3):
+        if jail_strategy == "pay":
+            # pay the fee, then roll like a player just visiting
+            table[("J", k)] = dict(table[(JAIL_SQUARE, 0)])
+            continue
+        row = {}
+        for a, b in DICE:
+            if a == b:
+                # escaping on doubles counts as a double, so the player rolls again
+                move(JAIL_SQUARE, a + b, 1, 1 / 36, row)
+            elif k < 2:
+                row[("J", k + 1)] = row.get(("J", k + 1), 0.0) + 1 / 36
+            else:
+                # third failure: pay and take a fresh roll from Just Visiting
+                row[(JAIL_SQUARE, 0)] = row.get((JAIL_SQUARE, 0), 0.0) + 1 / 36
+        table[("J", k)] = row
+    return table
+
+
+def _stationary(table: Dict[State, Dict[State, float]], tol: float = 1e-13) -> Dict[State, float]:
+    pi = {state: 0.0 for state in table}
+    pi[(0, 0)] = 1.0
+    for _ in range(20_000):
+        nxt = {state: 0.0 for state in table}
+        for state, p in pi.items():
+            if p:
+                for to, q in table[state].items():
+                    nxt[to] += p * q
+        # average with the previous step to damp any periodicity
+        nxt = {s: 0.5 * (nxt[s] + pi[s]) for s in table}
+        if sum(abs(nxt[s] - pi[s]) for s in table) < tol:
+            return nxt
+        pi = nxt
+    return pi
+
+
+def _rent_levels(index: BoardIndex, square: int) -> Dict[str, int]:
+    kind = index.types[square]
+    if kind == "Property":
+        levels = {"unimproved": index.rent(square, 0, 0), "monopoly": index.rent(square, 0, 1)}
+        for houses in range(1, 6):
+            levels[f"houses_{houses}"] = index.rent(square, houses, 1)
+        return levels
+    if kind == "Railroad":
+        return {f"owned_{n}": index.rent(square, 0, n) for n in range(1, len(index.railroads) + 1)}
+    # utilities are priced at the mean roll
+    return {f"owned_{n}": index.rent(square, 0, n, MEAN_ROLL) for n in range(1, len(index.utilities) + 1)}
+
+
+def solve(
+    index: BoardIndex,
+    chance_cards: Sequence[Dict[str, Any]],
+    community_cards: Sequence[Dict[str, Any]],
+    jail_strategy: str = "roll",
+) -> dict:
+    """Exact long-run landing probabilities per roll and the rent they are worth."""
+    decks = {"chance": chance_cards, "community": community_cards}
+    pi = _stationary(_transitions(index, decks, jail_strategy))
+
+    per_square = [0.0] * index.size
+    in_jail = 0.0
+    for state, p in pi.items():
+        if state[0] == "J":
+            in_jail += p
+        else:
+            per_square[state[0]] += p
+
+    squares: List[dict] = []
+    for sid in range(index.size):
+        entry = {
+            "id": sid,
+            "name": index.tiles[sid].name,
+            "type": index.types[sid],
+            "probability": per_square[sid],
+        }
+        if sid in index.purchasable:
+            entry["rent_per_roll"] = {
+                level: rent * per_square[sid] for level, rent in _rent_levels(index, sid).items()
+            }
+        squares.append(entry)
+    return {"jail_strategy": jail_strategy, "in_jail": in_jail, "squares": squares}
+
+
+_board_fingerprint: Dict[int, str] = {}
+_cache: Dict[Tuple[str, str], dict] = {}
+
+
+def fingerprint(
+    index: BoardIndex,
+    chance_cards: Sequence[Dict[str, Any]],
+    community_cards: Sequence[Dict[str, Any]],
+) -> str:
+    board = _board_fingerprint.get(id(index))
+    if board is None:
+        dumped = json.dumps({k: t.model_dump() for k, t in index.tiles.items()}, sort_keys=True)
+        board = _board_fingerprint[id(index)] = hashlib.sha1(dumped.encode()).hexdigest()
+    decks = json.dumps([list(chance_cards), list(community_cards)], sort_keys=True)
+    return hashlib.sha1((board + decks).encode()).hexdigest()
+
+
+def get_landing_odds(jail_strategy: str = "roll") -> dict:
+    """Cached solve for the live board and decks; recomputed only when either changes."""
+    key = fingerprint(BOARD_INDEX, CHANCE_CARDS, COMMUNITY_CHEST_CARDS)
+    if (key, jail_strategy) not in _cache:
+        if any(k != key for k, _ in _cache):
+            _cache.clear()
+        result = solve(BOARD_INDEX, CHANCE_CARDS, COMMUNITY_CHEST_CARDS, jail_strategy)
+        result["fingerprint"] = key
+        _cache[(key, jail_strategy)] = result
+    return _cache[(key, jail_strategy)]
@@ -0,0 +1,174 @@
+import logging
+import math
+import time
+from array import array
+from typing import Optional
+
+from app.config import (
+    LOGIN_IP_LIMIT,
+    LOGIN_SKETCH_BUCKETS,
+    LOGIN_SKETCH_DEPTH,
+    LOGIN_SKETCH_WIDTH,
+    LOGIN_THROTTLE_REDIS,
+    LOGIN_USER_LIMIT,
+    LOGIN_WINDOW,
+)
+from app.db.redis_pool import get_redis
+
+log = logging.getLogger(__name__)
+
+
+class SlidingWindowSketch:
+    """
+    Approximate per-key event counts over the last `window` seconds, in
+    fixed memory however many keys an attacker sprays.
+
+    The window is a ring of `buckets` count-min sketches (`depth` rows of
+    `width` counters); an event goes into the current bucket, a bucket is
+    zeroed when the ring comes back round to it, and a key's count is the
+    sum of its estimates over the ring. Estimates never undercount;
+    collisions can only overcount, by roughly events / width.
+    """
+
+    def __init__(
+        self,
+        window: float,
+        buckets: int = LOGIN_SKETCH_BUCKETS,
+        width: int = LOGIN_SKETCH_WIDTH,
+        depth: int = LOGIN_SKETCH_DEPTH,
+    ):
+        self.span = window / buckets
+        self.width = width
+        self.depth = depth
+        self._rings = [array("I", bytes(4 * width * depth)) for _ in range(buckets)]
+        self._epoch = 0  # index of the current bucket since the clock started
+
+    def _rotate(self, now: float):
+        epoch = int(now // self.span)
+        if epoch == self._epoch:
+            return
+        # Zero every bucket that fell out of the window, at most the whole ring
+        for e in range(max(self._epoch + 1, epoch - len(self._rings) + 1), epoch + 1):
+            ring = self._rings[e % len(self._rings)]
+            ring[:] = array("I", bytes(4 * len(ring)))
+        self._epoch = epoch
+
+    def _cells(self, key: str):
+        return [row * self.width + hash((row, key)) % self.width for row in range(self.depth)]
+
+    def add(self, key: str, now: Optional[float] = None):
+        self._rotate(time.time() if now is None else now)
+        ring = self._rings[self._epoch % len(self._rings)]
+        for cell in self._cells(key):
+            ring[cell] += 1
+
+    def count(self, key: str, now: Optional[float] = None) -> int:
+        self._rotate(time.time() if now is None else now)
+        cells = self._cells(key)
+        return sum(min(ring[cell] for cell in cells) for ring in self._rings)
+
+
+class LoginThrottle:
+    """
+    Caps how much bcrypt an attacker can make the server do.
+
+    Every attempt from an IP (logins, password changes and registrations
+    alike) counts against LOGIN_IP_LIMIT, and every failed attempt on a
+    username against LOGIN_USER_LIMIT, both over the last
+    LOGIN_WINDOW seconds. Past either, `check` refuses the attempt before
+    any password is looked at. Successful logins do not count against the
+    account, so its owner is only locked out while someone else is
+    guessing. Counts are kept in this worker's sketches, or in Redis when
+    LOGIN_THROTTLE_REDIS is set so every worker sees the same limits;
+    should Redis be unreachable, attempts are let through.
+    """
+
+    def __init__(self, window: float = LOGIN_WINDOW, use_redis: bool = LOGIN_THROTTLE_REDIS):
+        self.window = window
+        self.use_redis = use_redis
+        self.buckets = LOGIN_SKETCH_BUCKETS
+        self.span = window / self.buckets
+        if not use_redis:
+            self._ips = SlidingWindowSketch(window)
+            self._users = SlidingWindowSketch(window)
+        # metrics
+        self.allowed = 0
+        self.refused_ip = 0
+        self.refused_user = 0
+
+    def _retry_after(self) -> int:
+        return max(1, math.ceil(self.span))
+
+    async def check(self, username: Optional[str], ip: str) -> Optional[int]:
+        """
+        Records an attempt from `ip` and returns None if it may go ahead,
+        or the seconds to wait before retrying. Without a username (e.g. a
+        registration) only the IP limit applies.
+        """
+        if self.use_redis:
+            try:
+                ip_count, user_count = await self._redis_check(username, ip)
+            except Exception:
+                log.exception("Login throttle unavailable, letting attempt through")
+                return None
+        else:
+            self._ips.add(ip)
+            ip_count = self._ips.count(ip)
+            user_count = self._users.count(username) if username is not None else 0
+        if ip_count > LOGIN_IP_LIMIT:
+            self.refused_ip += 1
+            return self._retry_after()
+        if user_count >= LOGIN_USER_LIMIT:
+            self.refused_user += 1
+            return self._retry_after()
+        self.allowed += 1
+        return None
+
+    async def failed(self, username: str):
+        """Counts a wrong password, or an unknown username, against that name."""
+        if not self.use_redis:
+            self._users.add(username)
+            return
+        try:
+            key = self._key("user", username, int(time.time() // self.span))
+            async with get_redis().pipeline(transaction=False) as pipe:
+                pipe.incr(key)
+                pipe.expire(key, math.ceil(self.window + self.span))
+                await pipe.execute()
+        except Exception:
+            log.exception("Could not record failed login for %s", username)
+
+    # Redis mode: one expiring counter per key and bucket, summed over the window
+
+    @staticmethod
+    def _key(kind: str, name: str, epoch: int) -> str:
+        return f"login_throttle:{kind}:{name}:{epoch}"
+
+    async def _redis_check(self, username: Optional[str], ip: str):
+        epoch = int(time.time() // self.span)
+        epochs = range(epoch - self.buckets + 1, epoch + 1)
+        async with get_redis().pipeline(transaction=False) as pipe:
+            pipe.incr(self._key("ip", ip, epoch))
+            pipe.expire(self._key("ip", ip, epoch), math.ceil(self.window + self.span))
+            pipe.mget([self._key("ip", ip, e) for e in epochs])
+            if username is not None:
+                pipe.mget([self._key("user", username, e) for e in epochs])
+            _, _, ip_counts, *user_counts = await pipe.execute()
+        return (
+            sum(int(c) for c in ip_counts if c),
+            sum(int(c) for c in (user_counts[0] if user_counts else ()) if c),
+        )
+
+    def stats(self) -> dict:
+        return {
+            "mode": "redis" if self.use_redis else "memory",
+            "window_s": self.window,
+            "ip_limit": LOGIN_IP_LIMIT,
+            "user_limit": LOGIN_USER_LIMIT,
+            "allowed": self.allowed,
+            "refused_ip": self.refused_ip,
+            "refused_user": self.refused_user,
+        }
+
+
+login_throttle = LoginThrottle()
@@ -0,0 +1,250 @@
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+from app.config import MATCHMAKER_LEASE_TTL, RATING_DEFAULT, WORKER_ID, WORKER_TTL
+from app.db.redis_pool import get_redis
+from app.models.matchmaking import MatchGroup
+
+log = logging.getLogger(__name__)
+
+# Redis layout of the shared queue:
+#   mm_targets            SET of table sizes with a queue
+#   mm_queue:{target}     ZSET group id -> enqueue time
+#   mm_group:{group id}   HASH target, players ("1,2,3"), created_at, rating
+#   mm_user:{user id}     the group the user is queued in
+#   mm_socket:{user id}   worker holding the user's /ws/matchmaking socket
+#   mm_matcher            lease of the one worker allowed to match
+# Groups, users and sockets expire after ENTRY_TTL unless the worker holding the socket
+# keeps refreshing them (RedisMatchQueue.refresh), so a crashed worker's players leave
+# the queue instead of being seated in games they never hear about.
+TARGETS_KEY = "mm_targets"
+MATCHER_KEY = "mm_matcher"
+ENTRY_TTL = WORKER_TTL
+
+# Shared by the scripts below: removes a group and the user entries still pointing at it
+_DROP_GROUP = """
+local function drop(gid)
+    local g = redis.call('HMGET', 'mm_group:' .. gid, 'target', 'players')
+    if g[1] then
+        redis.call('ZREM', 'mm_queue:' .. g[1], gid)
+        for uid in string.gmatch(g[2], '[^,]+') do
+            if redis.call('GET', 'mm_user:' .. uid) == gid then
+                redis.call('DEL', 'mm_user:' .. uid)
+            end
+        end
+    end
+    redis.call('DEL', 'mm_group:' .. gid)
+end
+"""
+
+# ARGV: group id, target, created_at, players, rating, ttl ms, user ids... A user is queued
+# once; older parties go
+_ENQUEUE = _DROP_GROUP + """
+local gid, target, created, players, rating, ttl = ARGV[1], ARGV[2], ARGV[3], ARGV[4], ARGV[5], ARGV[6]
+for i = 7, #ARGV do
+    local old = redis.call('GET', 'mm_user:' .. ARGV[i])
+    if old then drop(old) end
+end
+redis.call('HSET', 'mm_group:' .. gid, 'target', target, 'players', players, 'created_at', created, 'rating', rating)
+redis.call('PEXPIRE', 'mm_group:' .. gid, ttl)
+redis.call('ZADD', 'mm_queue:' .. target, created, gid)
+redis.call('SADD', 'mm_targets', target)
+for i = 7, #ARGV do
+    redis.call('SET', 'mm_user:' .. ARGV[i], gid, 'PX', ttl)
+end
+return 1
+"""
+
+# ARGV: ttl ms, user ids whose socket we hold. Keeps their sockets and queued parties alive
+_REFRESH = """
+local ttl = ARGV[1]
+for i = 2, #ARGV do
+    redis.call('PEXPIRE', 'mm_socket:' .. ARGV[i], ttl)
+    local gid = redis.call('GET', 'mm_user:' .. ARGV[i])
+    if gid and redis.call('PEXPIRE', 'mm_group:' .. gid, ttl) == 1 then
+        local players = redis.call('HGET', 'mm_group:' .. gid, 'players')
+        for uid in string.gmatch(players, '[^,]+') do
+            if redis.call('GET', 'mm_user:' .. uid) == gid then
+                redis.call('PEXPIRE', 'mm_user:' .. uid, ttl)
+            end
+        end
+    end
+end
+return 1
+"""
+
+# ARGV: user id
+_LEAVE = _DROP_GROUP + """
+local gid = redis.call('GET', 'mm_user:' .. ARGV[1])
+if gid then drop(gid) end
+return gid
+"""
+
+# ARGV: group ids of one table. All or nothing: fails if any party left meanwhile
+_CLAIM = _DROP_GROUP + """
+for i = 1, #ARGV do
+    if redis.call('EXISTS', 'mm_group:' .. ARGV[i]) == 0 then
+        return 0
+    end
+end
+for i = 1, #ARGV do
+    drop(ARGV[i])
+end
+return 1
+"""
+
+# KEYS[1]: lease; ARGV: holder, ttl ms. Takes a free lease or extends our own
+_HOLD_LEASE = """
+local holder = redis.call('GET', KEYS[1])
+if holder == false then
+    redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+    return 1
+end
+if holder == ARGV[1] then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    return 1
+end
+return 0
+"""
+
+_RELEASE_LEASE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def notify_channel(worker_id: str) -> str:
+    return f"mm_notify:{worker_id}"
+
+
+def socket_key(user_id: int) -> str:
+    return f"mm_socket:{user_id}"
+
+
+class RedisMatchQueue:
+    """
+    The matchmaking queue shared by every worker, kept in Redis.
+
+    Any worker enqueues and removes parties; only the worker holding the
+    `mm_matcher` lease reads the queues and claims whole tables, each in one
+    atomic script so a party that just left is never seated.
+    """
+
+    def __init__(self, worker_id: str = WORKER_ID):
+        self.worker_id = worker_id
+
+    async def enqueue(self, group: MatchGroup):
+        await get_redis().eval(
+            _ENQUEUE,
+            0,
+            group.id,
+            group.target_size,
+            group.created_at,
+            ",".join(map(str, group.player_ids)),
+            group.rating,
+            int(ENTRY_TTL * 1000),
+            *group.player_ids,
+        )
+
+    async def leave(self, user_id: int):
+        await get_redis().eval(_LEAVE, 0, user_id)
+
+    async def refresh(self, user_ids: List[int]):
+        """Extends the sockets this worker holds, and the parties they queued, by ENTRY_TTL."""
+        if user_ids:
+            await get_redis().eval(_REFRESH, 0, int(ENTRY_TTL * 1000), *user_ids)
+
+    async def claim(self, tables: List[List[str]]) -> List[bool]:
+        """Atomically takes each table's groups off the queue; False where a party already left."""
+        async with get_redis().pipeline(transaction=False) as pipe:
+            for group_ids in tables:
+                pipe.eval(_CLAIM, 0, *group_ids)
+            results = await pipe.execute(raise_on_error=False)
+        return [result == 1 for result in results]
+
+    async def hold_matcher_lease(self) -> bool:
+        return bool(
+            await get_redis().eval(
+                _HOLD_LEASE, 1, MATCHER_KEY, self.worker_id, int(MATCHMAKER_LEASE_TTL * 1000)
+            )
+        )
+
+    async def release_matcher_lease(self):
+        await get_redis().eval(_RELEASE_LEASE, 1, MATCHER_KEY, self.worker_id)
+
+    async def load(self, known: Dict[str, MatchGroup]) -> Dict[str, MatchGroup]:
+        """
+        Every queued group, reusing the `known` objects and only fetching the
+        parties that joined since. Groups that expired are taken off the queue.
+        """
+        redis = get_redis()
+        targets = list(await redis.smembers(TARGETS_KEY))
+        async with redis.pipeline(transaction=False) as pipe:
+            for target in targets:
+                pipe.zrange(f"mm_queue:{target}", 0, -1)
+            queued = {
+                gid: target for target, ids in zip(targets, await pipe.execute()) for gid in ids
+            }
+            for gid in queued:
+                pipe.exists(f"mm_group:{gid}")
+            alive = await pipe.execute()
+
+        expired = [gid for gid, ok in zip(queued, alive) if not ok]
+        if expired:
+            async with redis.pipeline(transaction=False) as pipe:
+                for gid in expired:
+                    pipe.zrem(f"mm_queue:{queued.pop(gid)}", gid)
+                await pipe.execute()
+
+        groups = {gid: known[gid] for gid in queued if gid in known}
+        new = [gid for gid in queued if gid not in known]
+        if new:
+            async with redis.pipeline(transaction=False) as pipe:
+                for gid in new:
+                    pipe.hgetall(f"mm_group:{gid}")
+                for gid, fields in zip(new, await pipe.execute()):
+                    if fields:
+                        groups[gid] = MatchGroup.restore(
+                            gid,
+                            [int(p) for p in fields["players"].split(",")],
+                            int(fields["target"]),
+                            float(fields["created_at"]),
+                            float(fields.get("rating", RATING_DEFAULT)),
+                        )
+        return groups
+
+    # Sockets: which worker to send a player's match_found to
+
+    async def register_socket(self, user_id: int):
+        await get_redis().set(socket_key(user_id), self.worker_id, px=int(ENTRY_TTL * 1000))
+
+    async def unregister_socket(self, user_id: int):
+        redis = get_redis()
+        if await redis.get(socket_key(user_id)) == self.worker_id:
+            await redis.delete(socket_key(user_id))
+
+    async def notify(self, messages: Dict[int, Dict[str, Any]]):
+        """Publishes each user's message to the worker holding their socket."""
+        redis = get_redis()
+        user_ids = list(messages)
+        workers = await redis.mget([socket_key(user_id) for user_id in user_ids])
+        async with redis.pipeline(transaction=False) as pipe:
+            for user_id, worker in zip(user_ids, workers):
+                if worker:
+                    pipe.publish(
+                        notify_channel(worker),
+                        json.dumps({"user_id": user_id, "message": messages[user_id]}),
+                    )
+            await pipe.execute()
+
+    @staticmethod
+    def decode_notification(data: str) -> Optional[tuple]:
+        try:
+            note = json.loads(data)
+            return int(note["user_id"]), note["message"]
+        except (ValueError, KeyError, TypeError):
+            log.warning("Malformed matchmaking notification %r", data)
+            return None
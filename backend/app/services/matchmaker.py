@@ -1,79 +1,412 @@
 import asyncio
-from typing import List, Dict
-from app.models.lobby import Lobby
+import logging
+import math
+import time
+from collections import Counter, OrderedDict, deque
+from typing import Dict, List, Optional, Tuple
+
+from sortedcontainers import SortedList
+
+from app.config import (
+    MATCH_BAND_BASE,
+    MATCH_BAND_GROWTH,
+    MATCH_BAND_MAX,
+    MATCHMAKING_DISTRIBUTED,
+    MATCHMAKING_TICK,
+    WORKER_HEARTBEAT_INTERVAL,
+)
+from app.db.redis_pool import get_redis
 from app.models.gamesManager import getsManager
+from app.models.matchmaking import MatchGroup
+from app.services.match_queue import RedisMatchQueue, notify_channel
+from app.services.ratings import get_ratings, party_rating, rating_metrics
+
+log = logging.getLogger(__name__)
+
+
+# Table sizes players can queue for; nothing else is accepted or matched
+TABLE_SIZES = (2, 3, 4)
+
+
+def _partitions(total: int, largest: int) -> Tuple[Tuple[int, ...], ...]:
+    """Every way to write `total` as party sizes no bigger than `largest`, largest first."""
+    if total == 0:
+        return ((),)
+    return tuple(
+        (part,) + rest
+        for part in range(min(total, largest), 0, -1)
+        for rest in _partitions(total - part, part)
+    )
+
+
+# Party-size combinations that complete a table of each size around an anchor party of each size
+TABLE_FILLS: Dict[int, Dict[int, Tuple[Tuple[int, ...], ...]]] = {
+    target: {size: _partitions(target - size, target) for size in range(1, target + 1)}
+    for target in TABLE_SIZES
+}
+
+
+# How many of the closest-rated parties of each size a table is picked from
+BAND_CANDIDATES = 8
+
+
+def _summary(values) -> dict:
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 2),
+        "p50": round(ordered[len(ordered) // 2], 2),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+    }
 
 
 class Matchmaker:
-    def __init__(self):
-        self.queue: List[Lobby] = []
+    """
+    Queued parties, indexed by table size and party size.
+
+    Each `buckets[target][size]` keeps its groups oldest first, and every
+    queued user maps to their group, so joining and leaving are O(1);
+    `by_rating` holds the same groups in sorted lists by rating, which add
+    and remove in O(log n). A background tick
+    fills tables: oldest first, each group anchors a table, completed by the
+    exact combination of party sizes (2+1+1 as readily as 3+1) found by
+    range queries within the anchor's rating band, which widens as it waits.
+
+    Distributed, the queue itself lives in Redis (see RedisMatchQueue): any
+    worker queues parties there, the worker holding the matcher lease keeps
+    this index as a mirror of it and claims each table atomically, and
+    match_found goes out through the worker holding each player's socket.
+    """
+
+    def __init__(self, distributed: bool = MATCHMAKING_DISTRIBUTED):
+        self.distributed = distributed
+        self.shared = RedisMatchQueue() if distributed else None
+        self.is_matcher = False
+        self._pubsub = None
+        self._listener: asyncio.Task | None = None
+        self.buckets: Dict[int, Dict[int, "OrderedDict[str, MatchGroup]"]] = {}
+        self.groups: Dict[str, MatchGroup] = {}
+        self.by_user: Dict[int, str] = {}
+        # (rating, created_at, group id) per table and party size, sorted for range queries
+        self.by_rating: Dict[int, Dict[int, SortedList]] = {}
         self.connections = {}
+        self._task: asyncio.Task | None = None
+        # metrics
+        self.matches = 0
+        self.last_tick_ms = 0.0
+        # Seconds each matched party waited, and rating spread of each table, most recent last
+        self._waits: deque = deque(maxlen=1000)
+        self._spreads: deque = deque(maxlen=1000)
+
+    @property
+    def queue(self) -> List[MatchGroup]:
+        return list(self.groups.values())
+
+    def add_group(self, group: MatchGroup):
+        # A user is only ever queued once; re-joining replaces their old party
+        for user_id in group.player_ids:
+            self.remove_player(user_id, keep_connection=True)
+        self.buckets.setdefault(group.target_size, {}).setdefault(
+            group.size, OrderedDict()
+        )[group.id] = group
+        self.by_rating.setdefault(group.target_size, {}).setdefault(group.size, SortedList()).add(
+            (group.rating, group.created_at, group.id)
+        )
+        self.groups[group.id] = group
+        for user_id in group.player_ids:
+            self.by_user[user_id] = group.id
 
-    def add_group(self, group: Lobby):
-        self.queue.append(group)
+    def remove_group(self, group_id: str) -> Optional[MatchGroup]:
+        group = self.groups.pop(group_id, None)
+        if group is None:
+            return None
+        by_size = self.buckets[group.target_size]
+        del by_size[group.size][group.id]
+        if not by_size[group.size]:
+            del by_size[group.size]
+        self.by_rating[group.target_size][group.size].remove(
+            (group.rating, group.created_at, group.id)
+        )
+        for user_id in group.player_ids:
+            if self.by_user.get(user_id) == group_id:
+                del self.by_user[user_id]
+        return group
 
-    def remove_player(self, user_id: int):
+    def remove_player(self, user_id: int, keep_connection: bool = False):
         # Remove group if a player disconnects
-        self.queue = [g for g in self.queue if user_id not in g.player_ids]
-        self.connections.pop(user_id, None)
-    def get_group(self,lobby_id:str):
-        for i in self.queue:
-            if i.lobby_id ==lobby_id:
-                return i
-            else:
-                return None
-    def invite(self,user_id,friend_id):
-        for i in self.queue:
-            pass
-    async def check_and_start_matches(self):
-        """
-        Algorithm: Groups Lobbys together until target_size is hit.
-        """
-        if not self.queue:
-            return
+        if group_id := self.by_user.get(user_id):
+            self.remove_group(group_id)
+        if not keep_connection:
+            self.connections.pop(user_id, None)
+
+    # Entry points for the /ws/matchmaking handler
+
+    async def connect(self, user_id: int, ws):
+        self.connections[user_id] = ws
+        if self.distributed:
+            await self.shared.register_socket(user_id)
+
+    async def disconnect(self, user_id: int):
+        await self.leave(user_id)
+        if self.distributed:
+            await self.shared.unregister_socket(user_id)
+
+    async def join(self, group: MatchGroup):
+        """Queues a party. Raises ValueError for a table size we do not run or a party too big for it."""
+        if group.target_size not in TABLE_SIZES:
+            raise ValueError(f"game_size must be one of {', '.join(map(str, TABLE_SIZES))}")
+        if group.size > group.target_size:
+            raise ValueError(f"A party of {group.size} does not fit a table of {group.target_size}")
+        try:
+            ratings = await get_ratings(group.player_ids)
+        except Exception:
+            # Matching still works without Redis; the party counts as unrated
+            log.warning("Ratings unavailable; queueing party %s at the default rating", group.id)
+            ratings = {}
+        group.rating = party_rating(ratings.values())
+        if self.distributed:
+            await self.shared.enqueue(group)
+        else:
+            self.add_group(group)
+
+    async def leave(self, user_id: int):
+        if self.distributed:
+            await self.shared.leave(user_id)
+            self.connections.pop(user_id, None)
+        else:
+            self.remove_player(user_id)
 
-        # Simple greedy match for the same target_size
-        for target in [2, 3, 4]:
-            eligible = [g for g in self.queue if g.target_size == target]
+    def get_group(self, lobby_id: str) -> Optional[MatchGroup]:
+        return self.groups.get(lobby_id)
 
-            current_batch = []
-            count = 0
+    def invite(self,user_id,friend_id):
+        pass
+
+    @staticmethod
+    def band(group: MatchGroup, now: float) -> float:
+        """How far from its own rating a party accepts tablemates; widens while it waits."""
+        return min(MATCH_BAND_MAX, MATCH_BAND_BASE + MATCH_BAND_GROWTH * (now - group.created_at))
 
-            for group in eligible:
-                if count + group.size <= target:
-                    current_batch.append(group)
-                    count += group.size
+    def _in_band(self, target: int, size: int, anchor: MatchGroup, band: float) -> List[MatchGroup]:
+        """
+        Up to BAND_CANDIDATES groups of one party size rated within `band` of
+        the anchor, the closest ratings first, returned oldest first. Walks
+        outwards from the anchor's position, so the cost does not grow with
+        the queue.
+        """
+        index = self.by_rating.get(target, {}).get(size)
+        if not index:
+            return []
+        right = index.bisect_left((anchor.rating,))
+        left = right - 1
+        found = []
+        while len(found) < BAND_CANDIDATES:
+            below = anchor.rating - index[left][0] if left >= 0 else math.inf
+            above = index[right][0] - anchor.rating if right < len(index) else math.inf
+            if min(below, above) > band:
+                break
+            if below <= above:
+                gid, left = index[left][2], left - 1
+            else:
+                gid, right = index[right][2], right + 1
+            if gid != anchor.id:
+                found.append(self.groups[gid])
+        return sorted(found, key=lambda g: g.created_at)
 
-                if count == target:
-                    await self._trigger_game_start(current_batch)
-                    # Clean up queue
-                    for g in current_batch:
-                        self.queue.remove(g)
+    def _best_table(self, target: int, anchor: MatchGroup, now: float) -> Optional[List[MatchGroup]]:
+        """
+        The anchor plus the groups that fill its table exactly from within its
+        rating band: the combination whose youngest member has waited longest,
+        then the one with the smallest rating spread.
+        """
+        band = self.band(anchor, now)
+        windows: Dict[int, List[MatchGroup]] = {}
+        best, best_score = None, None
+        # A party too big for the table (queued before sizes were checked) never anchors one
+        for parts in TABLE_FILLS[target].get(anchor.size, ()):
+            table = [anchor]
+            for size, count in Counter(parts).items():
+                if size not in windows:
+                    windows[size] = self._in_band(target, size, anchor, band)
+                chosen = windows[size][:count]
+                if len(chosen) < count:
                     break
+                table.extend(chosen)
+            else:
+                ratings = [g.rating for g in table]
+                score = (max(g.created_at for g in table), max(ratings) - min(ratings))
+                if best is None or score < best_score:
+                    best, best_score = table, score
+        return best
+
+    def _match_target(self, target: int, now: float) -> List[List[MatchGroup]]:
+        tables = []
+        # Oldest first: each party gets the first pick of tablemates in its band
+        waiting = sorted(
+            (g for groups in self.buckets.get(target, {}).values() for g in groups.values()),
+            key=lambda g: g.created_at,
+        )
+        for anchor in waiting:
+            if anchor.id not in self.groups:
+                continue  # already seated this pass
+            table = self._best_table(target, anchor, now)
+            if table is None:
+                continue
+            for group in table:
+                self.remove_group(group.id)
+            tables.append(table)
+        return tables
 
-    async def _trigger_game_start(self, groups: List[Lobby]):
-        all_player_ids: list[int] = []
+    def _record_quality(self, tables: List[List[MatchGroup]], now: float):
+        for table in tables:
+            ratings = [g.rating for g in table]
+            self._spreads.append(max(ratings) - min(ratings))
+            self._waits.extend(now - g.created_at for g in table)
 
-        for g in groups:
+    async def check_and_start_matches(self):
+        """One matching pass over every table size; run by the background tick."""
+        if self.distributed and not await self._sync_shared_queue():
+            return
+        started, now = time.perf_counter(), time.time()
+        tables = [table for target in TABLE_SIZES for table in self._match_target(target, now)]
+        self.last_tick_ms = (time.perf_counter() - started) * 1000
+        if tables and self.distributed:
+            # Another worker's leave may have raced this pass; those tables wait for the next one
+            claimed = await self.shared.claim([[g.id for g in table] for table in tables])
+            tables = [table for table, ok in zip(tables, claimed) if ok]
+        if tables:
+            self._record_quality(tables, now)
+            await self._trigger_game_start(tables)
 
-            all_player_ids.extend(g.player_ids)
+    async def _sync_shared_queue(self) -> bool:
+        """Matcher only: brings the local index in line with Redis. False on other workers."""
+        if not await self.shared.hold_matcher_lease():
+            if self.is_matcher:
+                log.info("Gave up the matchmaker lease")
+                self.is_matcher = False
+                self.buckets, self.groups, self.by_user, self.by_rating = {}, {}, {}, {}
+            return False
+        self.is_matcher = True
+        queued = await self.shared.load(self.groups)
+        for group_id in [gid for gid in self.groups if gid not in queued]:
+            self.remove_group(group_id)
+        for group_id, group in queued.items():
+            if group_id not in self.groups:
+                self.add_group(group)
+        return True
 
+    async def _trigger_game_start(self, tables: List[List[MatchGroup]]):
         # DELEGATION: Let the GameManager handle the Monopoly logic
         manager = getsManager()
-        game = manager.create_game(all_player_ids)
-        manager.save_game_to_redis(game)  # Persist the game state to Redis
-        # manager.save_game_to_redis(game)
-        print(list(game.get_players().items()))
-        # Notify everyone
-        for p_id in all_player_ids:
-            if p_id in self.connections:
-                await self.connections[p_id].send_json(
-                    {
+        games = []
+        for groups in tables:
+            all_player_ids: list[int] = [p for g in groups for p in g.player_ids]
+            game = await manager.create_game(all_player_ids)
+            manager.save_game(game)
+            games.append((game, all_player_ids))
+        # Make sure the games are in Redis before anyone is sent to them
+        await manager.persister.flush()
+        self.matches += len(games)
+
+        # Notify everyone; players whose socket is on another worker get it through that worker
+        remote = {}
+        for game, all_player_ids in games:
+            players = list(game.get_players().items())
+            for p_id in all_player_ids:
+                if p_id not in self.connections and self.distributed:
+                    remote[p_id] = {
                         "action": "match_found",
                         "game_id": str(game.id),
-                        "players": list(game.get_players().items()),
+                        "players": players,
                     }
-                )
+                elif p_id in self.connections:
+                    try:
+                        await self.connections[p_id].send_json(
+                            {
+                                "action": "match_found",
+                                "game_id": str(game.id),
+                                "players": players,
+                            }
+                        )
+                    except Exception:
+                        log.warning("Could not notify player %s of game %s", p_id, game.id)
+        if remote:
+            await self.shared.notify(remote)
+
+    async def _run(self):
+        refreshed = time.monotonic()
+        while True:
+            await asyncio.sleep(MATCHMAKING_TICK)
+            if self.distributed and time.monotonic() - refreshed >= WORKER_HEARTBEAT_INTERVAL:
+                # Our sockets' queue entries expire unless we keep renewing them
+                try:
+                    await self.shared.refresh(list(self.connections))
+                    refreshed = time.monotonic()
+                except Exception:
+                    log.exception("Refreshing matchmaking entries failed")
+            try:
+                await self.check_and_start_matches()
+            except Exception:
+                log.exception("Matchmaking tick failed")
+
+    async def _listen(self):
+        """match_found for players whose socket is on this worker, sent by the matcher."""
+        while True:
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is None:
+                    continue
+                note = self.shared.decode_notification(message["data"])
+                if note and (ws := self.connections.get(note[0])):
+                    await ws.send_json(note[1])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception("Matchmaking notification failed")
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        if self.distributed and self._listener is None:
+            self._pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+            await self._pubsub.subscribe(notify_channel(self.shared.worker_id))
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        for task in (self._task, self._listener):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._listener = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        if self.is_matcher:
+            # Let another worker take over matching right away
+            await self.shared.release_matcher_lease()
+            self.is_matcher = False
+
+    def stats(self) -> dict:
+        return {
+            "queued_groups": len(self.groups),
+            "queued_players": len(self.by_user),
+            "by_target": {
+                target: {size: len(groups) for size, groups in by_size.items()}
+                for target, by_size in self.buckets.items()
+            },
+            "distributed": self.distributed,
+            "is_matcher": self.is_matcher,
+            "matches": self.matches,
+            "last_tick_ms": round(self.last_tick_ms, 3),
+            "wait_seconds": _summary(self._waits),
+            "rating_spread": _summary(self._spreads),
+            **rating_metrics(),
+        }
 
 
 # Global Instance
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+import bcrypt
+
+from app.config import BCRYPT_ROUNDS, PASSWORD_QUEUE_LIMIT, PASSWORD_WORKERS
+
+log = logging.getLogger(__name__)
+
+
+class PasswordPoolBusy(Exception):
+    """Too many password operations are already waiting; the caller should answer 503."""
+
+
+def hash_password(password: str, rounds: int = BCRYPT_ROUNDS) -> str:
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds)).decode()
+
+
+def check_password(password: str, hashed: str) -> bool:
+    return bcrypt.checkpw(password.encode(), hashed.encode())
+
+
+def needs_rehash(hashed: str, rounds: int = BCRYPT_ROUNDS) -> bool:
+    """Whether a stored hash ("$2b$<cost>$...") was made with a different cost than configured."""
+    try:
+        return int(hashed.split("$")[2]) != rounds
+    except (IndexError, ValueError):
+        return True
+
+
+class PasswordPool:
+    """
+    The threads bcrypt runs on, off the event loop.
+
+    bcrypt releases the GIL, so PASSWORD_WORKERS hashes run in parallel
+    while the loop keeps serving game sockets. At most PASSWORD_QUEUE_LIMIT
+    operations may be running or waiting; past that, callers get
+    PasswordPoolBusy at once instead of queueing behind a login burst. An
+    operation counts until its thread finishes, even if the request that
+    asked for it went away.
+    """
+
+    def __init__(self, workers: int = PASSWORD_WORKERS, max_pending: int = PASSWORD_QUEUE_LIMIT):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: ThreadPoolExecutor | None = None
+        self.pending = 0
+        # metrics
+        self.completed = 0
+        self.rejected = 0
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordPoolBusy()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="bcrypt")
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(lambda _: self._finished(loop))
+        return await asyncio.wrap_future(future)
+
+    def _finished(self, loop: asyncio.AbstractEventLoop):
+        # Runs on the bcrypt thread; after shutdown the loop may already be closed
+        if loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(self._done)
+        except RuntimeError:
+            pass  # closed between the check and the call
+
+    def _done(self):
+        self.pending -= 1
+        self.completed += 1
+
+    async def hash(self, password: str) -> str:
+        return await self.run(hash_password, password)
+
+    async def check(self, password: str, hashed: str) -> bool:
+        return await self.run(check_password, password, hashed)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "rounds": BCRYPT_ROUNDS,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+password_pool = PasswordPool()
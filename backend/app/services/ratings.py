@@ -0,0 +1,72 @@
+import logging
+from typing import Dict, Iterable, List
+
+from app.config import RATING_DEFAULT, RATING_K
+from app.db.redis_pool import get_redis
+
+log = logging.getLogger(__name__)
+
+RATINGS_KEY = "player_ratings"  # HASH user id -> Elo rating
+RATED_GAMES_KEY = "player_rated_games"  # HASH user id -> number of rated games
+
+# metrics
+_totals = {"games_rated": 0, "rating_change_total": 0.0}
+
+
+async def get_ratings(user_ids: Iterable[int]) -> Dict[int, float]:
+    user_ids = list(user_ids)
+    if not user_ids:
+        return {}
+    values = await get_redis().hmget(RATINGS_KEY, user_ids)
+    return {uid: float(v) if v is not None else RATING_DEFAULT for uid, v in zip(user_ids, values)}
+
+
+def party_rating(ratings: Iterable[float]) -> float:
+    """A party is matched on its members' mean rating."""
+    ratings = list(ratings)
+    return sum(ratings) / len(ratings) if ratings else RATING_DEFAULT
+
+
+def elo_updates(ratings: Dict[int, float], winner: int, k: float = RATING_K) -> Dict[int, float]:
+    """
+    New ratings after a game `winner` won: scored as the winner beating
+    every other player once, with K split across those pairings so a game
+    moves a rating about as much as one head-to-head result.
+    """
+    losers = [uid for uid in ratings if uid != winner]
+    if winner not in ratings or not losers:
+        return dict(ratings)
+    pair_k = k / len(losers)
+    new = dict(ratings)
+    for loser in losers:
+        expected = 1 / (1 + 10 ** ((ratings[loser] - ratings[winner]) / 400))
+        delta = pair_k * (1 - expected)
+        new[winner] += delta
+        new[loser] -= delta
+    return new
+
+
+async def record_result(game_id, user_ids: List[int], winner: int) -> Dict[int, float]:
+    """Applies a finished game to its players' ratings once, however often it is reported."""
+    redis = get_redis()
+    if not await redis.set(f"rated_game:{game_id}", winner, nx=True, ex=7 * 24 * 3600):
+        return {}
+    ratings = await get_ratings(user_ids)
+    new = elo_updates(ratings, winner)
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.hset(RATINGS_KEY, mapping={uid: round(r, 2) for uid, r in new.items()})
+        for uid in new:
+            pipe.hincrby(RATED_GAMES_KEY, uid, 1)
+        await pipe.execute()
+    _totals["games_rated"] += 1
+    _totals["rating_change_total"] += abs(new[winner] - ratings[winner])
+    log.info("Rated game %s: %s", game_id, {uid: round(new[uid] - ratings[uid], 1) for uid in new})
+    return new
+
+
+def rating_metrics() -> dict:
+    rated = _totals["games_rated"]
+    return {
+        "games_rated": rated,
+        "mean_winner_gain": round(_totals["rating_change_total"] / rated, 2) if rated else 0.0,
+    }
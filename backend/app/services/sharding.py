@@ -0,0 +1,265 @@
+import asyncio
+import hashlib
+import itertools
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from fastapi.responses import RedirectResponse
+
+from app.config import (
+    GAME_LEASE_TTL,
+    SHARDING_ENABLED,
+    WORKER_HEARTBEAT_INTERVAL,
+    WORKER_ID,
+    WORKER_TTL,
+    WORKER_URL,
+)
+from app.db.redis_pool import get_redis
+from app.models.RedisGameStore import RedisGameStore
+
+log = logging.getLogger(__name__)
+
+WORKERS_KEY = "workers"  # ZSET worker id -> last heartbeat (unix time)
+WORKER_URLS_KEY = "worker_urls"  # HASH worker id -> base URL clients can reach it on
+
+# Close code sent with a redirect to the owning worker
+REDIRECT_CLOSE_CODE = 4307
+
+# Extends every lease we still hold; returns the keys we no longer own
+_RENEW_LEASES = """
+local lost = {}
+for i, key in ipairs(KEYS) do
+    if redis.call('GET', key) == ARGV[1] then
+        redis.call('PEXPIRE', key, ARGV[2])
+    else
+        table.insert(lost, key)
+    end
+end
+return lost
+"""
+
+# Deletes a lease only if we are the holder
+_RELEASE_LEASE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Runs one game's queued writes only while we still hold its lease
+_FENCED_WRITE = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return redis.error_reply('LEASE_LOST ' .. KEYS[1])
+end
+local failed = false
+for _, command in ipairs(cjson.decode(ARGV[2])) do
+    local reply = redis.pcall(unpack(command))
+    -- an action already in the stream from an earlier, partly failed write
+    if type(reply) == 'table' and reply.err and not string.find(reply.err, 'equal or smaller', 1, true) then
+        failed = reply
+    end
+end
+if failed then
+    return failed
+end
+return 1
+"""
+
+
+class ShardUnavailable(Exception):
+    """The game's owner is gone but its lease has not expired yet; retry shortly."""
+
+
+def lease_key(game_id: Any) -> str:
+    return f"game_owner:{game_id}"
+
+
+def lease_lost(result: Any) -> bool:
+    """Whether a fenced write was refused because another worker holds the lease now."""
+    return isinstance(result, Exception) and "LEASE_LOST" in str(result)
+
+
+class FencedWrites:
+    """
+    Stands in for a pipeline while one game's writes are queued, so they go
+    out as a single script that only runs while this worker holds the game's
+    lease. Covers the commands the game store and event log use.
+    """
+
+    def __init__(self):
+        self.commands: List[List[str]] = []
+
+    def _add(self, *args):
+        self.commands.append([str(arg) for arg in args])
+
+    def xadd(self, name, fields, id="*", maxlen=None, approximate=True):
+        trim = ["MAXLEN", "~" if approximate else "=", maxlen] if maxlen is not None else []
+        self._add("XADD", name, *trim, id, *itertools.chain.from_iterable(fields.items()))
+
+    def hset(self, name, mapping):
+        self._add("HSET", name, *itertools.chain.from_iterable(mapping.items()))
+
+    def hdel(self, name, *keys):
+        self._add("HDEL", name, *keys)
+
+
+def rendezvous(game_id: Any, worker_ids: Iterable[str]) -> str:
+    """Highest-random-weight pick: stable per game, and only games of a departed worker move."""
+    key = str(game_id).encode()
+    return max(worker_ids, key=lambda w: hashlib.blake2b(key + b"|" + w.encode(), digest_size=8).digest())
+
+
+class ShardRouter:
+    """
+    Decides which worker owns a game, so only one process ever holds it in memory.
+
+    Workers heartbeat into a Redis registry. A game belongs to whoever holds
+    its `game_owner:{id}` lease. Unowned games go to the rendezvous-hash pick
+    among live workers, which takes the lease on first access; leases are
+    renewed with each heartbeat while the game stays resident. With sharding
+    disabled every game is local.
+    """
+
+    def __init__(
+        self,
+        worker_id: str = WORKER_ID,
+        worker_url: str = WORKER_URL,
+        enabled: bool = SHARDING_ENABLED,
+    ):
+        self.worker_id = worker_id
+        self.worker_url = worker_url
+        self.enabled = enabled
+        self._task: asyncio.Task | None = None
+
+    async def live_workers(self) -> Dict[str, str]:
+        redis = get_redis()
+        alive = await redis.zrangebyscore(WORKERS_KEY, time.time() - WORKER_TTL, "+inf")
+        if not alive:
+            return {}
+        urls = await redis.hmget(WORKER_URLS_KEY, alive)
+        return {w: url for w, url in zip(alive, urls) if url}
+
+    async def owner_url(self, game_id: Any) -> Optional[str]:
+        """
+        None if this worker owns (or has just claimed) the game, else the base
+        URL of the worker that does. Raises ShardUnavailable while ownership
+        is in flux.
+        """
+        owner = await self.locate(game_id)
+        return owner[1] if owner else None
+
+    async def owner(self, game_id: Any) -> Optional[str]:
+        """Like `owner_url`, but the owning worker's id."""
+        owner = await self.locate(game_id)
+        return owner[0] if owner else None
+
+    async def locate(self, game_id: Any) -> Optional[Tuple[str, str]]:
+        """`(worker_id, url)` of the game's owner, or None if that is this worker."""
+        if not self.enabled:
+            return None
+        redis = get_redis()
+        holder = await redis.get(lease_key(game_id))
+        if holder == self.worker_id:
+            return None
+        workers = await self.live_workers()
+        if holder is not None:
+            if holder in workers:
+                return holder, workers[holder]
+            raise ShardUnavailable(f"Owner {holder} of game {game_id} stopped responding")
+
+        workers.setdefault(self.worker_id, self.worker_url)
+        target = rendezvous(game_id, workers)
+        if target != self.worker_id:
+            return target, workers[target]
+        if not await RedisGameStore.exists(game_id):
+            # Nothing to own; the caller answers "not found" without leaving a lease behind
+            return None
+        if await self.claim(game_id):
+            return None
+        # Lost a race for the lease; whoever won owns it now
+        holder = await redis.get(lease_key(game_id))
+        if holder in workers:
+            return holder, workers[holder]
+        raise ShardUnavailable(f"Game {game_id} is changing owner")
+
+    async def claim(self, game_id: Any) -> bool:
+        """Takes the lease on an unowned game (e.g. one this worker just created)."""
+        if not self.enabled:
+            return True
+        return bool(
+            await get_redis().set(
+                lease_key(game_id), self.worker_id, nx=True, px=int(GAME_LEASE_TTL * 1000)
+            )
+        )
+
+    async def release(self, game_ids: Iterable[Any]):
+        if not self.enabled:
+            return
+        redis = get_redis()
+        for game_id in game_ids:
+            await redis.eval(_RELEASE_LEASE, 1, lease_key(game_id), self.worker_id)
+
+    def fenced_write(self, pipe, game_id: Any, writes: FencedWrites):
+        """Queues `writes` on a pipeline; they are refused with LEASE_LOST if the game moved."""
+        pipe.eval(_FENCED_WRITE, 1, lease_key(game_id), self.worker_id, json.dumps(writes.commands))
+
+    async def heartbeat(self, resident: Iterable[Any]) -> list:
+        """Refreshes this worker's registry entry and leases; returns game ids whose lease was lost."""
+        redis = get_redis()
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.zadd(WORKERS_KEY, {self.worker_id: time.time()})
+            pipe.hset(WORKER_URLS_KEY, self.worker_id, self.worker_url)
+            await pipe.execute()
+        by_key = {lease_key(gid): gid for gid in resident}
+        if not by_key:
+            return []
+        lost = await redis.eval(
+            _RENEW_LEASES, len(by_key), *by_key, self.worker_id, int(GAME_LEASE_TTL * 1000)
+        )
+        return [by_key[key] for key in lost]
+
+    async def _run(self, resident: Callable[[], Iterable[Any]], on_lost: Callable[[Any], Awaitable]):
+        while True:
+            try:
+                for game_id in await self.heartbeat(list(resident())):
+                    log.warning("Lost ownership of game %s", game_id)
+                    await on_lost(game_id)
+            except Exception:
+                log.exception("Shard heartbeat failed")
+            await asyncio.sleep(WORKER_HEARTBEAT_INTERVAL)
+
+    def start(self, resident: Callable[[], Iterable[Any]], on_lost: Callable[[Any], Awaitable]):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run(resident, on_lost))
+
+    async def stop(self, resident: Iterable[Any]):
+        """Leaves the registry and hands back every lease (after games were flushed)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.enabled:
+            await self.release(resident)
+            redis = get_redis()
+            await redis.zrem(WORKERS_KEY, self.worker_id)
+            await redis.hdel(WORKER_URLS_KEY, self.worker_id)
+
+
+async def redirect_to_owner(router: ShardRouter, request: Request, game_id: Any) -> Optional[RedirectResponse]:
+    """For HTTP routes: a 307 to the owning worker, or None to handle the request here."""
+    try:
+        owner = await router.owner_url(game_id)
+    except ShardUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if owner is None:
+        return None
+    url = owner.rstrip("/") + request.url.path
+    if request.url.query:
+        url += "?" + request.url.query
+    return RedirectResponse(url, status_code=307)
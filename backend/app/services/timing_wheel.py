@@ -0,0 +1,87 @@
+import asyncio
+import logging
+import math
+import time
+from typing import Any, Callable, Dict, List
+
+from app.config import TIMER_SLOTS, TIMER_TICK
+
+log = logging.getLogger(__name__)
+
+
+class TimingWheel:
+    """
+    Hashed timing wheel holding every per-game deadline of this worker.
+
+    A deadline lives in the slot its expiry tick hashes to, with the number
+    of full turns of the wheel still to wait, so scheduling and cancelling
+    are O(1) dict operations and one task advances the wheel every TIMER_TICK
+    seconds no matter how many games are running. Deadlines fire up to one
+    tick late. Callbacks are plain functions and must not block.
+    """
+
+    def __init__(self, tick: float = TIMER_TICK, slots: int = TIMER_SLOTS):
+        self.tick = tick
+        self._slots: List[Dict[Any, list]] = [{} for _ in range(slots)]
+        # key -> slot index, for O(1) cancel
+        self._where: Dict[Any, int] = {}
+        self._cursor = 0
+        self._task: asyncio.Task | None = None
+        self.fired = 0
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def schedule(self, key: Any, delay: float, callback: Callable[[], Any]):
+        """(Re)sets the deadline for `key`; any earlier one for the same key is dropped."""
+        self.cancel(key)
+        ticks = max(1, math.ceil(delay / self.tick))
+        slot = (self._cursor + ticks) % len(self._slots)
+        self._slots[slot][key] = [(ticks - 1) // len(self._slots), callback]
+        self._where[key] = slot
+
+    def cancel(self, key: Any):
+        slot = self._where.pop(key, None)
+        if slot is not None:
+            del self._slots[slot][key]
+
+    def advance(self):
+        """Moves the wheel one tick and fires what expired."""
+        self._cursor = (self._cursor + 1) % len(self._slots)
+        bucket = self._slots[self._cursor]
+        due = []
+        for key, entry in list(bucket.items()):
+            if entry[0] == 0:
+                due.append(entry[1])
+                del bucket[key]
+                del self._where[key]
+            else:
+                entry[0] -= 1
+        for callback in due:
+            self.fired += 1
+            try:
+                callback()
+            except Exception:
+                log.exception("Timer callback failed")
+
+    async def _run(self):
+        next_tick = time.monotonic() + self.tick
+        while True:
+            await asyncio.sleep(max(0.0, next_tick - time.monotonic()))
+            # Catch up on ticks missed while the loop was busy
+            while next_tick <= time.monotonic():
+                self.advance()
+                next_tick += self.tick
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,88 @@
+import json
+import zlib
+from typing import Any, Dict, Optional, Union
+
+import msgpack
+import orjson
+from fastapi import WebSocket, WebSocketDisconnect
+
+from app.config import WS_COMPRESS_LEVEL, WS_COMPRESS_MIN_BYTES
+
+# Per-recipient additions to the shared state message that precedes them
+OVERLAY_TYPE = "state_overlay"
+
+JSON = "json"
+MSGPACK = "msgpack"
+
+# First byte of every binary frame: how the MessagePack body that follows is stored
+FLAG_PLAIN = 0
+FLAG_DEFLATE = 1
+
+Frame = Union[str, bytes]
+
+
+def negotiate(requested: Optional[str]) -> str:
+    """
+    Wire encoding for a new socket, from its `?encoding=` query parameter.
+
+    JSON (text frames) is the default. MessagePack (binary frames) is only
+    used when asked for, so clients can tell which they got from the frame
+    type alone.
+    """
+    if requested == MSGPACK:
+        return MSGPACK
+    return JSON
+
+
+def encode_message(message: Dict[str, Any]) -> str:
+    """Serializes an outbound message to the JSON text sent on the wire."""
+    # int keys (e.g. mutable_properties) become strings, as json.dumps does
+    return orjson.dumps(message, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def encode_frame(message: Dict[str, Any], encoding: str) -> Frame:
+    """
+    Encodes a message for the given wire encoding. MessagePack frames are a
+    flag byte plus the body, raw-deflated once the body reaches
+    WS_COMPRESS_MIN_BYTES (full state snapshots, mostly).
+    """
+    if encoding != MSGPACK:
+        return encode_message(message)
+    body = msgpack.packb(message, use_bin_type=True)
+    if len(body) < WS_COMPRESS_MIN_BYTES:
+        return bytes((FLAG_PLAIN,)) + body
+    deflate = zlib.compressobj(WS_COMPRESS_LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return bytes((FLAG_DEFLATE,)) + deflate.compress(body) + deflate.flush()
+
+
+def decode_frame(data: Frame) -> Any:
+    """
+    Decodes a client frame; text is JSON, bytes are flagged MessagePack.
+
+    Only the server deflates. Client messages are small, and inflating them
+    would let a few KB of input expand to gigabytes, so deflated frames are
+    refused like any unknown flag.
+    """
+    if isinstance(data, str):
+        return json.loads(data)
+    if not data:
+        raise ValueError("Empty binary frame")
+    flag, body = data[0], data[1:]
+    if flag != FLAG_PLAIN:
+        raise ValueError(f"Unsupported frame flag {flag}")
+    return msgpack.unpackb(body, raw=False, strict_map_key=False)
+
+
+async def receive_message(ws: WebSocket) -> Any:
+    """`ws.receive_json()` that also accepts binary MessagePack frames."""
+    message = await ws.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+    if message.get("text") is not None:
+        return decode_frame(message["text"])
+    return decode_frame(message["bytes"])
+
+
+def is_state_update(message: Dict[str, Any]) -> bool:
+    """Full-state messages supersede each other, so older ones may be skipped."""
+    return "state" in message and message.get("type") != OVERLAY_TYPE
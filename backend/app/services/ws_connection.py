@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import time
+import weakref
+from collections import deque
+from typing import Any, Deque, Dict, Tuple
+
+from fastapi import WebSocket
+
+from app.config import WS_OVERFLOW_POLICY, WS_SEND_QUEUE_SIZE, WS_SEND_TIMEOUT
+from app.services.ws_codec import JSON, Frame, encode_frame, is_state_update
+
+log = logging.getLogger(__name__)
+
+# Close code for clients that cannot keep up ("try again later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+_live: "weakref.WeakSet[GameConnection]" = weakref.WeakSet()
+# Counters folded in from connections that have already closed
+_totals = {"sent": 0, "dropped": 0, "evicted": 0, "latency_sum": 0.0, "latency_max": 0.0}
+
+
+class GameConnection:
+    """
+    One player's websocket with a bounded outbound queue drained by its own
+    writer task, so `send` never waits on the socket. Messages are encoded
+    when queued, so what the client receives is the state at send time.
+
+    When the queue is full the overflow policy applies: "drop_stale" discards
+    queued full-state updates that a newer one supersedes, "disconnect" closes
+    the socket. A send that stalls longer than WS_SEND_TIMEOUT also closes it.
+    """
+
+    def __init__(
+        self,
+        ws: WebSocket,
+        player_id: int,
+        encoding: str = JSON,
+        max_queue: int = WS_SEND_QUEUE_SIZE,
+        overflow_policy: str = WS_OVERFLOW_POLICY,
+        send_timeout: float = WS_SEND_TIMEOUT,
+    ):
+        self.ws = ws
+        self.player_id = player_id
+        self.encoding = encoding
+        self.max_queue = max_queue
+        self.overflow_policy = overflow_policy
+        self.send_timeout = send_timeout
+        self.closed = False
+        # (encoded frame, is full-state update, time queued)
+        self._queue: Deque[Tuple[Frame, bool, float]] = deque()
+        self._ready = asyncio.Event()
+        self._writer: asyncio.Task | None = None
+        # Close started from send_frame, which cannot await it; kept so it is not collected
+        self._closing: asyncio.Task | None = None
+        # metrics
+        self.sent = 0
+        self.dropped = 0
+        self.evicted = False
+        self.max_depth = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        _live.add(self)
+
+    def start(self) -> "GameConnection":
+        self._writer = asyncio.create_task(self._drain())
+        return self
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def send(self, message: Dict[str, Any]):
+        """Queues a message for this client; never blocks."""
+        if not self.closed:
+            self.send_frame(encode_frame(message, self.encoding), is_state_update(message))
+
+    def send_frame(self, frame: Frame, is_state: bool):
+        """Queues an already encoded message, e.g. one broadcast to the whole table."""
+        if self.closed:
+            return
+        if len(self._queue) >= self.max_queue and not self._make_room(is_state):
+            if self._closing is None:
+                log.warning("Player %s cannot keep up with the game; disconnecting", self.player_id)
+                self.evicted = True
+                self._closing = asyncio.ensure_future(self.close(SLOW_CONSUMER_CLOSE_CODE))
+            return
+        self._queue.append((frame, is_state, time.perf_counter()))
+        self.max_depth = max(self.max_depth, len(self._queue))
+        self._ready.set()
+
+    async def send_json(self, message: Dict[str, Any]):
+        # Drop-in for WebSocket.send_json at existing call sites
+        self.send(message)
+
+    def _make_room(self, incoming_is_state: bool) -> bool:
+        if self.overflow_policy != "drop_stale":
+            return False
+        # Keep only the newest full state; the incoming one counts if it has state
+        keep_last = not incoming_is_state
+        kept: Deque[Tuple[Frame, bool, float]] = deque()
+        for item in reversed(self._queue):
+            if item[1]:
+                if not keep_last:
+                    self.dropped += 1
+                    continue
+                keep_last = False
+            kept.appendleft(item)
+        self._queue = kept
+        return len(self._queue) < self.max_queue
+
+    async def _drain(self):
+        try:
+            while not self.closed:
+                if not self._queue:
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+                frame, _, queued_at = self._queue.popleft()
+                if isinstance(frame, bytes):
+                    await asyncio.wait_for(self.ws.send_bytes(frame), self.send_timeout)
+                else:
+                    await asyncio.wait_for(self.ws.send_text(frame), self.send_timeout)
+                latency = time.perf_counter() - queued_at
+                self.sent += 1
+                self.latency_sum += latency
+                self.latency_max = max(self.latency_max, latency)
+        except asyncio.TimeoutError:
+            log.warning("Send to player %s stalled; disconnecting", self.player_id)
+            self.evicted = True
+            await self.close(SLOW_CONSUMER_CLOSE_CODE)
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            # The socket went away; the reader side handles the disconnect
+            pass
+        finally:
+            # Nothing sends on this connection any more, however the writer ended
+            self.closed = True
+            self._queue.clear()
+            _retire(self)
+
+    async def close(self, code: int = 1000):
+        if self.closed and self._writer is None:
+            return
+        self.closed = True
+        self._queue.clear()
+        writer, self._writer = self._writer, None
+        if writer is not None and writer is not asyncio.current_task():
+            writer.cancel()
+        try:
+            await self.ws.close(code=code)
+        except Exception:
+            pass
+        _retire(self)
+
+
+def _retire(conn: GameConnection):
+    if conn not in _live:
+        return
+    _live.discard(conn)
+    _totals["sent"] += conn.sent
+    _totals["dropped"] += conn.dropped
+    _totals["evicted"] += int(conn.evicted)
+    _totals["latency_sum"] += conn.latency_sum
+    _totals["latency_max"] = max(_totals["latency_max"], conn.latency_max)
+
+
+def connection_metrics() -> dict:
+    """Queue depth and send latency across this worker's game sockets."""
+    live = list(_live)
+    sent = _totals["sent"] + sum(c.sent for c in live)
+    latency_sum = _totals["latency_sum"] + sum(c.latency_sum for c in live)
+    latency_max = max([_totals["latency_max"], *(c.latency_max for c in live)])
+    return {
+        "connections": len(live),
+        "queue_depth": sum(c.depth for c in live),
+        "queue_depth_max": max((c.depth for c in live), default=0),
+        "queue_high_water": max((c.max_depth for c in live), default=0),
+        "sent": sent,
+        "dropped": _totals["dropped"] + sum(c.dropped for c in live),
+        "evicted": _totals["evicted"] + sum(int(c.evicted) for c in live),
+        "send_latency_avg_ms": 1000 * latency_sum / sent if sent else 0.0,
+        "send_latency_max_ms": 1000 * latency_max,
+        "per_connection": [
+            {
+                "player_id": c.player_id,
+                "queue_depth": c.depth,
+                "sent": c.sent,
+                "dropped": c.dropped,
+                "send_latency_max_ms": 1000 * c.latency_max,
+            }
+            for c in live
+        ],
+    }
@@ -0,0 +1,162 @@
+import random
+from typing import Any, List, Optional, Sequence
+
+from app.models.Game import Game, BOARD_INDEX
+from app.models.Player import Player
+from app.services.game_actions import run_sync
+
+FORCED_PHASES = ("FORCED_SELL_HOUSES", "FORCED_MORTGAGE")
+
+
+class HeadlessGame(Game):
+    """The regular rules engine with sockets, Redis and outbound messages stripped out."""
+
+    def __init__(self, game_id: Any, players: List[Player], seed: Optional[int] = None):
+        super().__init__(game_id, players)
+        self.rng = random.Random(seed)
+        self.landings = [0] * BOARD_INDEX.size
+
+    @classmethod
+    def seated(cls, seats: int, seed: Optional[int] = None) -> "HeadlessGame":
+        # user ids equal seat ids so policies can use either
+        players = [Player(user_id=i, id=i, name=f"Seat {i}") for i in range(seats)]
+        return cls(f"sim-{seed}", players, seed=seed)
+
+    async def _land(self, player: Player, dice: tuple[int, int]):
+        self.landings[player.position] += 1
+        await super()._land(player, dice)
+
+    async def broadcast(self, message: dict):
+        return
+
+    async def send_to(self, player_id: int, message: dict):
+        return
+
+    # Only ever used to build outbound messages, which are discarded here
+    def state_view(self) -> dict:
+        return {}
+
+    def get_players(self):
+        return {}
+
+    def players_list(self):
+        return []
+
+
+class GameResult:
+    __slots__ = ("seed", "turns", "winner", "landings", "bankrupt_order")
+
+    def __init__(self, seed, turns: int, winner: Optional[int], landings: List[int], bankrupt_order: List[int]):
+        self.seed = seed
+        self.turns = turns
+        self.winner = winner
+        self.landings = landings
+        self.bankrupt_order = bankrupt_order
+
+
+def play_game(
+    policies: Sequence[Any],
+    seed: Optional[int] = None,
+    max_turns: int = 1000,
+    shuffle_decks: bool = True,
+) -> GameResult:
+    """Plays one complete game with one policy per seat and returns its outcome."""
+    game = HeadlessGame.seated(len(policies), seed=seed)
+    if shuffle_decks:
+        game.rng.shuffle(game.chance_deck)
+        game.rng.shuffle(game.community_deck)
+
+    bankrupt_order: List[int] = []
+    turns = 0
+    while game.state["phase"] != "GAME_OVER" and turns < max_turns:
+        seat = game.turn.player_id
+        player = game.players_map[game.players[seat]]
+        policy = policies[seat]
+        phase = game.state["phase"]
+
+        if phase == "WAIT_FOR_ROLL":
+            for square_id in policy.houses_to_build(game, player):
+                run_sync(game.build_house(player.user_id, square_id))
+            run_sync(game.roll_dice(player.user_id))
+        elif phase == "JAIL_DECISION":
+            run_sync(game.jail_decision(player.user_id, policy.jail_action(game, player)))
+        elif phase == "DECIDE_TO_BUY":
+            square_id = player.position
+            if policy.should_buy(game, player, square_id) and player.money >= BOARD_INDEX.prices[square_id]:
+                run_sync(game.buy_property(player.user_id, square_id))
+            else:
+                _run_auction(game, policies, square_id, player.user_id)
+        elif phase in FORCED_PHASES:
+            _raise_funds(game, policies)
+        else:
+            # Any phase the engine left behind without a follow-up ends the turn
+            game.state["phase"] = "WAIT_FOR_NEXT_TURN"
+
+        _cover_negative_balances(game, policies)
+        for p in game.players_map.values():
+            if p.is_bankrupt and p.id not in bankrupt_order:
+                bankrupt_order.append(p.id)
+
+        if game.advance_phase() == "end_turn":
+            turns += 1
+
+    winner = None
+    if game.state["phase"] == "GAME_OVER":
+        winner = next(p.id for p in game.players_map.values() if not p.is_bankrupt)
+    return GameResult(seed, turns, winner, game.landings, bankrupt_order)
+
+
+def _run_auction(game: HeadlessGame, policies: Sequence[Any], square_id: int, user_id: int):
+    run_sync(game.start_auction(square_id, user_id))
+    while game.state["phase"] == "AUCTION":
+        auction = game.state["auction"]
+        progressed = False
+        for bidder_id in list(auction["active_players"]):
+            if game.state["phase"] != "AUCTION":
+                break
+            if bidder_id == auction["highest_bidder"]:
+                continue
+            bidder = game.players_map[bidder_id]
+            bid = None if bidder.is_bankrupt else policies[bidder.id].bid(game, bidder, auction)
+            if bid is not None and bid > auction["highest_bid"] and bid <= bidder.money:
+                run_sync(game.place_bid(bidder_id, bid))
+            else:
+                run_sync(game.fold_auction(bidder_id))
+            progressed = True
+        if not progressed:
+            # Only the highest bidder is left standing
+            run_sync(game._finalize_auction())
+
+
+def _raise_funds(game: HeadlessGame, policies: Sequence[Any]):
+    debt = game.state["debt"]
+    debtor = game.players_map[game.players[debt["debtor"]]]
+    policy = policies[debtor.id]
+    money_before = debtor.money
+    if game.state["phase"] == "FORCED_SELL_HOUSES":
+        run_sync(game.forced_sell_house(debtor.user_id, policy.group_to_sell(game, debtor)))
+    else:
+        run_sync(game.mortgage_property(debtor.user_id, policy.square_to_mortgage(game, debtor)))
+
+    if debtor.money == money_before:
+        # The policy picked something the engine refused; give up the assets
+        game.state["debt"] = None
+        run_sync(game._declare_bankruptcy(debtor.user_id, debt["creditor"]))
+        return
+    run_sync(game.settle_debt())
+
+
+def _cover_negative_balances(game: HeadlessGame, policies: Sequence[Any]):
+    """
+    Cards, repairs and the jail fee are charged without a funds check; anyone
+    left below zero has to raise cash through the normal debt flow or go bust.
+    """
+    for player in game.players_map.values():
+        if player.money >= 0 or player.is_bankrupt:
+            continue
+        phase = game.state["phase"]
+        run_sync(game.handle_insufficient_funds(player.user_id, None, 0))
+        while game.state["phase"] in FORCED_PHASES:
+            _raise_funds(game, policies)
+        if game.state["phase"] != "GAME_OVER":
+            game.state["phase"] = phase
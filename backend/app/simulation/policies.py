@@ -0,0 +1,128 @@
+import importlib
+from typing import Any, Dict, List, Optional, Type
+
+from app.models.Game import BOARD_INDEX
+from app.models.Player import Player
+
+
+class Policy:
+    """
+    Decisions a simulated seat makes. The base class buys whatever it can
+    afford, never builds and always tries to roll out of jail.
+    """
+
+    name = "buy_all"
+
+    def should_buy(self, game, player: Player, square_id: int) -> bool:
+        return True
+
+    def bid(self, game, player: Player, auction: dict) -> Optional[int]:
+        """Amount to bid, or None to fold."""
+        return None
+
+    def jail_action(self, game, player: Player) -> str:
+        if player.get_out_of_jail_free > 0:
+            return "CARD"
+        return "ROLL"
+
+    def houses_to_build(self, game, player: Player) -> List[int]:
+        return []
+
+    def group_to_sell(self, game, player: Player) -> str:
+        """Colour group to sell a house from while in FORCED_SELL_HOUSES."""
+        props = game.state["mutable_properties"]
+        best = max(
+            (sid for sid in BOARD_INDEX.purchasable if props[sid]["owner_id"] == player.id),
+            key=lambda sid: props[sid]["houses"],
+        )
+        return BOARD_INDEX.group_of[best]
+
+    def square_to_mortgage(self, game, player: Player) -> int:
+        """Square to mortgage while in FORCED_MORTGAGE; cheapest first."""
+        props = game.state["mutable_properties"]
+        candidates = [
+            sid
+            for sid in BOARD_INDEX.purchasable
+            if props[sid]["owner_id"] == player.id and not props[sid]["is_mortgaged"]
+        ]
+        return min(candidates, key=lambda sid: BOARD_INDEX.prices[sid])
+
+
+class CautiousPolicy(Policy):
+    """Keeps a cash reserve, bids up to list price and builds evenly on monopolies."""
+
+    name = "cautious"
+    reserve = 300
+
+    def should_buy(self, game, player: Player, square_id: int) -> bool:
+        return player.money - BOARD_INDEX.prices[square_id] >= self.reserve
+
+    def bid(self, game, player: Player, auction: dict) -> Optional[int]:
+        limit = min(BOARD_INDEX.prices[auction["square_id"]], player.money - self.reserve)
+        step = auction["highest_bid"] + 10
+        return step if step <= limit else None
+
+    def jail_action(self, game, player: Player) -> str:
+        if player.get_out_of_jail_free > 0:
+            return "CARD"
+        if player.money >= 50 + self.reserve:
+            return "PAY"
+        return "ROLL"
+
+    def houses_to_build(self, game, player: Player) -> List[int]:
+        props = game.state["mutable_properties"]
+        holdings = game.holdings.get(player.id)
+        if not holdings:
+            return []
+        budget = player.money - self.reserve
+        plan = []
+        for group_id, owned in holdings.per_group.items():
+            squares = BOARD_INDEX.group_squares[group_id]
+            if owned != len(squares) or BOARD_INDEX.types[squares[0]] != "Property":
+                continue
+            if any(props[sid]["is_mortgaged"] for sid in squares):
+                continue
+            houses = {sid: props[sid]["houses"] for sid in squares}
+            while budget >= BOARD_INDEX.house_costs[squares[0]]:
+                sid = min(squares, key=lambda s: houses[s])
+                if houses[sid] >= 5:
+                    break
+                houses[sid] += 1
+                budget -= BOARD_INDEX.house_costs[sid]
+                plan.append(sid)
+        return plan
+
+
+class RandomPolicy(Policy):
+    """Coin-flip decisions drawn from the game's own seeded RNG."""
+
+    name = "random"
+
+    def should_buy(self, game, player: Player, square_id: int) -> bool:
+        return game.rng.random() < 0.5
+
+    def bid(self, game, player: Player, auction: dict) -> Optional[int]:
+        if game.rng.random() < 0.5:
+            return auction["highest_bid"] + game.rng.randint(1, 50)
+        return None
+
+    def jail_action(self, game, player: Player) -> str:
+        return game.rng.choice(["PAY", "ROLL"])
+
+
+POLICIES: Dict[str, Type[Policy]] = {
+    Policy.name: Policy,
+    CautiousPolicy.name: CautiousPolicy,
+    RandomPolicy.name: RandomPolicy,
+}
+
+
+def load_policy(spec: str) -> Policy:
+    """Resolves a registered policy name or a "package.module:ClassName" path."""
+    if spec in POLICIES:
+        return POLICIES[spec]()
+    if ":" not in spec:
+        raise ValueError(f"Unknown policy '{spec}'. Known: {', '.join(POLICIES)}")
+    module_name, class_name = spec.split(":", 1)
+    cls: Any = getattr(importlib.import_module(module_name), class_name)
+    return cls()
@@ -0,0 +1,168 @@
+"""
+Runs many seeded headless games across a process pool and aggregates the results.
+
+    python -m app.simulation.runner --games 20000 --seats 4 --policy cautious --policy buy_all
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+from app.simulation.engine import play_game
+from app.simulation.policies import load_policy
+
+
+class Aggregate:
+    """
+    Mergeable summary of a batch of games.
+
+    Game length, wins and landing shares describe finished games only; games
+    stopped at the turn cap are counted apart, since they say nothing about
+    who wins or how long a game lasts.
+    """
+
+    def __init__(self, board_size: int = 40):
+        self.games = 0
+        self.capped = 0
+        self.total_turns = 0
+        self.lengths: Dict[int, int] = {}
+        self.wins_by_seat: Dict[int, int] = {}
+        self.landings = [0] * board_size
+
+    @property
+    def finished(self) -> int:
+        return self.games - self.capped
+
+    def add(self, result):
+        self.games += 1
+        if result.winner is None:
+            self.capped += 1
+            return
+        self.total_turns += result.turns
+        self.lengths[result.turns] = self.lengths.get(result.turns, 0) + 1
+        self.wins_by_seat[result.winner] = self.wins_by_seat.get(result.winner, 0) + 1
+        for sid, count in enumerate(result.landings):
+            self.landings[sid] += count
+
+    def merge(self, other: "Aggregate"):
+        self.games += other.games
+        self.capped += other.capped
+        self.total_turns += other.total_turns
+        for turns, count in other.lengths.items():
+            self.lengths[turns] = self.lengths.get(turns, 0) + count
+        for seat, count in other.wins_by_seat.items():
+            self.wins_by_seat[seat] = self.wins_by_seat.get(seat, 0) + count
+        for sid, count in enumerate(other.landings):
+            self.landings[sid] += count
+
+    def _percentile(self, q: float) -> int:
+        target = q * self.finished
+        seen = 0
+        for turns in sorted(self.lengths):
+            seen += self.lengths[turns]
+            if seen >= target:
+                return turns
+        return 0
+
+    def summary(self, policies: Sequence[str]) -> dict:
+        total_landings = sum(self.landings) or 1
+        return {
+            "games": self.games,
+            "capped": {
+                "games": self.capped,
+                "share": round(self.capped / self.games, 4) if self.games else 0.0,
+            },
+            "finished": {
+                "games": self.finished,
+                "turns": {
+                    "mean": self.total_turns / self.finished if self.finished else 0,
+                    "p50": self._percentile(0.5),
+                    "p90": self._percentile(0.9),
+                    "p99": self._percentile(0.99),
+                },
+                "wins_by_seat": {
+                    f"{seat}:{policies[seat]}": self.wins_by_seat.get(seat, 0)
+                    for seat in range(len(policies))
+                },
+                "landing_share": [round(c / total_landings, 5) for c in self.landings],
+            },
+        }
+
+
+def run_batch(seeds: Sequence[int], policy_specs: Sequence[str], max_turns: int) -> Aggregate:
+    """Worker entry point: plays every seed in `seeds` and returns their aggregate."""
+    policies = [load_policy(spec) for spec in policy_specs]
+    agg = Aggregate()
+    for seed in seeds:
+        agg.add(play_game(policies, seed=seed, max_turns=max_turns))
+    return agg
+
+
+def simulate(
+    games: int,
+    policy_specs: Sequence[str],
+    seed: int = 0,
+    max_turns: int = 1000,
+    workers: Optional[int] = None,
+    chunk_size: int = 200,
+) -> Aggregate:
+    seeds = list(range(seed, seed + games))
+    chunks: List[List[int]] = [seeds[i : i + chunk_size] for i in range(0, games, chunk_size)]
+    total = Aggregate()
+    if workers == 1:
+        for chunk in chunks:
+            total.merge(run_batch(chunk, policy_specs, max_turns))
+        return total
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_batch, chunk, policy_specs, max_turns) for chunk in chunks]
+        for future in futures:
+            total.merge(future.result())
+    return total
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Headless Monopoly balance simulation")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--seats", type=int, default=4)
+    parser.add_argument(
+        "--policy",
+        action="append",
+        default=[],
+        help="policy name or module:Class, repeated per seat (cycled if fewer than --seats)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--max-turns",
+        type=int,
+        default=1000,
+        help="turns after which a game is stopped and reported as capped",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    specs = args.policy or ["buy_all"]
+    policy_specs = [specs[i % len(specs)] for i in range(args.seats)]
+
+    started = time.perf_counter()
+    agg = simulate(
+        args.games,
+        policy_specs,
+        seed=args.seed,
+        max_turns=args.max_turns,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+    )
+    elapsed = time.perf_counter() - started
+
+    report = agg.summary(policy_specs)
+    report["elapsed_s"] = round(elapsed, 3)
+    report["games_per_minute"] = round(agg.games / elapsed * 60) if elapsed else None
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,405 @@
+"""
+Lockstep NumPy simulator: advances a whole batch of games one roll at a time.
+
+It models dice, doubles (three in a row -> jail), jail escapes, Go salary,
+taxes, both card decks and landing tallies, with an optional "buy if cash
+stays above a reserve" policy plus unimproved rent. Houses, mortgages and
+auctions are left out; use app.simulation.runner when those matter.
+
+    python -m app.simulation.vectorized --games 100000 --turns 200 --buy-reserve 200
+"""
+import argparse
+import json
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.models.Game import BOARD_INDEX, CHANCE_CARDS, COMMUNITY_CHEST_CARDS
+from app.models.board_index import BoardIndex
+
+JAIL_SQUARE = 10
+GO_SALARY = 200
+JAIL_FEE = 50
+
+T_OTHER, T_PROPERTY, T_RAILROAD, T_UTILITY, T_TAX, T_CHANCE, T_CHEST, T_GO_TO_JAIL = range(8)
+SQUARE_TYPES = {
+    "Property": T_PROPERTY,
+    "Railroad": T_RAILROAD,
+    "Utility": T_UTILITY,
+    "Tax": T_TAX,
+    "Chance": T_CHANCE,
+    "CommunityChest": T_CHEST,
+    "GoToJail": T_GO_TO_JAIL,
+}
+
+(
+    C_MOVE,
+    C_NEAREST_RAILROAD,
+    C_NEAREST_UTILITY,
+    C_BACK,
+    C_MONEY,
+    C_GO_TO_JAIL,
+    C_REPAIRS,
+    C_JAIL_FREE,
+    C_FROM_PLAYERS,
+) = range(9)
+
+
+def encode_deck(cards: Sequence[Dict[str, Any]]) -> np.ndarray:
+    """Turns the engine's card dicts into rows of (kind, arg, arg2)."""
+    rows = []
+    for card in cards:
+        t = card["type"]
+        if t == "MOVE":
+            rows.append((C_MOVE, card["target"], 0))
+        elif t == "NEAREST":
+            kind = C_NEAREST_RAILROAD if card["target"] == "Railroad" else C_NEAREST_UTILITY
+            rows.append((kind, 0, 0))
+        elif t == "BACK":
+            rows.append((C_BACK, card["steps"], 0))
+        elif t == "MONEY":
+            rows.append((C_MONEY, card["amount"], 0))
+        elif t == "GO_TO_JAIL":
+            rows.append((C_GO_TO_JAIL, 0, 0))
+        elif t == "REPAIRS":
+            rows.append((C_REPAIRS, card["house"], card["hotel"]))
+        elif t == "JAIL_FREE":
+            rows.append((C_JAIL_FREE, 0, 0))
+        elif t == "FROM_PLAYERS":
+            rows.append((C_FROM_PLAYERS, card["amount"], 0))
+        else:
+            raise ValueError(f"Unsupported card type '{t}'.")
+    return np.array(rows, dtype=np.int32)
+
+
+class BoardArrays:
+    """The board index flattened into NumPy lookup arrays."""
+
+    def __init__(self, index: BoardIndex):
+        n = index.size
+        self.size = n
+        self.types = np.array([SQUARE_TYPES.get(t, T_OTHER) for t in index.types], dtype=np.int8)
+        self.prices = np.array(index.prices, dtype=np.int32)
+        self.tax = np.array([index.tiles[i].tax_amount or 0 for i in range(n)], dtype=np.int32)
+        self.base_rent = np.array(
+            [index.rent(i, 0, 0) if index.types[i] == "Property" else 0 for i in range(n)],
+            dtype=np.int32,
+        )
+        self.monopoly_rent = np.array(
+            [index.rent(i, 0, 1) if index.types[i] == "Property" else 0 for i in range(n)],
+            dtype=np.int32,
+        )
+
+        # Group members padded with the square itself so "all members owned" stays a plain .all()
+        width = max(index.group_sizes.values())
+        members = np.tile(np.arange(n, dtype=np.int16)[:, None], (1, width))
+        for sid, group_id in enumerate(index.group_of):
+            if group_id is not None:
+                squares = index.group_squares[group_id]
+                members[sid, : len(squares)] = squares
+        self.group_members = members
+
+        self.railroads = np.array(sorted(index.railroads), dtype=np.int16)
+        self.utilities = np.array(sorted(index.utilities), dtype=np.int16)
+        first_rail = int(self.railroads[0])
+        first_util = int(self.utilities[0])
+        self.rail_rent = np.array(
+            [index.rent(first_rail, 0, k) for k in range(len(self.railroads) + 1)], dtype=np.int32
+        )
+        self.utility_mult = np.array(
+            [index.rent(first_util, 0, k, 1) for k in range(len(self.utilities) + 1)], dtype=np.int32
+        )
+        self.next_railroad = np.array(index.next_railroad, dtype=np.int16)
+        self.next_utility = np.array(index.next_utility, dtype=np.int16)
+
+
+class BatchSimulator:
+    def __init__(
+        self,
+        games: int,
+        seats: int = 4,
+        seed: Optional[int] = None,
+        buy_reserve: Optional[int] = None,
+        jail_strategy: str = "roll",
+        start_money: int = 1500,
+        chance_cards: Sequence[Dict[str, Any]] = CHANCE_CARDS,
+        chest_cards: Sequence[Dict[str, Any]] = COMMUNITY_CHEST_CARDS,
+        index: BoardIndex = BOARD_INDEX,
+        shuffle_decks: bool = True,
+    ):
+        if jail_strategy not in ("roll", "pay"):
+            raise ValueError("jail_strategy must be 'roll' or 'pay'")
+        self.rng = np.random.default_rng(seed)
+        self.board = BoardArrays(index)
+        self.games = games
+        self.seats = seats
+        self.buy_reserve = buy_reserve
+        self.jail_strategy = jail_strategy
+
+        self.pos = np.zeros((games, seats), dtype=np.int16)
+        self.money = np.full((games, seats), start_money, dtype=np.int32)
+        self.in_jail = np.zeros((games, seats), dtype=bool)
+        self.jail_turns = np.zeros((games, seats), dtype=np.int8)
+        self.jail_cards = np.zeros((games, seats), dtype=np.int8)
+        self.alive = np.ones((games, seats), dtype=bool)
+        self.owner = np.full((games, self.board.size), -1, dtype=np.int8)
+        self.cur = np.zeros(games, dtype=np.int8)
+        self.doubles = np.zeros(games, dtype=np.int8)
+        self.turns = np.zeros(games, dtype=np.int32)
+        self.finished = np.zeros(games, dtype=bool)
+        self.winner = np.full(games, -1, dtype=np.int8)
+        self.landings = np.zeros(self.board.size, dtype=np.int64)
+        self.rolls = 0
+
+        self.decks = []
+        for cards in (chance_cards, chest_cards):
+            deck = encode_deck(cards)
+            order = np.tile(np.arange(len(deck), dtype=np.int8), (games, 1))
+            if shuffle_decks:
+                order = self.rng.permuted(order, axis=1)
+            self.decks.append((deck, order, np.zeros(games, dtype=np.int8)))
+
+    # --- one roll for every unfinished game ---
+    def step(self):
+        g = np.flatnonzero(~self.finished)
+        if g.size == 0:
+            return
+        c = self.cur[g].astype(np.intp)
+        d1 = self.rng.integers(1, 7, g.size)
+        d2 = self.rng.integers(1, 7, g.size)
+        roll = (d1 + d2).astype(np.int16)
+        dbl = d1 == d2
+        moves = np.ones(g.size, dtype=bool)
+
+        jailed = self.in_jail[g, c]
+        if jailed.any():
+            # A Get Out of Jail Free card is always used first
+            use_card = jailed & (self.jail_cards[g, c] > 0)
+            self.jail_cards[g[use_card], c[use_card]] -= 1
+            if self.jail_strategy == "pay":
+                pay = jailed & ~use_card
+                self.money[g[pay], c[pay]] -= JAIL_FEE
+                released = jailed
+            else:
+                trying = jailed & ~use_card
+                fail = trying & ~dbl
+                self.jail_turns[g[fail], c[fail]] += 1
+                # third failure: pay the fee and move with this roll
+                forced = fail & (self.jail_turns[g, c] >= 3)
+                self.money[g[forced], c[forced]] -= JAIL_FEE
+                moves = ~(fail & ~forced)
+                released = jailed & moves
+            self.in_jail[g[released], c[released]] = False
+            self.jail_turns[g[released], c[released]] = 0
+
+        count = np.where(dbl & moves, self.doubles[g] + 1, 0)
+        speeding = count >= 3
+        sent_to_jail = speeding.copy()
+        self._jail(g[speeding], c[speeding])
+        moves &= ~speeding
+        self.doubles[g] = np.where(speeding, 0, count)
+
+        m = np.flatnonzero(moves)
+        gm, cm = g[m], c[m]
+        new_pos = self.pos[gm, cm] + roll[m]
+        passed = new_pos >= self.board.size
+        self.money[gm[passed], cm[passed]] += GO_SALARY
+        self.pos[gm, cm] = new_pos % self.board.size
+        sent_to_jail[m] |= self._resolve(gm, cm, roll[m])
+        self.rolls += g.size
+
+        self._settle_bankruptcies(g)
+        busted = ~self.alive[g, c]
+        extra_roll = dbl & moves & ~sent_to_jail & ~busted
+        ended = ~extra_roll
+        self.doubles[g[ended]] = 0
+        self.turns[g[ended]] += 1
+        self._advance(g[ended & ~self.finished[g]])
+
+    def _jail(self, g: np.ndarray, c: np.ndarray):
+        self.pos[g, c] = JAIL_SQUARE
+        self.in_jail[g, c] = True
+        self.jail_turns[g, c] = 0
+
+    def _resolve(self, g: np.ndarray, c: np.ndarray, roll: np.ndarray) -> np.ndarray:
+        """Applies the squares the movers stand on; card moves are resolved in follow-up passes."""
+        jailed = np.zeros(g.size, dtype=bool)
+        pending = np.arange(g.size)
+        while pending.size:
+            ga, ca = g[pending], c[pending]
+            p = self.pos[ga, ca].astype(np.intp)
+            self.landings += np.bincount(p, minlength=self.board.size)
+            t = self.board.types[p]
+
+            hit = t == T_GO_TO_JAIL
+            self._jail(ga[hit], ca[hit])
+            jailed[pending[hit]] = True
+
+            hit = t == T_TAX
+            self.money[ga[hit], ca[hit]] -= self.board.tax[p[hit]]
+
+            hit = (t == T_PROPERTY) | (t == T_RAILROAD) | (t == T_UTILITY)
+            self._purchasable(ga[hit], ca[hit], p[hit], roll[pending[hit]])
+
+            moved_next = []
+            for deck_no, square_type in enumerate((T_CHANCE, T_CHEST)):
+                hit = np.flatnonzero(t == square_type)
+                if hit.size:
+                    moved, to_jail = self._draw(deck_no, ga[hit], ca[hit], p[hit])
+                    jailed[pending[hit[to_jail]]] = True
+                    moved_next.append(pending[hit[moved]])
+            pending = np.concatenate(moved_next) if moved_next else pending[:0]
+        return jailed
+
+    def _purchasable(self, g: np.ndarray, c: np.ndarray, p: np.ndarray, roll: np.ndarray):
+        if g.size == 0:
+            return
+        owner = self.owner[g, p].astype(np.intp)
+        if self.buy_reserve is not None:
+            price = self.board.prices[p]
+            buy = (owner < 0) & (self.money[g, c] - price >= self.buy_reserve)
+            self.owner[g[buy], p[buy]] = c[buy]
+            self.money[g[buy], c[buy]] -= price[buy]
+
+        pay = np.flatnonzero((owner >= 0) & (owner != c))
+        if pay.size == 0:
+            return
+        g, c, p, roll, owner = g[pay], c[pay], p[pay], roll[pay], owner[pay]
+        t = self.board.types[p]
+        rent = np.zeros(pay.size, dtype=np.int32)
+
+        prop = t == T_PROPERTY
+        if prop.any():
+            members = self.board.group_members[p[prop]]
+            held = self.owner[g[prop][:, None], members] == owner[prop][:, None]
+            monopoly = held.all(axis=1)
+            rent[prop] = np.where(monopoly, self.board.monopoly_rent[p[prop]], self.board.base_rent[p[prop]])
+
+        rail = t == T_RAILROAD
+        if rail.any():
+            held = self.owner[g[rail][:, None], self.board.railroads[None, :]] == owner[rail][:, None]
+            rent[rail] = self.board.rail_rent[held.sum(axis=1)]
+
+        util = t == T_UTILITY
+        if util.any():
+            held = self.owner[g[util][:, None], self.board.utilities[None, :]] == owner[util][:, None]
+            rent[util] = self.board.utility_mult[held.sum(axis=1)] * roll[util]
+
+        self.money[g, c] -= rent
+        self.money[g, owner] += rent
+
+    def _draw(self, deck_no: int, g: np.ndarray, c: np.ndarray, p: np.ndarray):
+        deck, order, ptr = self.decks[deck_no]
+        card = order[g, ptr[g]]
+        ptr[g] = (ptr[g] + 1) % len(deck)
+        kind, arg = deck[card, 0], deck[card, 1]
+        moved = np.zeros(g.size, dtype=bool)
+        to_jail = kind == C_GO_TO_JAIL
+        self._jail(g[to_jail], c[to_jail])
+
+        target = np.full(g.size, -1, dtype=np.int32)
+        hit = kind == C_MOVE
+        target[hit] = arg[hit]
+        hit = kind == C_NEAREST_RAILROAD
+        target[hit] = self.board.next_railroad[p[hit]]
+        hit = kind == C_NEAREST_UTILITY
+        target[hit] = self.board.next_utility[p[hit]]
+        moving = target >= 0
+        passed = moving & (target < p)
+        self.money[g[passed], c[passed]] += GO_SALARY
+
+        hit = kind == C_BACK
+        target[hit] = (p[hit] - arg[hit]) % self.board.size
+        moved = target >= 0
+        self.pos[g[moved], c[moved]] = target[moved]
+
+        hit = kind == C_MONEY
+        self.money[g[hit], c[hit]] += arg[hit]
+        hit = kind == C_JAIL_FREE
+        self.jail_cards[g[hit], c[hit]] += 1
+
+        hit = np.flatnonzero(kind == C_FROM_PLAYERS)
+        if hit.size:
+            gh, ch, amount = g[hit], c[hit], arg[hit]
+            for seat in range(self.seats):
+                payers = (ch != seat) & self.alive[gh, seat]
+                self.money[gh[payers], seat] -= amount[payers]
+                self.money[gh[payers], ch[payers]] += amount[payers]
+        # REPAIRS costs nothing: houses are not modelled
+        return moved, to_jail
+
+    def _settle_bankruptcies(self, g: np.ndarray):
+        broke = self.alive[g] & (self.money[g] < 0)
+        if not broke.any():
+            return
+        for seat in range(self.seats):
+            rows = g[broke[:, seat]]
+            if rows.size:
+                self.alive[rows, seat] = False
+                owned = self.owner[rows]
+                owned[owned == seat] = -1
+                self.owner[rows] = owned
+        alive_count = self.alive[g].sum(axis=1)
+        done = g[alive_count <= 1]
+        self.finished[done] = True
+        self.winner[done] = np.where(
+            self.alive[done].any(axis=1), self.alive[done].argmax(axis=1), -1
+        )
+
+    def _advance(self, g: np.ndarray):
+        nxt = self.cur[g].astype(np.intp)
+        need = np.ones(g.size, dtype=bool)
+        for _ in range(self.seats):
+            nxt = np.where(need, (nxt + 1) % self.seats, nxt)
+            need &= ~self.alive[g, nxt]
+            if not need.any():
+                break
+        self.cur[g] = nxt
+
+    def run(self, max_turns: int) -> dict:
+        while not self.finished.all() and self.turns[~self.finished].min() < max_turns:
+            self.step()
+            # games that hit the turn cap simply stop advancing
+            self.finished |= self.turns >= max_turns
+        return self.summary()
+
+    def summary(self) -> dict:
+        decided = self.winner >= 0
+        lengths = self.turns[decided]
+        total = int(self.landings.sum()) or 1
+        return {
+            "games": self.games,
+            "rolls": self.rolls,
+            "decided": int(decided.sum()),
+            "turns_mean": float(lengths.mean()) if lengths.size else None,
+            "wins_by_seat": np.bincount(self.winner[decided], minlength=self.seats).tolist(),
+            "landing_share": (self.landings / total).round(5).tolist(),
+        }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Vectorized Monopoly batch simulation")
+    parser.add_argument("--games", type=int, default=100_000)
+    parser.add_argument("--seats", type=int, default=4)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--buy-reserve", type=int, default=None, help="buy when cash stays above this")
+    parser.add_argument("--jail", choices=["roll", "pay"], default="roll")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    sim = BatchSimulator(
+        args.games,
+        seats=args.seats,
+        seed=args.seed,
+        buy_reserve=args.buy_reserve,
+        jail_strategy=args.jail,
+    )
+    report = sim.run(args.turns)
+    report["elapsed_s"] = round(time.perf_counter() - started, 3)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
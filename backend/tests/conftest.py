@@ -0,0 +1,78 @@
+import json
+
+import pytest
+from fakeredis import FakeServer, aioredis
+
+import app.db.redis_pool as redis_pool
+from app.models import gamesManager as games_manager
+from app.models.Game import Game
+from app.models.Player import Player
+from app.services.game_persister import GamePersister
+from app.services.ws_codec import JSON
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Points the shared Redis client at a fresh in-memory server for one test."""
+    client = aioredis.FakeRedis(server=FakeServer(), decode_responses=True)
+    monkeypatch.setattr(redis_pool, "_client", client)
+    return client
+
+
+@pytest.fixture
+def make_game():
+    """Builds an unsaved game whose players have user ids 10, 11, ..."""
+
+    def make(game_id: str = "test-game", players: int = 3) -> Game:
+        return Game(game_id, [Player(user_id=10 + i, id=i) for i in range(players)])
+
+    return make
+
+
+@pytest.fixture
+def game(make_game) -> Game:
+    return make_game()
+
+
+class RecordingConnection:
+    """Stands in for a GameConnection, keeping whatever was queued on it."""
+
+    encoding = JSON
+
+    def __init__(self):
+        self.frames = []
+        self.messages = []
+
+    def send_frame(self, frame, is_state):
+        self.frames.append((frame, is_state))
+
+    def send(self, message):
+        self.messages.append(message)
+
+    def received(self) -> list:
+        return [json.loads(frame) for frame, _ in self.frames]
+
+
+@pytest.fixture
+def recording_connection():
+    """Makes RecordingConnections; call it once per socket."""
+    return RecordingConnection
+
+
+@pytest.fixture
+def make_manager():
+    """Builds a games manager whose persister only flushes when told to, unless `interval` is given."""
+
+    def make(interval: float = 60, **persister_options) -> games_manager.gamesManager:
+        manager = games_manager.gamesManager()
+        manager.persister = GamePersister(
+            manager.events, manager.store, interval=interval, **persister_options
+        )
+        return manager
+
+    return make
+
+
+@pytest.fixture
+def manager(make_manager) -> games_manager.gamesManager:
+    return make_manager()
@@ -0,0 +1,51 @@
+import pytest
+
+from app.models.board import get_board
+from app.models.board_index import BoardIndex, get_board_index
+
+
+def test_index_is_built_once():
+    assert get_board_index() is get_board_index()
+
+
+def test_groups_and_special_squares():
+    index = get_board_index()
+    assert sorted(index.railroads) == [5, 15, 25, 35]
+    assert sorted(index.utilities) == [12, 28]
+    assert index.group_squares["Brown"] == (1, 3)
+    assert index.group_sizes["DarkBlue"] == 2
+    assert all(index.group_of[sid] == group for group, sids in index.group_squares.items() for sid in sids)
+    assert index.purchasable == frozenset(index.railroads | index.utilities | {
+        sid for sid, t in enumerate(index.types) if t == "Property"
+    })
+
+
+def test_nearest_wraps_past_go():
+    index = get_board_index()
+    assert index.nearest(7, "Railroad") == 15
+    assert index.nearest(36, "Railroad") == 5
+    assert index.nearest(22, "Utility") == 28
+    assert index.nearest(30, "Utility") == 12
+    # Strictly ahead: standing on a railroad points at the next one
+    assert index.nearest(5, "Railroad") == 15
+    assert index.nearest(7, "Tax") is None
+
+
+def test_rent_matches_the_board():
+    index = get_board_index()
+    brown = get_board().tiles[1].details
+    assert index.rent(1, 0, 0) == brown.rent[0]
+    assert index.rent(1, 0, 1) == brown.rent[0] * 2  # unimproved monopoly doubles
+    assert index.rent(1, 3, 1) == brown.rent[3]
+    assert index.rent(5, 0, 1) == 25
+    assert index.rent(5, 0, 4) == 200
+    assert index.rent(12, 0, 1, dice_total=7) == 28
+    assert index.rent(12, 0, 2, dice_total=7) == 70
+    # Nothing is owed on squares that cannot be owned
+    assert index.rent(0, 0, 0) == 0
+
+
+def test_tables_are_read_only():
+    index = BoardIndex(get_board())
+    with pytest.raises(TypeError):
+        index.group_squares["Brown"] = (1,)
@@ -0,0 +1,93 @@
+import asyncio
+import json
+
+import pytest
+
+from app.models import gamesManager as games_manager
+from app.models.event_log import GameEventLog
+from app.services.game_actions import apply_action
+
+
+def test_events_round_trip_in_order(fake_redis):
+    log = GameEventLog()
+
+    async def scenario():
+        async with fake_redis.pipeline(transaction=False) as pipe:
+            for seq in range(1, 6):
+                event = GameEventLog.make_event(seq, "roll_dice", {"n": seq}, [(seq, 1)])
+                log.append(pipe, "g1", seq, event)
+            await pipe.execute()
+        return await log.events_after("g1", 2)
+
+    events = asyncio.run(scenario())
+    assert [seq for seq, _ in events] == [3, 4, 5]
+    seq, event = events[0]
+    assert event["player_id"] == 3
+    assert event["payload"] == {"n": 3}
+    assert event["dice"] == [(3, 1)]
+
+
+async def _play(manager, game, actions: int):
+    for i in range(actions):
+        user_id = game.players[game.turn_order[game.state["turn_index"]]]
+        phase = game.state["phase"]
+        if phase == "WAIT_FOR_ROLL":
+            action, payload = "roll_dice", {}
+        elif phase == "DECIDE_TO_BUY":
+            action, payload = "buy_property", {}
+        elif phase == "JAIL_DECISION":
+            action, payload = "jail_action", {"action": "ROLL"}
+        elif phase == "AUCTION":
+            action, payload = "fold_auction", {}
+            user_id = game.state["auction"]["active_players"][0]
+        else:
+            break
+        await apply_action(game, user_id, action, payload)
+        manager.record_action(game, user_id, action, payload)
+        if i % 3 == 0:
+            # Let the persister flush between some actions, as it would live
+            await asyncio.sleep(0.015)
+
+
+def test_replaying_snapshot_and_events_rebuilds_the_game(fake_redis, make_manager):
+    async def scenario():
+        manager = make_manager(interval=0.01, snapshot_every=7)
+        manager.persister.start()
+        game = await manager.create_game([11, 22, 33])
+        manager.save_game(game)
+        await manager.persister.flush()
+        await _play(manager, game, 120)
+        await manager.persister.stop()
+        reloaded = await make_manager().get_game(str(game.id))
+        return game, reloaded
+
+    game, reloaded = asyncio.run(scenario())
+    assert game.event_seq > 0
+    assert json.dumps(reloaded.to_redis(), default=str, sort_keys=True) == json.dumps(
+        game.to_redis(), default=str, sort_keys=True
+    )
+
+
+def test_a_failed_action_is_saved_as_a_snapshot(fake_redis, make_manager, monkeypatch):
+    async def half_applied(game, player_id, action, payload):
+        game._roll()
+        game.players_map[player_id].money -= 100
+        raise RuntimeError("engine bug")
+
+    async def scenario():
+        manager = make_manager()
+        game = await manager.create_game([11, 22])
+        manager.save_game(game)
+        await manager.persister.flush()
+        monkeypatch.setattr(games_manager, "apply_action", half_applied)
+        user_id = game.players[game.turn_order[game.state["turn_index"]]]
+        with pytest.raises(RuntimeError):
+            await manager.handle_action(game, user_id, "roll_dice", {})
+        await manager.persister.flush()
+        return game, await make_manager().get_game(str(game.id))
+
+    game, reloaded = asyncio.run(scenario())
+    assert game.event_seq == 0 and game.take_rolls() == []
+    assert json.dumps(reloaded.to_redis(), default=str, sort_keys=True) == json.dumps(
+        game.to_redis(), default=str, sort_keys=True
+    )
@@ -0,0 +1,91 @@
+import asyncio
+import json
+import time
+
+from app.models import gamesManager as games_manager
+from app.services.sharding import WORKER_URLS_KEY, WORKERS_KEY
+
+
+def _dump(game) -> str:
+    return json.dumps(game.to_redis(), default=str, sort_keys=True)
+
+
+def test_saved_size_drives_the_estimate(fake_redis, manager):
+    async def scenario():
+        game = await manager.create_game([1, 2, 3, 4])
+        before = manager.footprint(game)
+        manager.save_game(game)
+        await manager.persister.flush()
+        return manager, game, before
+
+    manager, game, before = asyncio.run(scenario())
+    assert before == 0
+    assert game.stored_size > 1000
+    assert manager.footprint(game) == int(game.stored_size * games_manager.GAME_MEMORY_FACTOR)
+
+
+def test_least_recently_used_games_go_first_when_over_budget(fake_redis, monkeypatch, manager):
+    async def scenario():
+        games = [await manager.create_game([1, 2, 3, 4]) for _ in range(5)]
+        for game in games:
+            manager.save_game(game)
+        await manager.persister.flush()
+        # Room for two and a half games
+        budget = 2.5 * manager.footprint(games[0])
+        monkeypatch.setattr(games_manager, "GAME_MEMORY_BUDGET_MB", budget / (1024 * 1024))
+        games[1].connections[1] = object()  # someone is playing; never evicted
+        manager.touch(games[0])  # most recently used now
+        evicted = await manager.evict()
+        return manager, games, evicted
+
+    manager, games, evicted = asyncio.run(scenario())
+    assert evicted == 3
+    assert list(manager.games) == [games[1].id, games[0].id]
+    assert manager.eviction["capacity"] == 3
+    stats = manager.residency_stats()
+    assert stats["memory_estimate_bytes"] <= stats["memory_budget_bytes"]
+
+
+def test_evicted_games_come_back_on_access(fake_redis, monkeypatch, manager):
+    monkeypatch.setattr(games_manager, "GAME_IDLE_TIMEOUT", 0)
+
+    async def scenario():
+        game = await manager.create_game([1, 2])
+        game.players_map[1].money = 900
+        evicted = await manager.evict()
+        reloaded = await manager.get_game(str(game.id))
+        return manager, game, reloaded, evicted
+
+    manager, game, reloaded, evicted = asyncio.run(scenario())
+    assert evicted == 1 and manager.eviction["idle"] == 1
+    assert reloaded is not game
+    assert _dump(reloaded) == _dump(game)
+    assert reloaded.stored_size == game.stored_size
+    assert manager.eviction["rehydrated"] == 1
+
+
+def test_players_relayed_from_live_workers_keep_the_game(fake_redis, monkeypatch, manager):
+    monkeypatch.setattr(games_manager, "GAME_IDLE_TIMEOUT", 0)
+
+    async def scenario():
+        await fake_redis.zadd(WORKERS_KEY, {"w2": time.time()})
+        await fake_redis.hset(WORKER_URLS_KEY, "w2", "http://w2")
+        relayed, crashed = await manager.create_game([1, 2]), await manager.create_game([3, 4])
+        for game in (relayed, crashed):
+            manager.save_game(game)
+        await manager.persister.flush()
+        await manager.handle_forwarded(
+            {"game_id": str(relayed.id), "player_id": 1, "kind": "join", "worker_id": "w2"}
+        )
+        # A worker that stopped heartbeating no longer holds anyone's socket
+        crashed.relayed[3] = "w3"
+        kept = await manager.evict()
+        await manager.handle_forwarded(
+            {"game_id": str(relayed.id), "player_id": 1, "kind": "detach", "worker_id": "w2"}
+        )
+        return kept, list(manager.games), relayed, await manager.evict()
+
+    kept, resident, relayed, evicted = asyncio.run(scenario())
+    assert kept == 1 and resident == [relayed.id]
+    assert relayed.relayed == {}
+    assert evicted == 1
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from app.services.game_actor import GameActor, GameBusy
+
+
+def test_calls_run_one_at_a_time_in_order(game):
+    log = []
+
+    async def step(n):
+        log.append(("start", n))
+        await asyncio.sleep(0)
+        log.append(("end", n))
+        return n
+
+    async def scenario():
+        actor = GameActor(game).start()
+        results = await asyncio.gather(*(actor.call(lambda n=n: step(n)) for n in range(4)))
+        await actor.stop()
+        return results
+
+    assert asyncio.run(scenario()) == [0, 1, 2, 3]
+    # Nothing interleaves at an await point
+    assert log == [(kind, n) for n in range(4) for kind in ("start", "end")]
+
+
+def test_errors_go_back_to_the_caller_only(game):
+    async def boom():
+        raise ValueError("bad action")
+
+    async def fine():
+        return "ok"
+
+    async def scenario():
+        actor = GameActor(game).start()
+        results = await asyncio.gather(actor.call(boom), actor.call(fine), return_exceptions=True)
+        await actor.stop()
+        return results
+
+    failed, ok = asyncio.run(scenario())
+    assert isinstance(failed, ValueError) and ok == "ok"
+
+
+def test_a_batch_sends_only_the_last_state(game, recording_connection):
+    conn = game.connections[10] = recording_connection()
+
+    def update(n):
+        return lambda: game.broadcast({"type": "game_update", "state": {"n": n}})
+
+    async def scenario():
+        actor = GameActor(game, max_batch=10)
+        # Queued before the actor starts, so everything runs as one batch
+        calls = [asyncio.ensure_future(actor.call(update(n))) for n in range(3)]
+        calls.append(asyncio.ensure_future(actor.call(lambda: game.broadcast({"type": "chat"}))))
+        await asyncio.sleep(0)
+        actor.start()
+        await asyncio.gather(*calls)
+        await actor.stop()
+        return actor
+
+    actor = asyncio.run(scenario())
+    assert (actor.batches, actor.processed) == (1, 4)
+    assert conn.received() == [{"type": "game_update", "state": {"n": 2}}, {"type": "chat"}]
+
+
+def test_full_queue_is_refused(game):
+    async def scenario():
+        actor = GameActor(game, max_queue=2)
+        pending = [asyncio.ensure_future(actor.call(lambda: asyncio.sleep(0))) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(GameBusy):
+            await actor.call(lambda: asyncio.sleep(0))
+        await actor.stop()
+        return pending, actor
+
+    pending, actor = asyncio.run(scenario())
+    assert actor.rejected == 1
+    # Never-started work fails instead of hanging its caller
+    assert all(isinstance(p.exception(), GameBusy) for p in pending)
+
+
+def test_shutdown_stops_every_actor(fake_redis, manager):
+    async def scenario():
+        games = [await manager.create_game([1, 2]) for _ in range(2)]
+        gate = asyncio.Event()
+        running = asyncio.ensure_future(manager.actors[games[0].id].call(gate.wait))
+        await asyncio.sleep(0)
+        await manager.stop_actors()
+        return [a._task for a in manager.actors.values()], running
+
+    tasks, running = asyncio.run(scenario())
+    assert tasks == [None, None]
+    # The caller is answered rather than left waiting on a cancelled task
+    assert isinstance(running.exception(), GameBusy)
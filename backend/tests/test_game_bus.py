@@ -0,0 +1,109 @@
+import asyncio
+
+from app.services.game_bus import GameBus, game_channel
+
+
+async def _stop(bus: GameBus):
+    # Let queued publishes go out first; the in-memory Redis cannot cancel one midway
+    while bus._outbox.qsize():
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.05)
+    await bus.stop()
+
+
+def test_a_slow_game_does_not_hold_up_the_others():
+    handled = []
+
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def on_inbox(message):
+            if message["game_id"] == "slow":
+                await gate.wait()
+            handled.append((message["game_id"], message["n"]))
+
+        bus = GameBus("w1", enabled=True)
+        bus._on_inbox = on_inbox
+        for n in range(3):
+            bus._dispatch({"game_id": "slow", "player_id": 1, "kind": "action", "n": n})
+            bus._dispatch({"game_id": "fast", "player_id": 2, "kind": "action", "n": n})
+        await asyncio.sleep(0.01)
+        before = list(handled)
+        gate.set()
+        await asyncio.sleep(0.01)
+        return before, bus
+
+    before, bus = asyncio.run(scenario())
+    assert before == [("fast", 0), ("fast", 1), ("fast", 2)]
+    # Each game's events are still handled in the order sent
+    assert [n for game, n in handled if game == "slow"] == [0, 1, 2]
+    # Idle games leave no task behind
+    assert bus.stats()["inbox_games"] == 0
+
+
+def test_a_full_inbox_rejects_the_event(fake_redis):
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def on_inbox(message):
+            await gate.wait()
+
+        bus = GameBus("w1", enabled=True, inbox_size=2)
+        await bus.start(on_inbox)
+        for n in range(4):
+            bus._dispatch({"game_id": "g1", "player_id": 7, "kind": "action", "n": n})
+            await asyncio.sleep(0)
+        gate.set()
+        await _stop(bus)
+        return bus
+
+    bus = asyncio.run(scenario())
+    # The first event is being handled, two wait, the last is refused with an error
+    assert bus.stats()["inbox_rejected"] == 1
+    # The sender was told so
+    assert bus.stats()["published"] == 1
+
+
+def test_outbox_is_bounded(fake_redis):
+    async def scenario():
+        bus = GameBus("w1", enabled=True, outbox_size=5)
+        await bus.start(lambda message: asyncio.sleep(0))
+        for n in range(8):
+            bus.publish("g1", {"type": "chat", "n": n})
+        stats = bus.stats()
+        await _stop(bus)
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert stats["outbox"] == 5
+    assert stats["outbox_dropped"] == 3
+
+
+def test_relayed_messages_reach_local_sockets(fake_redis, recording_connection):
+    async def scenario():
+        owner = GameBus("owner", enabled=True)
+        relay = GameBus("relay", enabled=True)
+        await owner.start(lambda message: asyncio.sleep(0))
+        await relay.start(lambda message: asyncio.sleep(0))
+        everyone, only_two = recording_connection(), recording_connection()
+        await relay.attach("g1", 1, everyone)
+        await relay.attach("g1", 2, only_two)
+        owner.publish("g1", {"type": "game_update", "state": {"n": 1}})
+        owner.publish("g1", {"type": "error", "message": "no"}, to=2)
+        for _ in range(50):
+            await asyncio.sleep(0.02)
+            if len(only_two.frames) == 2:
+                break
+        await relay.detach("g1", 1, everyone)
+        await relay.detach("g1", 2, only_two)
+        stats = relay.stats()
+        await _stop(owner)
+        await _stop(relay)
+        return everyone, only_two, stats
+
+    everyone, only_two, stats = asyncio.run(scenario())
+    assert everyone.received() == [{"type": "game_update", "state": {"n": 1}}]
+    assert [is_state for _, is_state in everyone.frames] == [True]
+    assert [m["type"] for m in only_two.received()] == ["game_update", "error"]
+    assert stats["relayed_games"] == 0
+    assert game_channel("g1") == "game_bus:g1"
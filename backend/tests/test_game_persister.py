@@ -0,0 +1,86 @@
+import asyncio
+
+import app.db.redis_pool as redis_pool
+from app.models.event_log import GameEventLog
+from app.models.Game import Game
+from app.models.RedisGameStore import RedisGameStore
+from app.services.game_persister import GamePersister
+
+
+def _persister(snapshot_every: int = 5) -> GamePersister:
+    return GamePersister(GameEventLog(), RedisGameStore(), interval=60, snapshot_every=snapshot_every)
+
+
+def _log(persister: GamePersister, game: Game, count: int):
+    for _ in range(count):
+        game.event_seq += 1
+        game.events_since_snapshot += 1
+        event = GameEventLog.make_event(10, "roll_dice", {}, [(1, 2)])
+        persister.add_event(game, game.event_seq, event)
+
+
+class BrokenRedis:
+    def pipeline(self, transaction=True):
+        raise ConnectionError("redis is down")
+
+
+def test_changes_between_ticks_are_written_once(fake_redis, game):
+    persister = _persister()
+
+    async def scenario():
+        for _ in range(10):
+            persister.mark_dirty(game)
+        _log(persister, game, 3)
+        flushed = await persister.flush()
+        return flushed, await persister.flush(), await fake_redis.xlen(GameEventLog.key(game.id))
+
+    flushed, again, logged = asyncio.run(scenario())
+    assert (flushed, again) == (1, 0)
+    assert logged == 3
+    assert persister.stats()["flushes"] == 1
+    # Three actions are fewer than snapshot_every, so no snapshot yet
+    assert persister.snapshots_written == 0
+
+
+def test_snapshot_after_enough_actions(fake_redis, game):
+    persister = _persister(snapshot_every=5)
+
+    async def scenario():
+        _log(persister, game, 5)
+        await persister.flush()
+        return await fake_redis.hget(RedisGameStore.key(game.id), "event_seq")
+
+    assert asyncio.run(scenario()) == "5"
+    assert persister.snapshots_written == 1
+    assert game.events_since_snapshot == 0
+
+
+def test_forced_snapshot_is_written_without_actions(fake_redis, game):
+    persister = _persister()
+
+    async def scenario():
+        persister.mark_dirty(game, snapshot=True)
+        await persister.flush()
+        return await RedisGameStore().load_game(game.id)
+
+    loaded = asyncio.run(scenario())
+    assert [p["user_id"] for p in loaded.players_list()] == [10, 11, 12]
+
+
+def test_failed_flush_is_retried(fake_redis, monkeypatch, game):
+    persister = _persister()
+
+    async def scenario():
+        _log(persister, game, 2)
+        persister.mark_dirty(game, snapshot=True)
+        monkeypatch.setattr(redis_pool, "_client", BrokenRedis())
+        failed = await persister.flush()
+        monkeypatch.setattr(redis_pool, "_client", fake_redis)
+        retried = await persister.flush()
+        return failed, retried, await fake_redis.xlen(GameEventLog.key(game.id))
+
+    failed, retried, logged = asyncio.run(scenario())
+    assert (failed, retried) == (0, 1)
+    assert logged == 2
+    assert persister.snapshots_written == 1
+    assert not persister.is_dirty(game.id)
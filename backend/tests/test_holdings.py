@@ -0,0 +1,45 @@
+import random
+
+from app.models.board_index import get_board_index
+from app.models.holdings import PlayerHoldings, compute_holdings
+
+INDEX = get_board_index()
+
+
+def test_add_then_remove_is_a_no_op():
+    holdings = PlayerHoldings()
+    holdings.add(INDEX, 1, 2, False)
+    holdings.add(INDEX, 5, 0, True)
+    assert holdings.as_tuple() == (2, (("Brown", 1), ("Railroad", 1)), 1, 0, 2, 1)
+    holdings.remove(INDEX, 1, 2, False)
+    holdings.remove(INDEX, 5, 0, True)
+    assert holdings.as_tuple() == PlayerHoldings().as_tuple()
+
+
+def test_counters_track_every_ownership_change(game):
+    rng = random.Random(7)
+    squares = sorted(INDEX.purchasable)
+    for _ in range(500):
+        sid = rng.choice(squares)
+        op = rng.randrange(3)
+        if op == 0:
+            game._set_owner(sid, rng.choice([None, 0, 1, 2]))
+        elif op == 1 and INDEX.types[sid] == "Property":
+            game._set_houses(sid, rng.randrange(6))
+        else:
+            game._set_mortgaged(sid, rng.random() < 0.5)
+
+        expected = compute_holdings(INDEX, game.state["mutable_properties"])
+        for owner in expected.keys() | game.holdings.keys():
+            assert game.holdings.get(owner, PlayerHoldings()).as_tuple() == expected.get(
+                owner, PlayerHoldings()
+            ).as_tuple()
+
+
+def test_monopoly_needs_the_whole_group(game):
+    game._set_owner(1, 0)
+    assert not game._check_monopoly(10, "Brown")
+    game._set_owner(3, 0)
+    assert game._check_monopoly(10, "Brown")
+    game._set_owner(3, 1)
+    assert not game._check_monopoly(10, "Brown")
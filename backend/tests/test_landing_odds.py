@@ -0,0 +1,53 @@
+import pytest
+
+from app.models.Game import BOARD_INDEX, CHANCE_CARDS, COMMUNITY_CHEST_CARDS
+from app.services.landing_odds import (
+    _transitions,
+    fingerprint,
+    get_landing_odds,
+    solve,
+)
+
+DECKS = {"chance": CHANCE_CARDS, "community": COMMUNITY_CHEST_CARDS}
+
+
+@pytest.mark.parametrize("jail_strategy", ["roll", "pay"])
+def test_every_transition_row_is_a_distribution(jail_strategy):
+    for state, row in _transitions(BOARD_INDEX, DECKS, jail_strategy).items():
+        assert sum(row.values()) == pytest.approx(1.0, abs=1e-12), state
+        assert all(p >= 0 for p in row.values())
+
+
+@pytest.mark.parametrize("jail_strategy", ["roll", "pay"])
+def test_stationary_distribution_sums_to_one(jail_strategy):
+    result = get_landing_odds(jail_strategy)
+    total = result["in_jail"] + sum(sq["probability"] for sq in result["squares"])
+    assert total == pytest.approx(1.0, abs=1e-9)
+
+
+def test_known_shape_of_the_board():
+    squares = get_landing_odds("roll")["squares"]
+    probability = {sq["id"]: sq["probability"] for sq in squares}
+    # Nobody ever stays on Go To Jail
+    assert probability[30] == 0
+    # Illinois Avenue is the most landed-on property on the standard board
+    properties = [sid for sid in probability if BOARD_INDEX.types[sid] == "Property"]
+    assert max(properties, key=probability.get) == 24
+    # Rent per roll scales with the probability of landing there
+    boardwalk = squares[39]
+    assert boardwalk["rent_per_roll"]["unimproved"] == pytest.approx(
+        BOARD_INDEX.rent(39, 0, 0) * boardwalk["probability"]
+    )
+
+
+def test_staying_in_jail_spends_more_time_there():
+    assert get_landing_odds("roll")["in_jail"] > get_landing_odds("pay")["in_jail"]
+
+
+def test_results_are_cached_per_board_and_decks():
+    assert get_landing_odds("roll") is get_landing_odds("roll")
+    base = fingerprint(BOARD_INDEX, CHANCE_CARDS, COMMUNITY_CHEST_CARDS)
+    assert fingerprint(BOARD_INDEX, CHANCE_CARDS[:-1], COMMUNITY_CHEST_CARDS) != base
+    assert solve(BOARD_INDEX, CHANCE_CARDS, COMMUNITY_CHEST_CARDS, "roll")["squares"] == (
+        get_landing_odds("roll")["squares"]
+    )
@@ -0,0 +1,76 @@
+import asyncio
+
+from app.services import login_throttle as throttle_module
+from app.services.login_throttle import LoginThrottle, SlidingWindowSketch
+
+
+def test_sketch_counts_within_the_window():
+    sketch = SlidingWindowSketch(window=10, buckets=5, width=256, depth=4)
+    for t in range(6):
+        sketch.add("1.2.3.4", now=100 + t)
+    sketch.add("5.6.7.8", now=105)
+    assert sketch.count("1.2.3.4", now=105) == 6
+    assert sketch.count("5.6.7.8", now=105) == 1
+    assert sketch.count("9.9.9.9", now=105) == 0
+    # Buckets older than the window are zeroed as the ring comes round
+    assert sketch.count("1.2.3.4", now=111) == 4
+    assert sketch.count("1.2.3.4", now=200) == 0
+
+
+def test_sketch_never_undercounts_under_collisions():
+    sketch = SlidingWindowSketch(window=10, buckets=2, width=8, depth=2)
+    keys = [f"10.0.0.{i}" for i in range(100)]
+    for i, key in enumerate(keys):
+        for _ in range(i % 5 + 1):
+            sketch.add(key, now=1)
+    assert all(sketch.count(key, now=1) >= i % 5 + 1 for i, key in enumerate(keys))
+
+
+def test_ip_limit_covers_every_attempt(monkeypatch):
+    monkeypatch.setattr(throttle_module, "LOGIN_IP_LIMIT", 3)
+
+    async def scenario():
+        throttle = LoginThrottle(window=60, use_redis=False)
+        results = [await throttle.check(None, "1.2.3.4") for _ in range(3)]
+        results.append(await throttle.check("alice", "1.2.3.4"))
+        results.append(await throttle.check("alice", "5.6.7.8"))
+        return throttle, results
+
+    throttle, results = asyncio.run(scenario())
+    assert results[:3] == [None, None, None]
+    assert results[3] >= 1
+    assert results[4] is None
+    assert throttle.stats()["refused_ip"] == 1
+
+
+def test_failed_attempts_lock_only_that_username(monkeypatch):
+    monkeypatch.setattr(throttle_module, "LOGIN_USER_LIMIT", 2)
+
+    async def scenario():
+        throttle = LoginThrottle(window=60, use_redis=False)
+        for _ in range(2):
+            await throttle.failed("alice")
+        return (
+            await throttle.check("alice", "1.1.1.1"),
+            await throttle.check("bob", "1.1.1.1"),
+            # Registrations carry no username, so a locked account does not block them
+            await throttle.check(None, "1.1.1.1"),
+        )
+
+    alice, bob, register = asyncio.run(scenario())
+    assert alice is not None and bob is None and register is None
+
+
+def test_redis_mode_shares_counts(fake_redis, monkeypatch):
+    monkeypatch.setattr(throttle_module, "LOGIN_IP_LIMIT", 2)
+
+    async def scenario():
+        first, second = LoginThrottle(window=60, use_redis=True), LoginThrottle(window=60, use_redis=True)
+        return [
+            await first.check("alice", "1.2.3.4"),
+            await second.check(None, "1.2.3.4"),
+            await second.check("alice", "1.2.3.4"),
+        ]
+
+    results = asyncio.run(scenario())
+    assert results[:2] == [None, None] and results[2] is not None
@@ -0,0 +1,171 @@
+import asyncio
+import json
+
+from app.models.matchmaking import MatchGroup
+from app.services.match_queue import TARGETS_KEY, RedisMatchQueue, notify_channel, socket_key
+
+
+async def _queue_group(redis, gid, target, players, created_at, rating=None):
+    fields = {"target": target, "players": ",".join(map(str, players)), "created_at": created_at}
+    if rating is not None:
+        fields["rating"] = rating
+    await redis.hset(f"mm_group:{gid}", mapping=fields)
+    await redis.zadd(f"mm_queue:{target}", {gid: created_at})
+    await redis.sadd(TARGETS_KEY, target)
+
+
+def test_load_reuses_known_groups_and_fetches_new_ones(fake_redis):
+    async def scenario():
+        await _queue_group(fake_redis, "a", 4, [1, 2], 10.0, 1300)
+        await _queue_group(fake_redis, "b", 2, [3], 11.0)
+        known = {"a": MatchGroup.restore("a", [1, 2], 4, 10.0, 1300), "gone": MatchGroup([9])}
+        return known, await RedisMatchQueue("w1").load(known)
+
+    known, groups = asyncio.run(scenario())
+    assert set(groups) == {"a", "b"}
+    assert groups["a"] is known["a"]
+    b = groups["b"]
+    assert (b.player_ids, b.target_size, b.created_at) == ([3], 2, 11.0)
+    # Parties queued before ratings existed get the default
+    assert b.rating == 1200.0
+
+
+def test_load_drops_groups_that_expired(fake_redis):
+    async def scenario():
+        await _queue_group(fake_redis, "a", 2, [1], 10.0)
+        await _queue_group(fake_redis, "b", 2, [2], 11.0)
+        # The worker holding b's socket died, so nothing renewed it
+        await fake_redis.delete("mm_group:b")
+        groups = await RedisMatchQueue("w1").load({})
+        return groups, await fake_redis.zrange("mm_queue:2", 0, -1)
+
+    groups, queued = asyncio.run(scenario())
+    assert set(groups) == {"a"}
+    assert queued == ["a"]
+
+
+def test_sockets_expire_unless_refreshed(fake_redis):
+    async def scenario():
+        await RedisMatchQueue("w1").register_socket(5)
+        return await fake_redis.pttl(socket_key(5))
+
+    assert 0 < asyncio.run(scenario()) <= 15000
+
+
+def test_sockets_are_only_unregistered_by_their_worker(fake_redis):
+    async def scenario():
+        await RedisMatchQueue("w1").register_socket(5)
+        await RedisMatchQueue("w2").unregister_socket(5)
+        kept = await fake_redis.get(socket_key(5))
+        await RedisMatchQueue("w1").unregister_socket(5)
+        return kept, await fake_redis.get(socket_key(5))
+
+    assert asyncio.run(scenario()) == ("w1", None)
+
+
+def test_notifications_reach_the_worker_holding_the_socket(fake_redis):
+    async def scenario():
+        await RedisMatchQueue("w1").register_socket(5)
+        pubsub = fake_redis.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(notify_channel("w1"))
+        await RedisMatchQueue("w2").notify({5: {"action": "match_found"}, 6: {"action": "x"}})
+        message = None
+        for _ in range(20):
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=0.05)
+            if message:
+                break
+        await pubsub.aclose()
+        return message
+
+    message = asyncio.run(scenario())
+    assert RedisMatchQueue.decode_notification(message["data"]) == (5, {"action": "match_found"})
+
+
+def test_malformed_notifications_are_ignored():
+    assert RedisMatchQueue.decode_notification("not json") is None
+    assert RedisMatchQueue.decode_notification(json.dumps({"message": {}})) is None
+    assert RedisMatchQueue.decode_notification(json.dumps([1])) is None
+
+
+# The scripts below need fakeredis' Lua support (lupa, in the dev dependencies)
+
+
+def test_rejoining_replaces_the_old_party(fake_redis):
+    queue = RedisMatchQueue("w1")
+    old, new = MatchGroup([1, 2], 4), MatchGroup([2, 3], 4)
+
+    async def scenario():
+        await queue.enqueue(old)
+        await queue.enqueue(new)
+        users = [await fake_redis.get(f"mm_user:{uid}") for uid in (1, 2, 3)]
+        return users, await queue.load({}), await fake_redis.exists(f"mm_group:{old.id}")
+
+    users, groups, old_left = asyncio.run(scenario())
+    assert users == [None, new.id, new.id]
+    assert set(groups) == {new.id}
+    assert groups[new.id].player_ids == [2, 3]
+    assert not old_left
+
+
+def test_leaving_drops_the_whole_party(fake_redis):
+    queue = RedisMatchQueue("w1")
+    group = MatchGroup([1, 2], 4)
+
+    async def scenario():
+        await queue.enqueue(group)
+        await queue.leave(2)
+        return await queue.load({}), await fake_redis.get("mm_user:1")
+
+    assert asyncio.run(scenario()) == ({}, None)
+
+
+def test_a_table_is_claimed_whole_or_not_at_all(fake_redis):
+    queue = RedisMatchQueue("w1")
+    a, b, c, d = (MatchGroup([uid], 2) for uid in (1, 2, 3, 4))
+
+    async def scenario():
+        for group in (a, b, c, d):
+            await queue.enqueue(group)
+        # b leaves between the matcher's pass and its claim
+        await queue.leave(2)
+        claimed = await queue.claim([[a.id, b.id], [c.id, d.id]])
+        return claimed, await queue.load({}), await fake_redis.get("mm_user:1")
+
+    claimed, groups, user_1 = asyncio.run(scenario())
+    assert claimed == [False, True]
+    # a stays queued for the next pass; c and d are gone
+    assert set(groups) == {a.id}
+    assert user_1 == a.id
+
+
+def test_the_matcher_lease_belongs_to_its_holder(fake_redis):
+    first, second = RedisMatchQueue("w1"), RedisMatchQueue("w2")
+
+    async def scenario():
+        taken = [await first.hold_matcher_lease(), await second.hold_matcher_lease()]
+        # Renewing our own lease works; releasing someone else's does nothing
+        taken.append(await first.hold_matcher_lease())
+        await second.release_matcher_lease()
+        holder = await fake_redis.get("mm_matcher")
+        await first.release_matcher_lease()
+        taken.append(await second.hold_matcher_lease())
+        return taken, holder, await fake_redis.get("mm_matcher")
+
+    assert asyncio.run(scenario()) == ([True, False, True, True], "w1", "w2")
+
+
+def test_refresh_keeps_a_party_alive(fake_redis):
+    queue = RedisMatchQueue("w1")
+    group = MatchGroup([1, 2], 4)
+
+    async def scenario():
+        await queue.register_socket(1)
+        await queue.enqueue(group)
+        keys = [socket_key(1), f"mm_group:{group.id}", "mm_user:1", "mm_user:2"]
+        for key in keys:
+            await fake_redis.pexpire(key, 100)
+        # Only player 1 has a socket here, but the whole party is renewed
+        await queue.refresh([1])
+        return [await fake_redis.pttl(key) for key in keys]
+
+    assert all(ttl > 1000 for ttl in asyncio.run(scenario()))
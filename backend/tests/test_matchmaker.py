@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from app.models.matchmaking import MatchGroup
+from app.services import matchmaker as matchmaker_module
+from app.services.matchmaker import TABLE_FILLS, TABLE_SIZES, Matchmaker, _partitions
+
+
+def test_partitions_cover_every_combination_once():
+    assert _partitions(3, 4) == ((3,), (2, 1), (1, 1, 1))
+    assert _partitions(4, 2) == ((2, 2), (2, 1, 1), (1, 1, 1, 1))
+    assert _partitions(0, 4) == ((),)
+
+
+def test_table_fills_are_precomputed_for_allowed_sizes_only():
+    assert set(TABLE_FILLS) == set(TABLE_SIZES) == {2, 3, 4}
+    for target, fills in TABLE_FILLS.items():
+        assert set(fills) == set(range(1, target + 1))
+        for anchor, parts in fills.items():
+            assert all(anchor + sum(p) == target for p in parts)
+    assert TABLE_FILLS[4][4] == ((),)
+
+
+@pytest.mark.parametrize("players,target", [([1], 5), ([1], 1), ([1, 2, 3], 2), ([1], "4")])
+def test_join_rejects_unplayable_tables(fake_redis, players, target):
+    matchmaker = Matchmaker(distributed=False)
+    with pytest.raises(ValueError):
+        asyncio.run(matchmaker.join(MatchGroup(players, target_size=target)))
+    assert not matchmaker.groups
+
+
+def test_mixed_party_sizes_fill_a_table(fake_redis):
+    matchmaker = Matchmaker(distributed=False)
+    started = []
+
+    async def record(tables):
+        started.extend(tables)
+
+    matchmaker._trigger_game_start = record
+
+    async def scenario():
+        await matchmaker.join(MatchGroup([1, 2], target_size=4))
+        await matchmaker.join(MatchGroup([3], target_size=4))
+        await matchmaker.join(MatchGroup([4], target_size=3))
+        await matchmaker.join(MatchGroup([5], target_size=4))
+        await matchmaker.check_and_start_matches()
+
+    asyncio.run(scenario())
+    assert [sorted(p for g in table for p in g.player_ids) for table in started] == [[1, 2, 3, 5]]
+    # The party waiting for a 3-player table stays queued
+    assert list(matchmaker.by_user) == [4]
+
+
+def _queued(matchmaker: Matchmaker, ratings, target=4, created_at=0.0):
+    groups = []
+    for n, rating in enumerate(ratings):
+        group = MatchGroup([100 + len(matchmaker.groups)], target_size=target, rating=rating)
+        group.created_at = created_at + n
+        matchmaker.add_group(group)
+        groups.append(group)
+    return groups
+
+
+def test_band_widens_with_waiting_up_to_the_cap():
+    group = MatchGroup([1])
+    group.created_at = 0.0
+    assert Matchmaker.band(group, 0) == 100
+    assert Matchmaker.band(group, 10) == 200
+    assert Matchmaker.band(group, 10_000) == 1000
+
+
+def test_range_search_takes_the_closest_ratings_in_band():
+    matchmaker = Matchmaker(distributed=False)
+    groups = _queued(matchmaker, [1000, 1190, 1230, 1260, 1500])
+    anchor = MatchGroup([1], rating=1200)
+    found = matchmaker._in_band(4, 1, anchor, band=100)
+    assert [g.rating for g in found] == [1190, 1230, 1260]
+    # Results come back oldest first
+    assert found == sorted(found, key=lambda g: g.created_at)
+    assert matchmaker._in_band(4, 2, anchor, band=100) == []
+    assert groups[4] in matchmaker._in_band(4, 1, anchor, band=400)
+
+
+def test_removing_groups_keeps_the_index_in_step():
+    matchmaker = Matchmaker(distributed=False)
+    groups = _queued(matchmaker, [1200] * 50 + [1250] * 50)
+    for group in groups[::2]:
+        matchmaker.remove_group(group.id)
+    index = matchmaker.by_rating[4][1]
+    assert [entry[2] for entry in index] == [g.id for g in groups[1::2]]
+    assert len(matchmaker.groups) == 50
+
+
+def test_join_falls_back_to_the_default_rating_without_redis(monkeypatch):
+    async def unavailable(user_ids):
+        raise ConnectionError("redis is down")
+
+    monkeypatch.setattr(matchmaker_module, "get_ratings", unavailable)
+    matchmaker = Matchmaker(distributed=False)
+    group = MatchGroup([1, 2], target_size=4, rating=0)
+    asyncio.run(matchmaker.join(group))
+    assert group.rating == 1200.0
+    assert matchmaker.get_group(group.id) is group
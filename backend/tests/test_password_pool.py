@@ -0,0 +1,83 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.services.password_pool import (
+    PasswordPool,
+    PasswordPoolBusy,
+    check_password,
+    hash_password,
+    needs_rehash,
+)
+
+
+def test_needs_rehash_compares_the_cost():
+    hashed = hash_password("secret", 4)
+    assert hashed.startswith("$2b$04$")
+    assert not needs_rehash(hashed, 4)
+    assert needs_rehash(hashed, 12)
+    assert needs_rehash("not a bcrypt hash", 4)
+    assert needs_rehash("", 4)
+
+
+def test_pool_hashes_and_checks_off_the_loop():
+    pool = PasswordPool(workers=2, max_pending=4)
+    threads = set()
+
+    def on_thread(password):
+        threads.add(threading.current_thread().name)
+        return hash_password(password, 4)
+
+    async def scenario():
+        hashed = await pool.run(on_thread, "secret")
+        ok = await pool.run(check_password, "secret", hashed)
+        wrong = await pool.run(check_password, "guess", hashed)
+        await asyncio.sleep(0)  # let the completion callbacks land
+        return ok, wrong
+
+    try:
+        assert asyncio.run(scenario()) == (True, False)
+    finally:
+        pool.shutdown()
+    assert all(name.startswith("bcrypt") for name in threads)
+    assert pool.stats()["completed"] == 3 and pool.pending == 0
+
+
+def test_full_pool_refuses_at_once():
+    pool = PasswordPool(workers=1, max_pending=1)
+    gate = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(pool.run(gate.wait))
+        await asyncio.sleep(0)
+        with pytest.raises(PasswordPoolBusy):
+            await pool.run(gate.wait)
+        gate.set()
+        await running
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+    assert pool.rejected == 1
+
+
+def test_work_finishing_after_the_loop_closed_is_harmless(caplog):
+    pool = PasswordPool(workers=1, max_pending=2)
+    gate = threading.Event()
+
+    async def scenario():
+        # Abandoned by its caller; still running when the loop goes away
+        asyncio.ensure_future(pool.run(gate.wait))
+        await asyncio.sleep(0)
+
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(scenario())
+    loop.close()
+    executor = pool._executor
+    gate.set()
+    pool.shutdown()
+    executor.shutdown(wait=True)
+    # concurrent.futures logs callbacks that raise, e.g. on a closed loop
+    assert not [r for r in caplog.records if r.name == "concurrent.futures"]
@@ -0,0 +1,39 @@
+from app.models.Player import Player
+
+
+def test_dump_is_reused_until_a_field_changes():
+    player = Player(user_id=1, id=0)
+    first = player.dump()
+    assert player.dump() is first
+    player.money -= 100
+    second = player.dump()
+    assert second is not first and second["money"] == 1400
+
+
+def test_in_place_mutation_needs_mark_dirty():
+    player = Player(user_id=1, id=0)
+    first = player.dump()
+    player.properties.append(5)
+    player.mark_dirty()
+    assert player.dump() is not first
+    assert player.dump()["properties"] == [5]
+
+
+def test_player_list_is_rebuilt_only_for_changes(game):
+    players = game.players_list()
+    by_user = game.get_players()
+    assert game.players_list() is players and game.get_players() is by_user
+    assert [p["user_id"] for p in players] == [10, 11, 12]
+
+    game.players_map[11].position = 7
+    rebuilt = game.players_list()
+    assert rebuilt is not players
+    # Unchanged players keep their cached dicts
+    assert rebuilt[0] is players[0] and rebuilt[2] is players[2]
+    assert rebuilt[1]["position"] == 7
+
+
+def test_player_list_follows_players_leaving(game):
+    game.players_list()
+    del game.players_map[12]
+    assert [p["user_id"] for p in game.players_list()] == [10, 11]
@@ -0,0 +1,56 @@
+import pickle
+
+import pytest
+
+from app.models.board_index import get_board_index
+from app.models.property_table import PropertyTable
+
+INDEX = get_board_index()
+
+
+def _sample() -> PropertyTable:
+    table = PropertyTable()
+    table[1] = {"owner_id": 0, "houses": 3, "is_mortgaged": False}
+    table[5] = {"owner_id": 7, "houses": 0, "is_mortgaged": True}
+    table[39]["owner_id"] = 2
+    table[39]["houses"] = 5
+    return table
+
+
+def test_starts_with_everything_unowned():
+    table = PropertyTable()
+    assert list(table) == sorted(INDEX.purchasable)
+    assert all(
+        dict(prop) == {"owner_id": None, "houses": 0, "is_mortgaged": False}
+        for prop in table.values()
+    )
+
+
+def test_views_read_and_write_the_packed_buffer():
+    table = _sample()
+    assert dict(table[1]) == {"owner_id": 0, "houses": 3, "is_mortgaged": False}
+    assert dict(table[5]) == {"owner_id": 7, "houses": 0, "is_mortgaged": True}
+    assert table[39]["owner_id"] == 2 and table[39]["houses"] == 5
+    table[1]["owner_id"] = None
+    assert table[1]["owner_id"] is None
+
+
+def test_round_trips_through_bytes_dict_and_pickle():
+    table = _sample()
+    data = table.to_bytes()
+    assert len(data) == 3 * INDEX.size
+    assert PropertyTable.from_bytes(data).to_dict() == table.to_dict()
+    assert PropertyTable.from_dict(table.to_dict()).to_bytes() == data
+    assert pickle.loads(pickle.dumps(table)).to_bytes() == data
+
+
+def test_rejects_squares_that_cannot_be_owned_and_bad_sizes():
+    table = PropertyTable()
+    with pytest.raises(KeyError):
+        table[0]
+    with pytest.raises(KeyError):
+        table[0] = {"owner_id": 1}
+    with pytest.raises(TypeError):
+        del table[1]
+    with pytest.raises(ValueError):
+        PropertyTable.from_bytes(b"\x00" * 10)
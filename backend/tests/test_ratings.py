@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+
+from app.services.ratings import elo_updates, get_ratings, party_rating, record_result
+
+
+def test_equal_players_split_k_across_the_losers():
+    new = elo_updates({1: 1200, 2: 1200, 3: 1200}, winner=1, k=32)
+    assert new[1] == pytest.approx(1216)
+    assert new[2] == new[3] == pytest.approx(1192)
+    # Ratings are only moved around, never created
+    assert sum(new.values()) == pytest.approx(3600)
+
+
+def test_upsets_move_ratings_further():
+    favourite = elo_updates({1: 1600, 2: 1200}, winner=1, k=32)
+    upset = elo_updates({1: 1600, 2: 1200}, winner=2, k=32)
+    assert upset[2] - 1200 > favourite[1] - 1600 > 0
+
+
+def test_unknown_winner_changes_nothing():
+    assert elo_updates({1: 1300, 2: 1100}, winner=9) == {1: 1300, 2: 1100}
+    assert party_rating([]) == 1200.0
+    assert party_rating([1100, 1300]) == 1200.0
+
+
+def test_a_game_is_rated_once(fake_redis):
+    async def scenario():
+        first = await record_result("g1", [1, 2], winner=1)
+        again = await record_result("g1", [1, 2], winner=1)
+        return first, again, await get_ratings([1, 2, 3])
+
+    first, again, stored = asyncio.run(scenario())
+    assert again == {}
+    assert stored == {1: round(first[1], 2), 2: round(first[2], 2), 3: 1200.0}
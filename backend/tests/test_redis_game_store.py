@@ -0,0 +1,68 @@
+import asyncio
+import json
+
+from app.models.RedisGameStore import RedisGameStore
+
+ALWAYS_WRITTEN = {"state", "turn", "event_seq"}
+
+
+def test_first_write_has_every_field(game):
+    fields, removed = RedisGameStore().dirty_fields(game)
+    assert set(fields) == ALWAYS_WRITTEN | {
+        "properties",
+        "decks",
+        "turn_order",
+        "player:10",
+        "player:11",
+        "player:12",
+    }
+    assert removed == []
+
+
+def test_later_writes_carry_only_what_changed(game):
+    store = RedisGameStore()
+    store.dirty_fields(game)
+    assert set(store.dirty_fields(game)[0]) == ALWAYS_WRITTEN
+
+    game.players_map[11].money -= 60
+    fields, _ = store.dirty_fields(game)
+    assert set(fields) == ALWAYS_WRITTEN | {"player:11"}
+    assert json.loads(fields["player:11"])["money"] == 1440
+
+    game._set_owner(1, 0)
+    assert set(store.dirty_fields(game)[0]) == ALWAYS_WRITTEN | {"properties"}
+
+
+def test_players_who_left_are_deleted(game):
+    store = RedisGameStore()
+    store.dirty_fields(game)
+    asyncio.run(game.leave_game(12))
+    fields, removed = store.dirty_fields(game)
+    assert removed == ["player:12"]
+    assert "player:12" not in fields
+
+
+def test_mark_all_dirty_rewrites_everything(game):
+    store = RedisGameStore()
+    store.dirty_fields(game)
+    game.mark_all_dirty()
+    assert len(store.dirty_fields(game)[0]) == 9
+
+
+def test_hash_round_trip(fake_redis, game):
+    store = RedisGameStore()
+    game._set_owner(1, 0)
+    game.players_map[10].money = 1200
+
+    async def scenario():
+        await store.save_game(game)
+        await store.save_game(game)
+        return await store.load_game(game.id), await store.load_game("missing")
+
+    loaded, missing = asyncio.run(scenario())
+    assert missing is None
+    assert json.dumps(loaded.to_redis(), default=str, sort_keys=True) == json.dumps(
+        game.to_redis(), default=str, sort_keys=True
+    )
+    # A freshly loaded game has nothing unsaved
+    assert set(store.dirty_fields(loaded)[0]) == ALWAYS_WRITTEN
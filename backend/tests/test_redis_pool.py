@@ -0,0 +1,24 @@
+import asyncio
+
+import app.db.redis_pool as redis_pool
+from app.config import REDIS_MAX_CONNECTIONS, REDIS_POOL_TIMEOUT
+
+
+def test_one_shared_pool_built_from_config(monkeypatch):
+    monkeypatch.setattr(redis_pool, "_client", None)
+    monkeypatch.setattr(redis_pool, "_pool", None)
+
+    client = redis_pool.get_redis()
+    assert redis_pool.get_redis() is client
+    assert redis_pool.init_redis() is client
+    pool = client.connection_pool
+    assert pool is redis_pool._pool
+    assert pool.max_connections == REDIS_MAX_CONNECTIONS
+    assert pool.timeout == REDIS_POOL_TIMEOUT
+    assert pool.connection_kwargs["decode_responses"] is True
+
+    # Nothing has connected yet, so closing needs no server
+    asyncio.run(redis_pool.close_redis())
+    assert redis_pool._client is None and redis_pool._pool is None
+    assert redis_pool.get_redis() is not client
+    asyncio.run(redis_pool.close_redis())
@@ -0,0 +1,96 @@
+import asyncio
+import time
+from uuid import uuid4
+
+from app.models.event_log import GameEventLog
+from app.models.RedisGameStore import RedisGameStore
+from app.services.sharding import (
+    WORKER_URLS_KEY,
+    WORKERS_KEY,
+    FencedWrites,
+    ShardRouter,
+    lease_key,
+    lease_lost,
+    rendezvous,
+)
+
+WORKERS = [f"worker-{i}" for i in range(5)]
+
+
+def test_rendezvous_is_stable_and_spreads_games():
+    games = [uuid4() for _ in range(2000)]
+    picks = {g: rendezvous(g, WORKERS) for g in games}
+    assert picks == {g: rendezvous(g, reversed(WORKERS)) for g in games}
+    counts = [list(picks.values()).count(w) for w in WORKERS]
+    assert min(counts) > 300
+
+
+def test_only_games_of_a_departed_worker_move():
+    games = [uuid4() for _ in range(2000)]
+    before = {g: rendezvous(g, WORKERS) for g in games}
+    after = {g: rendezvous(g, WORKERS[:-1]) for g in games}
+    moved = {g for g in games if before[g] != after[g]}
+    assert moved == {g for g in games if before[g] == WORKERS[-1]}
+
+
+async def _register(redis, *workers):
+    for worker in workers:
+        await redis.zadd(WORKERS_KEY, {worker: time.time()})
+        await redis.hset(WORKER_URLS_KEY, worker, f"http://{worker}")
+
+
+def _router() -> ShardRouter:
+    return ShardRouter("w1", "http://w1", enabled=True)
+
+
+def test_unknown_games_are_not_claimed(fake_redis):
+    async def scenario():
+        await _register(fake_redis, "w1")
+        owner = await _router().locate("no-such-game")
+        return owner, await fake_redis.get(lease_key("no-such-game"))
+
+    assert asyncio.run(scenario()) == (None, None)
+
+
+def test_saved_games_are_claimed_on_first_access(fake_redis):
+    async def scenario():
+        await _register(fake_redis, "w1")
+        await fake_redis.hset(RedisGameStore.key("g1"), "event_seq", "0")
+        owner = await _router().locate("g1")
+        return owner, await fake_redis.get(lease_key("g1"))
+
+    assert asyncio.run(scenario()) == (None, "w1")
+
+
+def test_games_held_elsewhere_are_routed_there(fake_redis):
+    async def scenario():
+        await _register(fake_redis, "w1", "w2")
+        await fake_redis.set(lease_key("g1"), "w2")
+        return await _router().locate("g1")
+
+    assert asyncio.run(scenario()) == ("w2", "http://w2")
+
+
+def test_fenced_writes_match_the_pipeline_commands(fake_redis, make_game):
+    store = RedisGameStore()
+    game = make_game("fenced", players=2)
+    writes = FencedWrites()
+    store.write(writes, game)
+    GameEventLog().append(writes, "fenced", 1, GameEventLog.make_event(10, "roll_dice", {}, [(3, 4)]))
+    assert [c[0] for c in writes.commands] == ["HSET", "XADD"]
+
+    async def scenario():
+        # What the fencing script runs once the lease checks out
+        for command in writes.commands:
+            await fake_redis.execute_command(*command)
+        return await store.load_game("fenced"), await GameEventLog().events_after("fenced", 0)
+
+    loaded, events = asyncio.run(scenario())
+    assert [p["user_id"] for p in loaded.players_list()] == [10, 11]
+    assert [(seq, e["dice"]) for seq, e in events] == [(1, [(3, 4)])]
+
+
+def test_lease_lost_only_matches_refused_writes():
+    assert lease_lost(Exception("LEASE_LOST game_owner:g1"))
+    assert not lease_lost(Exception("ERR The ID specified in XADD is equal or smaller"))
+    assert not lease_lost(1)
@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+
+from app.simulation.engine import play_game
+from app.simulation.policies import load_policy
+from app.simulation.runner import Aggregate, simulate
+
+
+def _policies(*names):
+    return [load_policy(name) for name in names]
+
+
+def test_same_seed_replays_the_same_game():
+    policies = _policies("cautious", "buy_all", "cautious")
+    first = play_game(policies, seed=11, max_turns=300)
+    second = play_game(policies, seed=11, max_turns=300)
+    assert (first.turns, first.winner, first.landings, first.bankrupt_order) == (
+        second.turns,
+        second.winner,
+        second.landings,
+        second.bankrupt_order,
+    )
+
+
+def test_turn_cap_stops_the_game_without_a_winner():
+    result = play_game(_policies("buy_all", "buy_all"), seed=3, max_turns=5)
+    assert result.turns == 5
+    assert result.winner is None
+
+
+def _result(turns, winner, landing_square=0):
+    landings = [0] * 40
+    landings[landing_square] = turns
+    return SimpleNamespace(turns=turns, winner=winner, landings=landings)
+
+
+def test_capped_games_are_kept_out_of_the_finished_statistics():
+    agg = Aggregate()
+    agg.add(_result(100, 0, landing_square=1))
+    agg.add(_result(300, 1, landing_square=1))
+    agg.add(_result(1000, None, landing_square=2))
+    summary = agg.summary(["a", "b"])
+    assert summary["games"] == 3
+    assert summary["capped"] == {"games": 1, "share": 0.3333}
+    finished = summary["finished"]
+    assert finished["games"] == 2
+    assert finished["turns"]["mean"] == 200
+    assert finished["turns"]["p99"] == 300
+    assert finished["wins_by_seat"] == {"0:a": 1, "1:b": 1}
+    assert finished["landing_share"][1] == 1.0 and finished["landing_share"][2] == 0
+
+
+def test_merging_batches_matches_one_batch():
+    results = [_result(t, t % 2, t % 40) for t in range(10, 30)] + [_result(1000, None)]
+    whole, left, right = Aggregate(), Aggregate(), Aggregate()
+    for i, result in enumerate(results):
+        whole.add(result)
+        (left if i % 2 else right).add(result)
+    left.merge(right)
+    assert left.summary(["a", "b"]) == whole.summary(["a", "b"])
+
+
+def test_simulate_in_process_counts_every_game():
+    agg = simulate(6, ["buy_all", "cautious"], seed=0, max_turns=50, workers=1, chunk_size=4)
+    assert agg.games == 6
+    assert agg.finished + agg.capped == 6
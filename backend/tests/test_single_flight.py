@@ -0,0 +1,80 @@
+import asyncio
+
+from app.models import gamesManager as games_manager
+
+
+def test_concurrent_gets_share_one_load(fake_redis, monkeypatch):
+    loads = []
+    real_load = games_manager.gamesManager._load_snapshot
+
+    async def counting_load(self, uid):
+        loads.append(uid)
+        await asyncio.sleep(0.01)
+        return await real_load(self, uid)
+
+    monkeypatch.setattr(games_manager.gamesManager, "_load_snapshot", counting_load)
+
+    async def scenario():
+        writer = games_manager.gamesManager()
+        game = await writer.create_game([1, 2, 3])
+        await writer.store.save_game(game)
+
+        reader = games_manager.gamesManager()
+        # A whole table reconnecting at once
+        results = await asyncio.gather(*(reader.get_game(str(game.id)) for _ in range(10)))
+        again = await reader.get_game(str(game.id))
+        return reader, results, again
+
+    reader, results, again = asyncio.run(scenario())
+    assert len(loads) == 1
+    assert all(r is results[0] for r in results) and again is results[0]
+    assert len(reader.games) == 1 and not reader._loading
+
+
+def test_one_caller_giving_up_does_not_cancel_the_load(fake_redis):
+    async def scenario():
+        writer = games_manager.gamesManager()
+        game = await writer.create_game([1, 2])
+        await writer.store.save_game(game)
+
+        reader = games_manager.gamesManager()
+        impatient = asyncio.ensure_future(reader.get_game(str(game.id)))
+        patient = asyncio.ensure_future(reader.get_game(str(game.id)))
+        await asyncio.sleep(0)
+        impatient.cancel()
+        return await patient, impatient
+
+    loaded, impatient = asyncio.run(scenario())
+    assert impatient.cancelled()
+    assert loaded is not None
+
+
+def test_missing_games_are_not_cached(fake_redis):
+    async def scenario():
+        manager = games_manager.gamesManager()
+        return await manager.get_game("00000000-0000-0000-0000-000000000000"), manager
+
+    missing, manager = asyncio.run(scenario())
+    assert missing is None and not manager.games and not manager._loading
+
+
+def test_big_states_are_decoded_off_the_loop(fake_redis, monkeypatch):
+    offloaded = []
+    real_to_thread = asyncio.to_thread
+
+    async def recording_to_thread(fn, *args):
+        offloaded.append(fn)
+        return await real_to_thread(fn, *args)
+
+    monkeypatch.setattr(games_manager, "GAME_LOAD_OFFLOAD_BYTES", 0)
+    monkeypatch.setattr(games_manager.asyncio, "to_thread", recording_to_thread)
+
+    async def scenario():
+        writer = games_manager.gamesManager()
+        game = await writer.create_game([1, 2])
+        await writer.store.save_game(game)
+        return await games_manager.gamesManager().get_game(str(game.id))
+
+    loaded = asyncio.run(scenario())
+    assert loaded is not None
+    assert len(offloaded) == 1
@@ -0,0 +1,50 @@
+import asyncio
+import json
+
+from app.models.Game import Game
+from app.services.game_actions import broadcast_snapshot, game_snapshot, snapshot_overlay
+from app.services.ws_codec import OVERLAY_TYPE, is_state_update
+
+
+def _deciding(game: Game) -> int:
+    current = game.turn_order[game.state["turn_index"]]
+    game.players_map[10 + current].position = 1  # Mediterranean Avenue
+    game.state["phase"] = "DECIDE_TO_BUY"
+    return 10 + current
+
+
+def test_snapshot_does_not_carry_the_property_for_sale(game):
+    _deciding(game)
+    snapshot = game_snapshot(game, "game_update")
+    assert is_state_update(snapshot)
+    assert "propertyForSale" not in snapshot["state"]
+    assert snapshot["state"]["phase"] == "DECIDE_TO_BUY"
+
+
+def test_only_the_deciding_player_gets_an_overlay(game):
+    deciding = _deciding(game)
+    overlays = {uid: snapshot_overlay(game, uid) for uid in game.players_map}
+    assert [uid for uid, o in overlays.items() if o] == [deciding]
+    overlay = overlays[deciding]
+    assert overlay["type"] == OVERLAY_TYPE
+    assert overlay["state"]["propertyForSale"]["id"] == 1
+    # Overlays add to the last state; the drop_stale policy must never skip one
+    assert not is_state_update(overlay)
+
+
+def test_no_overlay_outside_the_buy_decision(game):
+    assert all(snapshot_overlay(game, uid) is None for uid in game.players_map)
+
+
+def test_broadcast_is_encoded_once_per_encoding(game, recording_connection):
+    deciding = _deciding(game)
+    game.connections = {uid: recording_connection() for uid in game.players_map}
+    asyncio.run(broadcast_snapshot(game, "game_update"))
+    frames = [conn.frames for conn in game.connections.values()]
+    assert all(len(f) == 1 and f[0][1] for f in frames)
+    # The very same encoded object was queued on every connection
+    assert len({id(f[0][0]) for f in frames}) == 1
+    assert json.loads(frames[0][0][0])["type"] == "game_update"
+    sent = {uid: conn.messages for uid, conn in game.connections.items()}
+    assert [uid for uid, m in sent.items() if m] == [deciding]
+    assert sent[deciding][0]["type"] == OVERLAY_TYPE
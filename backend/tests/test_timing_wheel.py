@@ -0,0 +1,66 @@
+import asyncio
+
+from app.services.timing_wheel import TimingWheel
+
+
+def _advance(wheel: TimingWheel, ticks: int):
+    for _ in range(ticks):
+        wheel.advance()
+
+
+def test_fires_after_the_delay_rounded_up_to_ticks():
+    wheel = TimingWheel(tick=1.0, slots=8)
+    fired = []
+    wheel.schedule("a", 2.5, lambda: fired.append("a"))
+    _advance(wheel, 2)
+    assert fired == []
+    _advance(wheel, 1)
+    assert fired == ["a"] and len(wheel) == 0
+
+
+def test_deadlines_longer_than_one_turn():
+    wheel = TimingWheel(tick=1.0, slots=4)
+    fired = []
+    wheel.schedule("far", 10, lambda: fired.append("far"))
+    wheel.schedule("near", 2, lambda: fired.append("near"))
+    _advance(wheel, 9)
+    assert fired == ["near"]
+    _advance(wheel, 1)
+    assert fired == ["near", "far"]
+
+
+def test_rescheduling_and_cancelling():
+    wheel = TimingWheel(tick=1.0, slots=8)
+    fired = []
+    wheel.schedule("g", 2, lambda: fired.append("old"))
+    wheel.schedule("g", 4, lambda: fired.append("new"))
+    wheel.schedule("h", 1, lambda: fired.append("h"))
+    wheel.cancel("h")
+    wheel.cancel("missing")
+    assert len(wheel) == 1
+    _advance(wheel, 8)
+    assert fired == ["new"] and wheel.fired == 1
+
+
+def test_a_failing_callback_does_not_stop_the_others():
+    wheel = TimingWheel(tick=1.0, slots=8)
+    fired = []
+    wheel.schedule("bad", 1, lambda: 1 / 0)
+    wheel.schedule("good", 1, lambda: fired.append("good"))
+    wheel.advance()
+    assert fired == ["good"] and wheel.fired == 2
+
+
+def test_running_wheel_fires_on_time():
+    async def scenario():
+        wheel = TimingWheel(tick=0.01, slots=16)
+        fired = asyncio.Event()
+        wheel.schedule("g", 0.03, fired.set)
+        wheel.start()
+        try:
+            await asyncio.wait_for(fired.wait(), 1)
+        finally:
+            await wheel.stop()
+        return wheel
+
+    assert asyncio.run(scenario()).fired == 1
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from app.models.Game import BOARD_INDEX, CHANCE_CARDS
+from app.simulation.vectorized import (
+    C_MOVE,
+    C_NEAREST_RAILROAD,
+    BatchSimulator,
+    BoardArrays,
+    encode_deck,
+)
+
+
+def test_decks_encode_one_row_per_card():
+    deck = encode_deck(CHANCE_CARDS)
+    assert deck.shape == (len(CHANCE_CARDS), 3)
+    assert tuple(deck[0]) == (C_MOVE, 0, 0)
+    assert tuple(deck[3]) == (C_NEAREST_RAILROAD, 0, 0)
+    with pytest.raises(ValueError):
+        encode_deck([{"type": "TELEPORT"}])
+
+
+def test_board_arrays_match_the_board_index():
+    board = BoardArrays(BOARD_INDEX)
+    assert board.rail_rent.tolist() == [0, 25, 50, 100, 200]
+    assert board.utility_mult.tolist() == [0, 4, 10]
+    assert board.next_railroad[36] == 5
+    assert board.prices[39] == BOARD_INDEX.prices[39]
+    # Every member of a colour group lists the whole group
+    assert set(board.group_members[1].tolist()) == {1, 3}
+
+
+def test_same_seed_gives_the_same_batch():
+    first = BatchSimulator(200, seats=3, seed=5, buy_reserve=100).run(60)
+    second = BatchSimulator(200, seats=3, seed=5, buy_reserve=100).run(60)
+    assert first == second
+
+
+def test_summary_is_consistent():
+    sim = BatchSimulator(300, seats=4, seed=1, buy_reserve=0)
+    report = sim.run(80)
+    assert report["games"] == 300
+    assert 0 <= report["decided"] <= 300
+    assert sum(report["wins_by_seat"]) == report["decided"]
+    assert sum(report["landing_share"]) == pytest.approx(1.0, abs=1e-3)
+    assert int(sim.turns.max()) <= 80
+    # Eliminated seats own nothing and decided games have exactly one seat left
+    decided = sim.winner >= 0
+    assert (sim.alive[decided].sum(axis=1) == 1).all()
+    assert np.isin(sim.owner[decided], [-1, *range(4)]).all()
+
+
+def test_rejects_unknown_jail_strategy():
+    with pytest.raises(ValueError):
+        BatchSimulator(1, jail_strategy="bribe")
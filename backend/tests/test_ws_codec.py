@@ -0,0 +1,80 @@
+import json
+import zlib
+
+import msgpack
+import pytest
+
+from app.config import WS_COMPRESS_MIN_BYTES
+from app.services.ws_codec import (
+    FLAG_DEFLATE,
+    FLAG_PLAIN,
+    JSON,
+    MSGPACK,
+    OVERLAY_TYPE,
+    decode_frame,
+    encode_frame,
+    is_state_update,
+    negotiate,
+)
+
+
+def _snapshot(size: int) -> dict:
+    return {
+        "type": "game_update",
+        "state": {
+            "phase": "WAIT_FOR_ROLL",
+            "players": [{"user_id": i, "money": 1500, "name": "é"} for i in range(size)],
+            "mutable_properties": {1: {"houses": 2}},
+        },
+    }
+
+
+def test_negotiate_defaults_to_json():
+    assert negotiate(None) == JSON
+    assert negotiate("json") == JSON
+    assert negotiate("xml") == JSON
+    assert negotiate("msgpack") == MSGPACK
+
+
+def test_json_frames_are_text_like_json_dumps():
+    message = _snapshot(2)
+    frame = encode_frame(message, JSON)
+    assert isinstance(frame, str)
+    # int keys become strings, as with the stdlib encoder
+    assert json.loads(frame) == json.loads(json.dumps(message))
+    assert decode_frame(frame) == json.loads(json.dumps(message))
+
+
+@pytest.mark.parametrize("size,flag", [(1, FLAG_PLAIN), (200, FLAG_DEFLATE)])
+def test_msgpack_frames_round_trip(size, flag):
+    message = _snapshot(size)
+    frame = encode_frame(message, MSGPACK)
+    assert isinstance(frame, bytes) and frame[0] == flag
+    if flag == FLAG_DEFLATE:
+        # Only bodies past the threshold are compressed, and they shrink
+        assert len(frame) < WS_COMPRESS_MIN_BYTES < len(encode_frame(message, JSON))
+        body = zlib.decompress(frame[1:], -zlib.MAX_WBITS)
+    else:
+        body = frame[1:]
+        assert decode_frame(frame) == message
+    assert msgpack.unpackb(body, raw=False, strict_map_key=False) == message
+
+
+@pytest.mark.parametrize("frame", [b"", bytes((7,)) + b"\x80"])
+def test_malformed_frames_are_rejected(frame):
+    with pytest.raises(ValueError):
+        decode_frame(frame)
+
+
+def test_deflated_client_frames_are_refused():
+    # 64 MB of zeros deflates to about 64 KB; it must never be inflated
+    deflate = zlib.compressobj(9, zlib.DEFLATED, -zlib.MAX_WBITS)
+    bomb = deflate.compress(bytes(64 << 20)) + deflate.flush()
+    with pytest.raises(ValueError):
+        decode_frame(bytes((FLAG_DEFLATE,)) + bomb)
+
+
+def test_overlays_are_not_state_updates():
+    assert is_state_update({"type": "game_update", "state": {}})
+    assert not is_state_update({"type": OVERLAY_TYPE, "state": {}})
+    assert not is_state_update({"type": "chat", "message": "hi"})
@@ -0,0 +1,104 @@
+import asyncio
+
+from app.services import ws_connection
+from app.services.ws_connection import SLOW_CONSUMER_CLOSE_CODE, GameConnection
+
+
+class FakeSocket:
+    def __init__(self, fail_after=None, stall=False):
+        self.sent = []
+        self.closed_with = None
+        self.fail_after = fail_after
+        self.stall = stall
+
+    async def send_text(self, data):
+        if self.stall:
+            await asyncio.sleep(10)
+        if self.fail_after is not None and len(self.sent) >= self.fail_after:
+            raise RuntimeError("socket gone")
+        self.sent.append(data)
+
+    async def send_bytes(self, data):
+        await self.send_text(data)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+def _state(n):
+    return {"type": "game_update", "state": {"n": n}}
+
+
+def test_messages_are_sent_in_order():
+    async def scenario():
+        ws = FakeSocket()
+        conn = GameConnection(ws, 1).start()
+        for n in range(5):
+            conn.send({"type": "message", "n": n})
+        await asyncio.sleep(0.01)
+        await conn.close()
+        return ws, conn
+
+    ws, conn = asyncio.run(scenario())
+    assert len(ws.sent) == 5 and '"n":0' in ws.sent[0].replace(" ", "")
+    assert conn.sent == 5
+    assert conn not in ws_connection._live
+
+
+def test_full_queue_drops_superseded_states():
+    async def scenario():
+        conn = GameConnection(FakeSocket(), 1, max_queue=3, overflow_policy="drop_stale")
+        # Writer not started, so everything stays queued
+        for n in range(6):
+            conn.send(_state(n))
+        return conn
+
+    conn = asyncio.run(scenario())
+    # The fourth state supersedes the three queued ones
+    assert conn.depth == 3 and conn.dropped == 3
+    assert not conn.closed
+
+
+def test_full_queue_disconnects_under_disconnect_policy():
+    async def scenario():
+        ws = FakeSocket()
+        conn = GameConnection(ws, 1, max_queue=2, overflow_policy="disconnect")
+        for n in range(4):
+            conn.send(_state(n))
+        closing = conn._closing
+        await asyncio.sleep(0)
+        return ws, conn, closing
+
+    ws, conn, closing = asyncio.run(scenario())
+    assert conn.evicted and conn.closed
+    # One close, held by the connection until it has run
+    assert closing is conn._closing and closing.done()
+    assert ws.closed_with == SLOW_CONSUMER_CLOSE_CODE
+
+
+def test_stalled_send_closes_the_socket():
+    async def scenario():
+        ws = FakeSocket(stall=True)
+        conn = GameConnection(ws, 1, send_timeout=0.01).start()
+        conn.send(_state(0))
+        await asyncio.sleep(0.05)
+        return ws, conn
+
+    ws, conn = asyncio.run(scenario())
+    assert conn.evicted and ws.closed_with == SLOW_CONSUMER_CLOSE_CODE
+    assert conn not in ws_connection._live
+
+
+def test_failed_socket_retires_the_connection_and_keeps_its_counters():
+    async def scenario():
+        before = ws_connection.connection_metrics()["sent"]
+        conn = GameConnection(FakeSocket(fail_after=2), 1).start()
+        for n in range(4):
+            conn.send({"type": "message", "n": n})
+        await asyncio.sleep(0.01)
+        return before, conn
+
+    before, conn = asyncio.run(scenario())
+    assert conn.closed and conn.depth == 0
+    assert conn not in ws_connection._live
+    assert ws_connection.connection_metrics()["sent"] == before + 2
@@ -28,6 +28,8 @@ export function useGameSocket(gameId?: string, playerId?: number, onChatMessage?
     const [connected, setConnected] = useState(false);
     const [lastRawMessage, setLastRawMessage] = useState<any | null>(null);
     const [gameState, setGameState] = useState<any | null>(null);
+    // Set when the server sends us to the worker that owns this game
+    const [ownerBase, setOwnerBase] = useState<string | null>(null);
 
     const registerWsRef = useRef<WebSocket | null>(null);
     const actionWsRef = useRef<WebSocket | null>(null);
@@ -47,6 +49,16 @@ export function useGameSocket(gameId?: string, playerId?: number, onChatMessage?
             if (onChatMessage) onChatMessage(parsed.data);
             return; // Stop here, don't try to parse as game state
         }
+        // 2. This worker does not own the game: reconnect to the one that does
+        if (parsed && parsed.type === "redirect") {
+            setOwnerBase(parsed.base);
+            return;
+        }
+        // 3. Per-player additions (e.g. propertyForSale) that follow a full state broadcast
+        if (parsed && parsed.type === "state_overlay") {
+            setGameState((prev: any) => (prev ? { ...prev, ...parsed.state } : prev));
+            return;
+        }
         console.debug(parsed);
         setLastRawMessage(parsed);
 
@@ -69,7 +81,8 @@ export function useGameSocket(gameId?: string, playerId?: number, onChatMessage?
         }
 
         // Open register socket (to be added to game.connections on backend)
-        const registerUrl = `${baseUrl.replace(/^http/, "ws")}/ws/game/${gameId}?token=${token}&player_id=${dec.user_id}`;
+        const base = ownerBase ?? baseUrl;
+        const registerUrl = `${base.replace(/^http/, "ws")}/ws/game/${gameId}?token=${token}&player_id=${dec.user_id}`;
         const registerWs = new WebSocket(registerUrl);
         registerWsRef.current = registerWs;
 
@@ -91,7 +104,7 @@ export function useGameSocket(gameId?: string, playerId?: number, onChatMessage?
         };
 
         // Open action socket
-        const actionUrl = `${baseUrl.replace(/^http/, "ws")}/ws/game/${gameId}`;
+        const actionUrl = `${base.replace(/^http/, "ws")}/ws/game/${gameId}`;
         const actionWs = registerWs;
         actionWsRef.current = actionWs;
 
@@ -120,7 +133,7 @@ export function useGameSocket(gameId?: string, playerId?: number, onChatMessage?
             actionWsRef.current = null;
             setConnected(false);
         };
-    }, [gameId, playerId, baseUrl, handleIncoming]);
+    }, [gameId, playerId, baseUrl, ownerBase, handleIncoming]);
 
     const sendAction = useCallback((message: WSMessage) => {
         const ws = actionWsRef.current;